@@ -0,0 +1,383 @@
+"""
+Caché de Assets
+Evita volver a leer y parsear en cada dossier los archivos base (plantilla,
+convocatoria y cronograma) que son iguales para todos los invitados de un lote.
+"""
+
+import io
+import os
+import copy
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
+
+from docx import Document
+from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+try:
+    # Interno de python-docx (fijado en requirements.txt); sin él se guarda con Document.save
+    from docx.opc.pkgwriter import _ContentTypesItem
+except ImportError:
+    _ContentTypesItem = None
+from docxtpl import DocxTemplate
+from jinja2 import Environment
+from pypdf import PdfReader, PdfWriter
+
+from pdf_optimizer import optimize_appendix
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.RLock()
+
+# {(ruta, mtime_ns, tamaño): sha256} para no re-hashear un archivo que no cambió
+_fingerprints = {}
+
+
+def asset_fingerprint(path):
+    """
+    Hash SHA-256 del contenido de un asset. Se recalcula solo si cambian la
+    fecha de modificación o el tamaño del archivo.
+    """
+    path = Path(path)
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        digest = _fingerprints.get(key)
+    if digest is None:
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        with _lock:
+            _fingerprints[key] = digest
+    return digest
+
+
+class Appendix:
+    """
+    Anexo (convocatoria + cronograma) ya unido, optimizado al nivel pedido y
+    parseado en memoria. `original_size` es el tamaño antes de optimizar.
+    """
+
+    def __init__(self, pdf_bytes, level=0, original_size=None, optimization_seconds=0.0):
+        self.pdf_bytes = pdf_bytes
+        self.level = level
+        self.original_size = original_size or len(pdf_bytes)
+        self.optimization_seconds = optimization_seconds
+        self.reader = PdfReader(io.BytesIO(pdf_bytes))
+        self.page_count = len(self.reader.pages)
+        # PdfReader no es seguro entre hilos: las copias al dossier se serializan
+        self.lock = threading.Lock()
+
+    def append_to(self, writer, outline=True):
+        """
+        Agrega las páginas del anexo al final de `writer`. Si se agrega varias
+        veces al mismo `writer`, las copias comparten los objetos del anexo.
+        """
+        with self.lock:
+            writer.append(self.reader, import_outline=outline)
+
+
+class AppendixCache:
+    """
+    Caché del anexo por proceso, indexada por el hash del contenido de cada
+    archivo y el nivel de optimización. El anexo se une, se optimiza y se
+    parsea una sola vez y se reutiliza en cada dossier mientras los archivos
+    no cambien.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, *paths, level=0):
+        """
+        Devuelve el Appendix formado por los PDFs de `paths`, en ese orden,
+        optimizado con el nivel `level` (ver pdf_optimizer.OPTIMIZATION_LEVELS).
+        """
+        for path in paths:
+            if not Path(path).exists():
+                raise FileNotFoundError(f"Archivo de anexo no existe: {path}")
+
+        key = tuple(asset_fingerprint(path) for path in paths) + (level,)
+        with _lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        logger.info(f"📎 Preparando anexo en caché: {', '.join(Path(p).name for p in paths)}")
+        writer = PdfWriter()
+        for path in paths:
+            writer.append(str(path))
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        writer.close()
+        optimized, seconds = optimize_appendix(buffer.getvalue(), level)
+        entry = Appendix(optimized, level, buffer.tell(), seconds)
+
+        with _lock:
+            # Solo se conserva el anexo vigente: los anteriores ya no se usarán
+            self._entries = {key: entry}
+        return entry
+
+    def clear(self):
+        with _lock:
+            self._entries.clear()
+
+    def stats(self):
+        with _lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': sum(len(e.pdf_bytes) for e in self._entries.values()),
+                'bytes_original': sum(e.original_size for e in self._entries.values()),
+                'optimization_seconds': round(sum(e.optimization_seconds for e in self._entries.values()), 2),
+            }
+
+
+appendix_cache = AppendixCache()
+
+
+class _CompilingEnvironment(Environment):
+    """
+    Entorno Jinja que compila cada fuente una sola vez. DocxTemplate pasa por
+    `from_string` cada parte de la plantilla (cuerpo, encabezados, pies, notas
+    y propiedades), que es igual en todos los renders de un lote.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._compiled = {}
+
+    def from_string(self, source, globals=None, template_class=None):
+        if globals is not None or template_class is not None:
+            return super().from_string(source, globals, template_class)
+        template = self._compiled.get(source)
+        if template is None:
+            template = super().from_string(source)
+            self._compiled[source] = template
+        return template
+
+
+class _CachedDocxTemplate(DocxTemplate):
+    """
+    DocxTemplate que parte de la plantilla ya parseada: copia el documento en
+    memoria en lugar de descomprimirlo y parsearlo, y reutiliza el XML ya
+    parcheado y el Jinja ya compilado de cada parte (cuerpo, encabezados, pies).
+    """
+
+    def __init__(self, compiled):
+        super().__init__(io.BytesIO(compiled.data))
+        self._compiled = compiled
+
+    def init_docx(self, reload=True):
+        if not self.docx or (self.is_rendered and reload):
+            self.docx = copy.deepcopy(self._compiled.document)
+            self.is_rendered = False
+
+    def patch_xml(self, src_xml):
+        patched = self._compiled.patched.get(src_xml)
+        if patched is None:
+            patched = super().patch_xml(src_xml)
+            self._compiled.patched[src_xml] = patched
+        return patched
+
+    def render(self, context, jinja_env=None, autoescape=False):
+        # Sin entorno propio ni autoescape, DocxTemplate usaría un Environment()
+        # por omisión: el de la plantilla compilada es igual, pero con caché
+        if jinja_env is None and not autoescape:
+            jinja_env = self._compiled.jinja
+        super().render(context, jinja_env, autoescape)
+
+    def save(self, filename, *args, **kwargs):
+        # Igual que DocxTemplate.save, pero escribiendo el paquete con _write_package
+        self.pre_processing()
+        _write_package(self.docx, filename)
+        self.post_processing(filename)
+        self.is_saved = True
+
+
+def _write_package(document, pkg_file):
+    """
+    Escribe el DOCX como lo hace python-docx (OpcPackage.save), salvo que las
+    imágenes se guardan sin volver a comprimir: ya vienen comprimidas (Word
+    también las guarda así) y recomprimirlas era la mayor parte del costo.
+
+    Usa partes internas de python-docx (_ContentTypesItem, before_marshal); si
+    la versión instalada no las tiene, guarda con Document.save.
+    """
+    if _ContentTypesItem is None:
+        document.save(pkg_file)
+        return
+    package = document.part.package
+    parts = list(package.iter_parts())
+    for part in parts:
+        part.before_marshal()
+    with ZipFile(pkg_file, 'w', compression=ZIP_DEFLATED) as zipf:
+        zipf.writestr(CONTENT_TYPES_URI.membername, _ContentTypesItem.from_parts(parts).blob)
+        zipf.writestr(PACKAGE_URI.rels_uri.membername, package.rels.xml)
+        for part in parts:
+            compression = ZIP_STORED if part.partname.startswith('/word/media/') else ZIP_DEFLATED
+            zipf.writestr(part.partname.membername, part.blob, compress_type=compression)
+            if len(part.rels):
+                zipf.writestr(part.partname.rels_uri.membername, part.rels.xml)
+
+
+class CompiledTemplate:
+    """Plantilla DOCX parseada una vez, de la que se sacan copias baratas para cada render."""
+
+    def __init__(self, path, data):
+        self.path = Path(path)
+        self.data = data
+        self.document = Document(io.BytesIO(data))
+        self.patched = {}
+        self.jinja = _CompilingEnvironment()
+
+    def new(self):
+        """Devuelve un DocxTemplate listo para `render()` y `save()`."""
+        return _CachedDocxTemplate(self)
+
+
+class TemplateCache:
+    """Caché de plantillas compiladas por proceso, indexada por el hash del contenido."""
+
+    def __init__(self):
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path):
+        key = asset_fingerprint(path)
+        with _lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        logger.info(f"📝 Cargando plantilla en caché: {path}")
+        entry = CompiledTemplate(path, Path(path).read_bytes())
+        with _lock:
+            self._entries = {key: entry}
+        return entry
+
+    def clear(self):
+        with _lock:
+            self._entries.clear()
+
+    def stats(self):
+        with _lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': sum(len(e.data) for e in self._entries.values()),
+            }
+
+
+template_cache = TemplateCache()
+
+
+# Presupuesto de la caché de vistas previas (configurable por entorno)
+PREVIEW_CACHE_MAX_BYTES = int(os.environ.get('JPI_PREVIEW_CACHE_MB', 32)) * 1024 * 1024
+PREVIEW_CACHE_MAX_ENTRIES = int(os.environ.get('JPI_PREVIEW_CACHE_ENTRIES', 100))
+
+
+class PreviewCache:
+    """
+    Caché LRU de imágenes PNG de vista previa, indexada por el hash de los
+    datos del invitado, los datos del evento y el hash de la plantilla. La
+    misma clave sirve de ETag. Al exceder el presupuesto de bytes o de
+    entradas se descartan las vistas menos usadas recientemente.
+    """
+
+    def __init__(self, max_bytes=PREVIEW_CACHE_MAX_BYTES, max_entries=PREVIEW_CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # {clave: (id del invitado, png)}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(invitado_data, context_general, template_hash):
+        payload = json.dumps(
+            {'invitado': invitado_data, 'evento': context_general, 'plantilla': template_hash},
+            sort_keys=True, ensure_ascii=False, default=str,
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with _lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, invitado_id, png):
+        if len(png) > self.max_bytes:
+            return
+        with _lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (invitado_id, png)
+            self.bytes += len(png)
+            while self.bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def discard_invitado(self, invitado_id):
+        """Descarta las vistas previas de un invitado (al editarlo o eliminarlo)."""
+        with _lock:
+            for key in [k for k, (owner, _) in self._entries.items() if owner == invitado_id]:
+                self._remove(key)
+
+    def _remove(self, key):
+        _, png = self._entries.pop(key)
+        self.bytes -= len(png)
+
+    def clear(self):
+        with _lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with _lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
+
+
+preview_cache = PreviewCache()
+
+
+def invalidate_assets():
+    """Descarta todo lo cacheado; se llama cuando se suben nuevos archivos base."""
+    with _lock:
+        _fingerprints.clear()
+    appendix_cache.clear()
+    template_cache.clear()
+    preview_cache.clear()
+    logger.info("🧹 Caché de assets invalidada")
+
+
+def cache_stats():
+    return {
+        'appendix': appendix_cache.stats(),
+        'template': template_cache.stats(),
+        'preview': preview_cache.stats(),
+    }
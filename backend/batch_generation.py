@@ -0,0 +1,240 @@
+"""
+Módulo de Generación por Lotes
+Reparte la generación de dossieres entre los motores disponibles y, si se
+piden varios procesos, entre un pool de procesos de trabajo.
+"""
+
+import math
+import logging
+import zipfile
+import multiprocessing
+from pathlib import PurePath
+from multiprocessing.util import Finalize
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import metrics
+from document_generator import (
+    CONVERTER_POOL_SIZE,
+    converter_session,
+    generate_full_dossier,
+    generate_mail_merge_dossiers,
+    generate_pipelined_dossiers,
+)
+from pdf_stamping import generate_stamped_dossiers
+from pipeline import PIPELINE_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Máximo de procesos de trabajo y tamaño máximo de cada porción de invitados
+# con el motor 'word' (porciones pequeñas reparten mejor la carga)
+MAX_WORKERS = multiprocessing.cpu_count()
+PARALLEL_SLICE_SIZE = 8
+
+
+def _generate_word_dossiers(invitados_data, context_general, output_dir, with_appendix=True):
+    if PIPELINE_QUEUE_SIZE and len(invitados_data) > 1:
+        # El render, la conversión y la unión de invitados consecutivos se solapan
+        yield from generate_pipelined_dossiers(invitados_data, context_general, output_dir, with_appendix)
+        return
+    for invitado_data in invitados_data:
+        yield generate_full_dossier(invitado_data, context_general, output_dir, with_appendix)
+
+
+# Motor de generación: 'word' (una conversión por invitado),
+# 'lote' (todas las cartas en un solo DOCX, una conversión por bloque) o
+# 'estampado' (la plantilla se convierte una vez y los datos se estampan en el PDF)
+ENGINES = {
+    'word': _generate_word_dossiers,
+    'lote': generate_mail_merge_dossiers,
+    'estampado': generate_stamped_dossiers,
+}
+
+
+def generate_dossiers(invitados_data, context_general, output_dir, motor='word', procesos=1, with_appendix=True):
+    """
+    Genera los dossieres de todos los invitados.
+
+    Args:
+        invitados_data (list[dict]): Datos de los invitados
+        context_general (dict): Datos del evento
+        output_dir (str): Directorio de salida (None: cada resultado trae el PDF en "data")
+        motor (str): Uno de ENGINES
+        procesos (int): Número de procesos de trabajo (1 = en este proceso)
+        with_appendix (bool): False para generar solo las cartas, sin convocatoria ni cronograma
+
+    Yields:
+        tuple: (invitado_data, resultado) conforme se completa cada invitado;
+            con varios procesos el orden puede no coincidir con el de entrada.
+    """
+    if motor not in ENGINES:
+        raise ValueError(f"Motor de generación no válido: {motor}")
+    if not invitados_data:
+        return
+
+    procesos = max(1, min(int(procesos), MAX_WORKERS, len(invitados_data)))
+    if procesos == 1:
+        # La sesión mantiene las instancias de Word abiertas durante todo el lote.
+        with converter_session(size=min(CONVERTER_POOL_SIZE, len(invitados_data))):
+            results = ENGINES[motor](invitados_data, context_general, output_dir, with_appendix=with_appendix)
+            try:
+                yield from zip(invitados_data, results)
+            finally:
+                # Detiene el motor (y los hilos de su pipeline) antes de cerrar el pool
+                results.close()
+        return
+
+    yield from _generate_parallel(invitados_data, context_general, output_dir, motor, procesos, with_appendix)
+
+
+def _generate_parallel(invitados_data, context_general, output_dir, motor, procesos, with_appendix):
+    slice_size = math.ceil(len(invitados_data) / procesos)
+    if motor == 'word':
+        slice_size = min(slice_size, PARALLEL_SLICE_SIZE)
+    slices = [invitados_data[i:i + slice_size] for i in range(0, len(invitados_data), slice_size)]
+    logger.info(f"⚙️ Generación en paralelo: {procesos} procesos, {len(slices)} porciones de hasta {slice_size} invitados")
+
+    # 'spawn' en todas las plataformas: cada proceso arranca limpio, sin heredar
+    # hilos ni objetos COM del servidor
+    context = multiprocessing.get_context('spawn')
+    executor = ProcessPoolExecutor(max_workers=procesos, mp_context=context,
+                                   initializer=_init_worker, initargs=(_log_settings(),))
+    try:
+        futures = {
+            executor.submit(_generate_slice, chunk, context_general, output_dir, motor, with_appendix): chunk
+            for chunk in slices
+        }
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                results, samples = future.result()
+                # Las métricas de cada proceso de trabajo se agregan a las de este proceso
+                metrics.record_samples(samples)
+            except Exception as e:
+                # El proceso murió o la porción falló completa: se reporta cada invitado
+                logger.error(f"❌ Falló una porción de {len(chunk)} invitados: {e}")
+                results = [{"success": False, "error": str(e)} for _ in chunk]
+            yield from zip(chunk, results)
+    finally:
+        # Si se deja de consumir (cancelación), las porciones que no empezaron se descartan
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+class _ZipStream:
+    """
+    Destino de escritura sin posicionamiento para ZipFile: acumula lo escrito
+    hasta que se drena. Al no poder retroceder, ZipFile escribe los tamaños de
+    cada entrada en un descriptor de datos posterior.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def generate_dossiers_zip(invitados_data, context_general, motor='word'):
+    """
+    Genera los dossieres y los entrega como un ZIP en flujo: cada PDF se agrega
+    al archivo en cuanto se produce y sus bytes se entregan de inmediato, sin
+    escribir los dossieres a disco ni retener el ZIP completo en memoria. Los
+    PDFs se guardan sin recomprimir (ya vienen comprimidos).
+
+    Los errores por invitado se reúnen en una entrada final `errores.txt`.
+
+    Yields:
+        bytes: Fragmentos consecutivos del archivo ZIP
+    """
+    stream = _ZipStream()
+    names = set()
+    errors = []
+    # En este proceso: con varios procesos los PDFs tendrían que viajar entre procesos
+    results = generate_dossiers(invitados_data, context_general, None, motor=motor, procesos=1)
+    try:
+        with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for invitado_data, result in results:
+                if not result["success"]:
+                    errors.append(f"{invitado_data.get('nombre_completo')}: {result.get('error', 'Error desconocido')}")
+                    continue
+                archive.writestr(_unique_name(result["filename"], names), result["data"])
+                yield stream.drain()
+            if errors:
+                archive.writestr('errores.txt', '\n'.join(errors) + '\n', compress_type=zipfile.ZIP_DEFLATED)
+        # Al cerrar se escribe el directorio central
+        yield stream.drain()
+    finally:
+        results.close()
+    logger.info(f"📦 ZIP enviado: {len(names)} dossieres, {len(errors)} errores")
+
+
+def _unique_name(filename, names):
+    # Dos invitados pueden producir el mismo nombre de archivo
+    name = filename
+    path = PurePath(filename)
+    counter = 2
+    while name in names:
+        name = f"{path.stem}_{counter}{path.suffix}"
+        counter += 1
+    names.add(name)
+    return name
+
+
+# --- Procesos de trabajo ---
+_worker_session = None
+
+
+def _log_settings():
+    """
+    Archivo, codificación, formato y nivel del log de este proceso, para repetirlos en los
+    procesos de trabajo: con 'spawn' arrancan sin configuración de log.
+    """
+    root = logging.getLogger()
+    handler = next((h for h in root.handlers if isinstance(h, logging.FileHandler)), None)
+    if handler is None:
+        return None
+    return handler.baseFilename, handler.encoding, handler.formatter, root.level
+
+
+def _init_worker(log_settings=None):
+    """
+    Inicializa un proceso de trabajo: configura el log como el del servidor
+    (los procesos escriben en el mismo archivo) y abre su propio pool de
+    convertidores de una instancia (cuyo hilo inicializa su propio apartamento
+    COM), que se mantiene caliente para todas las porciones que procese y se
+    cierra al terminar el proceso.
+    """
+    global _worker_session
+    if log_settings is not None:
+        filename, encoding, formatter, level = log_settings
+        handler = logging.FileHandler(filename, encoding=encoding)
+        handler.setFormatter(formatter)
+        logging.basicConfig(handlers=[handler], level=level)
+    _worker_session = converter_session(size=1)
+    _worker_session.__enter__()
+    # Los procesos de multiprocessing terminan con os._exit (no corren atexit)
+    Finalize(None, _close_worker, exitpriority=10)
+
+
+def _close_worker():
+    if _worker_session is not None:
+        _worker_session.__exit__(None, None, None)
+
+
+def _generate_slice(invitados_data, context_general, output_dir, motor, with_appendix):
+    with metrics.capture() as samples:
+        results = list(ENGINES[motor](invitados_data, context_general, output_dir, with_appendix=with_appendix))
+    return results, samples
@@ -0,0 +1,112 @@
+"""
+Diario de Lotes
+Registra el avance de un lote de generación, invitado por invitado, en un
+archivo JSONL oculto dentro de la carpeta de salida. Cada línea se sincroniza
+a disco en cuanto el invitado termina, así que el diario sobrevive a un cierre
+inesperado del servidor: un lote interrumpido se reanuda a partir del diario
+(POST /api/jobs/<id>/resume) y solo se generan los invitados que faltan.
+
+La primera línea guarda lo necesario para repetir el lote (datos del evento,
+motor, salida e invitados); las siguientes, el resultado de cada invitado.
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def journal_path(output_dir, job_id):
+    return Path(output_dir) / f".diario_{job_id}.jsonl"
+
+
+class BatchJournal:
+    """
+    Diario de un lote. `header` trae el lote original (`lote`), la carpeta de
+    salida y los parámetros de la generación; `completed` los invitados ya
+    generados ({id: archivo}).
+    """
+
+    def __init__(self, path, header, completed=None):
+        self.path = Path(path)
+        self.header = header
+        self.completed = completed or {}
+        self._file = None
+
+    @classmethod
+    def create(cls, output_dir, job_id, context_general, invitados_data, **params):
+        """Empieza el diario de un lote nuevo."""
+        journal = cls(journal_path(output_dir, job_id), {
+            'lote': job_id,
+            'output_dir': str(output_dir),
+            'context_general': context_general,
+            'invitados': [invitado_data['id'] for invitado_data in invitados_data],
+            **params,
+        })
+        journal._append(journal.header, mode='w')
+        return journal
+
+    @classmethod
+    def open(cls, path):
+        """
+        Lee un diario existente para reanudar su lote. Una última línea
+        incompleta (el servidor se cerró mientras se escribía) se ignora.
+        """
+        header = None
+        completed = {}
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"⚠️ Línea incompleta en el diario {path}; se ignora")
+                    continue
+                if header is None:
+                    header = entry
+                elif entry.get('ok'):
+                    completed[entry['id']] = entry['archivo']
+                else:
+                    # Un invitado que falló se vuelve a intentar al reanudar
+                    completed.pop(entry['id'], None)
+        if header is None:
+            raise ValueError(f"El diario {path} está vacío")
+        return cls(path, header, completed)
+
+    def is_done(self, invitado_data):
+        return invitado_data['id'] in self.completed
+
+    def result(self, invitado_data):
+        """Resultado de un invitado ya generado, como el de generate_full_dossier."""
+        return {"success": True, "path": str(Path(self.header['output_dir']) / self.completed[invitado_data['id']])}
+
+    def record(self, invitado_data, result):
+        """Agrega el resultado de un invitado y lo sincroniza a disco."""
+        entry = {'id': invitado_data['id'], 'ok': bool(result["success"])}
+        if result["success"] and 'path' in result:
+            entry['archivo'] = Path(result['path']).name
+            self.completed[entry['id']] = entry['archivo']
+        elif not result["success"]:
+            entry['error'] = result.get('error')
+        self._append(entry)
+
+    def _append(self, entry, mode='a'):
+        if self._file is None:
+            self._file = open(self.path, mode, encoding='utf-8')
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """El lote terminó completo: ya no hay nada que reanudar."""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
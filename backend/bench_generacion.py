@@ -0,0 +1,245 @@
+"""
+Benchmark: Generación de Invitaciones de Extremo a Extremo
+Crea una base de datos temporal con N invitados sintéticos, usa los archivos
+de 'Para pruebas de invitaciones/' y el convertidor simulado (latencia
+configurable, sin Word) y mide POST /api/generate-all-invitations hasta que
+el trabajo termina, junto con el tiempo de cada etapa (ver metrics.py).
+
+Los resultados se guardan en JSON para compararlos entre commits; con
+--comparar se marca como regresión cualquier tamaño que tarde más que la
+base por encima del umbral (código de salida 1).
+
+Uso:
+    python bench_generacion.py [--invitados 10,100,1000] [--motor word] [--procesos 1]
+                               [--latencia 0.05] [--arranque 0.2] [--salida resultados.json]
+                               [--comparar base.json] [--umbral 0.10]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+MUESTRAS_DIR = Path(__file__).parent.parent / 'Para pruebas de invitaciones'
+
+NOMBRES = ['Ana', 'Luis', 'María', 'José', 'Carmen', 'Jorge', 'Laura', 'Miguel', 'Sofía', 'Ricardo']
+APELLIDOS = ['López', 'Hernández', 'García', 'Martínez', 'Rodríguez', 'Pérez', 'Sánchez', 'Ramírez']
+TITULOS = ['Dr.', 'Dra.', 'Ing.', 'Mtro.', 'Mtra.', 'Lic.']
+INSTITUCIONES = [
+    ('Instituto Tecnológico de Morelia', 'ITM'),
+    ('Universidad Michoacana de San Nicolás de Hidalgo', 'UMSNH'),
+    ('Instituto Politécnico Nacional', 'IPN'),
+    ('Universidad Nacional Autónoma de México', 'UNAM'),
+]
+PUESTOS = ['Jefe del Departamento de Sistemas', 'Coordinadora de Posgrado', 'Director de Vinculación',
+           'Profesora Investigadora']
+CARACTERES = ['jurado', 'jurado de protocolo', 'invitado especial', 'asesor externo']
+
+EVENTO = {
+    'anio': '2025',
+    'periodo': '1',
+    'edicion_evento': '8',
+    'fecha_evento': '28 de mayo de 2025',
+    'fecha_carta': '2025-05-01',
+}
+
+
+def _leer_argumentos():
+    parser = argparse.ArgumentParser(description="Benchmark de generación de invitaciones")
+    parser.add_argument('--invitados', default='10,100,1000', help="Tamaños de lote, separados por comas")
+    parser.add_argument('--motor', default='word', help="Motor de generación (word, lote, estampado)")
+    parser.add_argument('--procesos', type=int, default=1, help="Procesos de trabajo")
+    parser.add_argument('--salida-generacion', default='dossieres', dest='tipo_salida',
+                        help="Tipo de salida (dossieres, cartas, impresion)")
+    parser.add_argument('--latencia', type=float, default=0.05, help="Segundos por conversión simulada")
+    parser.add_argument('--arranque', type=float, default=0.2, help="Segundos de arranque del convertidor simulado")
+    parser.add_argument('--semilla', type=int, default=2025, help="Semilla de los invitados sintéticos")
+    parser.add_argument('--salida', help="Archivo JSON donde guardar los resultados")
+    parser.add_argument('--comparar', help="Resultados base (JSON) contra los que comparar")
+    parser.add_argument('--umbral', type=float, default=0.10, help="Aumento tolerado antes de declarar regresión")
+    return parser.parse_args()
+
+
+def _preparar_entorno(args, directorio):
+    """
+    Configura el entorno antes de importar la aplicación: carpeta de datos
+    temporal (sys.argv[1]), Escritorio temporal y convertidor simulado. Los
+    procesos de trabajo heredan sys.argv y las variables de entorno.
+    """
+    assets = directorio / 'assets'
+    assets.mkdir()
+    muestras = {
+        'plantilla_base.docx': next(MUESTRAS_DIR.glob('*.docx')),
+        'convocatoria.pdf': next(MUESTRAS_DIR.glob('*Convocatoria*.pdf')),
+        'cronograma.pdf': next(MUESTRAS_DIR.glob('*Programa*.pdf')),
+    }
+    for nombre, origen in muestras.items():
+        shutil.copy(origen, assets / nombre)
+
+    sys.argv = [sys.argv[0], str(directorio)]
+    os.environ['HOME'] = os.environ['USERPROFILE'] = str(directorio)
+    os.environ['JPI_CONVERTER'] = 'fake'
+    os.environ['JPI_FAKE_STARTUP_DELAY'] = str(args.arranque)
+    os.environ['JPI_FAKE_DOCUMENT_DELAY'] = str(args.latencia)
+
+
+def _invitados_sinteticos(main, cantidad, semilla, prob_asesor=0.3):
+    azar = random.Random(semilla)
+    invitados = []
+    for i in range(cantidad):
+        institucion, abreviacion = azar.choice(INSTITUCIONES)
+        invitado = main.Invitado(
+            nombre_completo=f"{azar.choice(TITULOS)} {azar.choice(NOMBRES)} "
+                            f"{azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)} {i}",
+            caracter_invitacion=azar.choice(CARACTERES),
+            puesto_completo=azar.choice(PUESTOS),
+            institucion=institucion,
+            abreviacion_org=abreviacion,
+            es_asesor_t1=azar.random() < prob_asesor,
+            es_asesor_t2=azar.random() < prob_asesor,
+        )
+        invitado.compute_jurado_flags()
+        invitados.append(invitado)
+    return invitados
+
+
+def _medir(main, metrics, pipeline, cliente, args, cantidad):
+    with main.app.app_context():
+        main.Invitado.query.delete()
+        main.db.session.add_all(_invitados_sinteticos(main, cantidad, args.semilla))
+        main.db.session.commit()
+    metrics.reset()
+
+    inicio = time.perf_counter()
+    respuesta = cliente.post('/api/generate-all-invitations', json={
+        **EVENTO, 'motor': args.motor, 'procesos': args.procesos, 'salida': args.tipo_salida,
+    })
+    if respuesta.status_code != 202:
+        raise RuntimeError(f"No se pudo iniciar la generación: {respuesta.get_json()}")
+    job_id = respuesta.get_json()['job_id']
+    while True:
+        trabajo = cliente.get(f'/api/jobs/{job_id}').get_json()
+        if trabajo['estado'] not in ('pendiente', 'en_curso'):
+            break
+        time.sleep(0.05)
+    segundos = time.perf_counter() - inicio
+
+    salida = Path(trabajo['output_folder'])
+    shutil.rmtree(salida, ignore_errors=True)
+    return {
+        'invitados': cantidad,
+        'estado': trabajo['estado'],
+        'generados': trabajo['generated_count'],
+        'errores': len(trabajo['errors']),
+        'segundos': round(segundos, 3),
+        'ms_por_invitado': round(segundos / cantidad * 1000, 2),
+        'etapas': metrics.stage_stats(),
+        # Colas del pipeline por etapas (solo el motor 'word' en este proceso)
+        'pipeline': pipeline.last_run_stats() if args.motor == 'word' and args.procesos == 1 else {},
+    }
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=Path(__file__).parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _comparar(resultados, base, umbral):
+    """Imprime la comparación contra la base y devuelve True si hubo regresión."""
+    base_por_tamano = {r['invitados']: r for r in base['resultados']}
+    regresion = False
+    print(f"\n📊 Comparación contra {base.get('commit') or 'la base'} (umbral {umbral * 100:.0f}%)")
+    for actual in resultados:
+        anterior = base_por_tamano.get(actual['invitados'])
+        if anterior is None:
+            continue
+        cambio = actual['segundos'] / anterior['segundos'] - 1
+        marca = '❌ REGRESIÓN' if cambio > umbral else '✅'
+        regresion |= cambio > umbral
+        print(f"   {actual['invitados']:>5} invitados: {anterior['segundos']:.2f}s → "
+              f"{actual['segundos']:.2f}s ({cambio * 100:+.1f}%) {marca}")
+        for etapa, stats in actual['etapas'].items():
+            previo = anterior['etapas'].get(etapa)
+            if previo and previo['seconds']:
+                print(f"         {etapa:<10} {previo['seconds']:.3f}s → {stats['seconds']:.3f}s "
+                      f"({(stats['seconds'] / previo['seconds'] - 1) * 100:+.1f}%)")
+    return regresion
+
+
+def main():
+    args = _leer_argumentos()
+    tamanos = [int(n) for n in args.invitados.split(',')]
+    base = json.loads(Path(args.comparar).read_text(encoding='utf-8')) if args.comparar else None
+
+    directorio = Path(tempfile.mkdtemp(prefix='jpi_bench_'))
+    try:
+        _preparar_entorno(args, directorio)
+        # Importar después de preparar el entorno: la aplicación lee sys.argv al importarse
+        import server as aplicacion
+        import metrics
+        import pipeline
+
+        with aplicacion.app.app_context():
+            aplicacion.db.create_all()
+        cliente = aplicacion.app.test_client()
+
+        print("=" * 60)
+        print("BENCHMARK: Generación de Invitaciones")
+        print("=" * 60)
+        print(f"Motor: {args.motor}   Procesos: {args.procesos}   Salida: {args.tipo_salida}")
+        print(f"Convertidor simulado: {args.latencia}s por documento, {args.arranque}s de arranque")
+
+        resultados = []
+        for cantidad in tamanos:
+            print(f"\n⏱️  {cantidad} invitados...")
+            resultado = _medir(aplicacion, metrics, pipeline, cliente, args, cantidad)
+            resultados.append(resultado)
+            print(f"   {resultado['estado']}: {resultado['generados']} generados, {resultado['errores']} errores "
+                  f"en {resultado['segundos']:.2f}s ({resultado['ms_por_invitado']:.1f} ms por invitado)")
+            for etapa, stats in resultado['etapas'].items():
+                print(f"      {etapa:<10} n={stats['count']:<5} total={stats['seconds']:.3f}s "
+                      f"p50={stats['p50'] * 1000:.1f}ms p95={stats['p95'] * 1000:.1f}ms")
+            for etapa, stats in resultado['pipeline'].items():
+                print(f"      🏭 {etapa:<8} {stats['por_segundo']}/s utilización={stats['utilizacion'] * 100:.0f}% "
+                      f"cola máx.={stats['cola_max']} media={stats['cola_media']}")
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    reporte = {
+        'commit': _commit_actual(),
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'config': {
+            'motor': args.motor,
+            'procesos': args.procesos,
+            'salida': args.tipo_salida,
+            'latencia': args.latencia,
+            'arranque': args.arranque,
+            'semilla': args.semilla,
+        },
+        'resultados': resultados,
+    }
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(reporte, ensure_ascii=False, indent=1), encoding='utf-8')
+        print(f"\n💾 Resultados guardados en {args.salida}")
+
+    if base is not None:
+        if base.get('config') != reporte['config']:
+            print("⚠️ La configuración de la base es distinta; la comparación puede no ser válida")
+        if _comparar(resultados, base, args.umbral):
+            print("=" * 60)
+            sys.exit(1)
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: Render de la Plantilla DOCX
+Compara el tiempo por invitado de renderizar la plantilla cargándola desde
+disco cada vez (DocxTemplate) contra la plantilla compilada en caché.
+
+Uso: python bench_plantilla.py [ruta_plantilla.docx] [repeticiones]
+"""
+
+import io
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+from docxtpl import DocxTemplate
+
+from asset_cache import template_cache
+
+DEFAULT_TEMPLATE = next(
+    (Path(__file__).parent.parent / 'Para pruebas de invitaciones').glob('*.docx'), None
+)
+
+if len(sys.argv) > 1:
+    TEMPLATE_PATH = Path(sys.argv[1])
+else:
+    TEMPLATE_PATH = DEFAULT_TEMPLATE
+REPETICIONES = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+# document_generator toma la carpeta de datos de sys.argv[1] al importarse
+sys.argv = [sys.argv[0], tempfile.mkdtemp(prefix='jpi_plantilla_')]
+from document_generator import _build_context  # noqa: E402
+
+INVITADO = {
+    'nombre_completo': 'Dra. Ana María López Hernández',
+    'puesto_completo': 'Jefa del Departamento de Sistemas',
+    'institucion': 'Instituto Tecnológico de Morelia',
+    'abreviacion_org': 'ITM',
+    'caracter_invitacion': 'jurado',
+}
+EVENTO = {
+    'anio': '2025',
+    'periodo': '1',
+    'edicion_evento': '8',
+    'fecha_evento': '28 de mayo de 2025',
+    'fecha_carta': '1 de mayo de 2025',
+}
+
+
+def _medir(crear_documento):
+    """Devuelve la mediana en segundos de (carga + render, guardado)."""
+    render, guardado = [], []
+    for i in range(REPETICIONES):
+        inicio = time.perf_counter()
+        doc = crear_documento()
+        # El mismo contexto que la generación real, con un nombre distinto en cada vuelta
+        doc.render(_build_context({**INVITADO, 'nombre_completo': f"{INVITADO['nombre_completo']} {i}"}, EVENTO))
+        medio = time.perf_counter()
+        doc.save(io.BytesIO())
+        render.append(medio - inicio)
+        guardado.append(time.perf_counter() - medio)
+    return sorted(render)[len(render) // 2], sorted(guardado)[len(guardado) // 2]
+
+
+def _reportar(render, guardado):
+    print(f"   Carga + render: {render * 1000:.1f} ms   Guardado: {guardado * 1000:.1f} ms   "
+          f"Total: {(render + guardado) * 1000:.1f} ms")
+
+
+print("=" * 60)
+print("BENCHMARK: Render de la Plantilla DOCX")
+print("=" * 60)
+print(f"Plantilla: {TEMPLATE_PATH}")
+print(f"Repeticiones: {REPETICIONES}")
+
+if TEMPLATE_PATH is None or not TEMPLATE_PATH.exists():
+    print("❌ ERROR: La plantilla no existe")
+    sys.exit(1)
+
+print("\n⏱️  Sin caché (DocxTemplate por invitado)...")
+render_sin, guardado_sin = _medir(lambda: DocxTemplate(TEMPLATE_PATH))
+_reportar(render_sin, guardado_sin)
+
+print("\n⏱️  Con caché (plantilla compilada)...")
+inicio = time.perf_counter()
+compiled = template_cache.get(TEMPLATE_PATH)
+print(f"   Compilación inicial: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+render_con, guardado_con = _medir(compiled.new)
+_reportar(render_con, guardado_con)
+
+print("\n" + "=" * 60)
+print(f"✅ Carga + render por invitado: {render_sin * 1000:.1f} ms → {render_con * 1000:.1f} ms "
+      f"({(1 - render_con / render_sin) * 100:.0f}% menos)")
+total_sin = render_sin + guardado_sin
+total_con = render_con + guardado_con
+print(f"✅ Total por invitado: {total_sin * 1000:.1f} ms → {total_con * 1000:.1f} ms "
+      f"({(1 - total_con / total_sin) * 100:.0f}% menos)")
+print("=" * 60)
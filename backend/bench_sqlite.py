@@ -0,0 +1,204 @@
+"""
+Benchmark: Perfil de Almacenamiento de SQLite
+Compara los valores por defecto de SQLite (diario DELETE, synchronous FULL)
+con el perfil de sqlite_storage.py (WAL, synchronous NORMAL, caché, mmap,
+busy_timeout), cada uno sobre su propia copia de una base de datos con N
+invitados sintéticos. Mide:
+
+- Latencia de commit: un UPDATE de un invitado y su commit, uno tras otro.
+- Lecturas concurrentes: varios hilos leen páginas de la lista (por nombre y
+  por rol) mientras un hilo escritor hace commits sin pausa, como la interfaz
+  mientras un trabajo de generación guarda su avance. Se cuentan las lecturas
+  por segundo, los commits y los errores "database is locked".
+
+Uso:
+    python bench_sqlite.py [--invitados 5000] [--commits 300] [--lectores 4]
+                           [--segundos 3] [--salida resultados.json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import statistics
+from pathlib import Path
+from datetime import datetime
+
+
+def _leer_argumentos():
+    parser = argparse.ArgumentParser(description="Benchmark del perfil de almacenamiento de SQLite")
+    parser.add_argument('--invitados', type=int, default=5000, help="Invitados sintéticos en la base de datos")
+    parser.add_argument('--commits', type=int, default=300, help="Commits para medir la latencia")
+    parser.add_argument('--lectores', type=int, default=4, help="Hilos lectores concurrentes")
+    parser.add_argument('--segundos', type=float, default=3.0, help="Duración de la prueba concurrente")
+    parser.add_argument('--semilla', type=int, default=2025, help="Semilla de los invitados sintéticos")
+    parser.add_argument('--salida', help="Archivo JSON donde guardar los resultados")
+    return parser.parse_args()
+
+
+def _crear_motor(ruta, perfil):
+    """Motor sobre `ruta`: 'base' con los valores por defecto de SQLite, 'wal' con sqlite_storage."""
+    from sqlalchemy import create_engine, event
+    import sqlite_storage
+
+    url = 'sqlite:///' + str(ruta)
+    if perfil == 'wal':
+        return sqlite_storage.configure_engine(create_engine(url, **sqlite_storage.engine_options()))
+
+    motor = create_engine(url, pool_size=sqlite_storage.POOL_SIZE, max_overflow=sqlite_storage.POOL_OVERFLOW,
+                          connect_args={'check_same_thread': False})
+
+    # journal_mode se guarda en el archivo: la copia viene en WAL
+    @event.listens_for(motor, 'connect')
+    def _diario_por_defecto(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA journal_mode=DELETE")
+
+    return motor
+
+
+def _latencia_commits(aplicacion, motor, commits, azar, ids):
+    from sqlalchemy import update
+
+    tabla = aplicacion.Invitado.__table__
+    tiempos = []
+    for i in range(commits):
+        inicio = time.perf_counter()
+        with motor.begin() as conexion:
+            conexion.execute(update(tabla).where(tabla.c.id == azar.choice(ids)).values(nota=f"bench {i}"))
+        tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    return {
+        'p50_ms': round(statistics.median(tiempos) * 1000, 3),
+        'p95_ms': round(tiempos[int(len(tiempos) * 0.95) - 1] * 1000, 3),
+        'media_ms': round(statistics.fmean(tiempos) * 1000, 3),
+    }
+
+
+def _lecturas_concurrentes(aplicacion, motor, lectores, segundos, ids):
+    from sqlalchemy import select, update
+    from sqlalchemy.exc import OperationalError
+
+    tabla = aplicacion.Invitado.__table__
+    consultas = [
+        select(*aplicacion.COLUMNAS_LISTA).order_by(aplicacion.NOMBRE_NORMALIZADO, aplicacion.Invitado.id).limit(100),
+        select(*aplicacion.COLUMNAS_LISTA).where(aplicacion.ROLES['asesor_t1'])
+            .order_by(aplicacion.Invitado.id).limit(100),
+        select(*aplicacion.COLUMNAS_LISTA).where(aplicacion.ROLES['especial'])
+            .order_by(aplicacion.Invitado.id).limit(100),
+    ]
+    fin = time.perf_counter() + segundos
+    conteos = {'lecturas': 0, 'commits': 0, 'bloqueos': 0}
+    candado = threading.Lock()
+
+    def _contar(clave):
+        with candado:
+            conteos[clave] += 1
+
+    def _lector(numero):
+        i = numero
+        while time.perf_counter() < fin:
+            try:
+                with motor.connect() as conexion:
+                    conexion.execute(consultas[i % len(consultas)]).all()
+                _contar('lecturas')
+            except OperationalError:
+                _contar('bloqueos')
+            i += 1
+
+    def _escritor():
+        azar = random.Random(0)
+        i = 0
+        while time.perf_counter() < fin:
+            try:
+                with motor.begin() as conexion:
+                    conexion.execute(update(tabla).where(tabla.c.id == azar.choice(ids)).values(nota=f"escritor {i}"))
+                _contar('commits')
+            except OperationalError:
+                _contar('bloqueos')
+            i += 1
+
+    hilos = [threading.Thread(target=_lector, args=(n,)) for n in range(lectores)]
+    hilos.append(threading.Thread(target=_escritor))
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    transcurrido = time.perf_counter() - inicio
+    return {
+        'lecturas_por_segundo': round(conteos['lecturas'] / transcurrido, 1),
+        'commits_por_segundo': round(conteos['commits'] / transcurrido, 1),
+        'bloqueos': conteos['bloqueos'],
+    }
+
+
+def main():
+    args = _leer_argumentos()
+    directorio = Path(tempfile.mkdtemp(prefix='jpi_sqlite_'))
+    try:
+        # La aplicación lee sys.argv al importarse (carpeta de datos temporal)
+        sys.argv = [sys.argv[0], str(directorio)]
+        os.environ['HOME'] = os.environ['USERPROFILE'] = str(directorio)
+        sys.path.insert(0, str(Path(__file__).parent))
+        import server as aplicacion
+        import sqlite_storage
+        from bench_generacion import _invitados_sinteticos
+
+        with aplicacion.app.app_context():
+            aplicacion.db.create_all()
+            aplicacion.db.session.add_all(_invitados_sinteticos(aplicacion, args.invitados, args.semilla))
+            aplicacion.db.session.commit()
+            aplicacion.asegurar_indices()
+            ids = list(aplicacion.db.session.scalars(aplicacion.db.select(aplicacion.Invitado.id)))
+            with aplicacion.db.engine.connect() as conexion:
+                # Todo el WAL al archivo principal antes de copiarlo
+                conexion.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+            aplicacion.db.engine.dispose()
+
+        print("=" * 60)
+        print("BENCHMARK: Perfil de Almacenamiento de SQLite")
+        print("=" * 60)
+        print(f"Invitados: {args.invitados}   Commits: {args.commits}   "
+              f"Lectores: {args.lectores}   Duración: {args.segundos}s")
+
+        resultados = {}
+        for perfil in ('base', 'wal'):
+            ruta = directorio / f'bench_{perfil}.sqlite'
+            shutil.copyfile(aplicacion.DB_PATH, ruta)
+            motor = _crear_motor(ruta, perfil)
+            ajustes = sqlite_storage.storage_settings(motor)
+            commits = _latencia_commits(aplicacion, motor, args.commits, random.Random(args.semilla), ids)
+            concurrencia = _lecturas_concurrentes(aplicacion, motor, args.lectores, args.segundos, ids)
+            motor.dispose()
+            resultados[perfil] = {'pragmas': ajustes, 'commit': commits, 'concurrencia': concurrencia}
+
+            print(f"\n⏱️  {perfil}: journal_mode={ajustes['journal_mode']} synchronous={ajustes['synchronous']}")
+            print(f"   Commit: p50={commits['p50_ms']:.2f}ms p95={commits['p95_ms']:.2f}ms "
+                  f"media={commits['media_ms']:.2f}ms")
+            print(f"   Concurrente: {concurrencia['lecturas_por_segundo']} lecturas/s, "
+                  f"{concurrencia['commits_por_segundo']} commits/s, {concurrencia['bloqueos']} bloqueos")
+
+        base, wal = resultados['base'], resultados['wal']
+        print(f"\n📊 Commit p50: {base['commit']['p50_ms'] / max(wal['commit']['p50_ms'], 1e-6):.1f}x más rápido; "
+              f"lecturas concurrentes: {wal['concurrencia']['lecturas_por_segundo'] / max(base['concurrencia']['lecturas_por_segundo'], 1e-6):.1f}x")
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    if args.salida:
+        reporte = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'config': {k: getattr(args, k) for k in ('invitados', 'commits', 'lectores', 'segundos', 'semilla')},
+            'resultados': resultados,
+        }
+        Path(args.salida).write_text(json.dumps(reporte, ensure_ascii=False, indent=1), encoding='utf-8')
+        print(f"\n💾 Resultados guardados en {args.salida}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
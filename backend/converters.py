@@ -0,0 +1,521 @@
+"""
+Módulo de Conversión DOCX → PDF
+Mantiene instancias "calientes" del convertidor (Word) durante un lote completo
+en lugar de abrir y cerrar Word por cada invitado.
+"""
+
+import io
+import os
+import time
+import uuid
+import queue
+import signal
+import logging
+import tempfile
+import threading
+import traceback
+from pathlib import Path
+from concurrent.futures import Future, InvalidStateError
+
+import metrics
+
+try:
+    import pythoncom  # Para inicializar COM en Windows
+    import win32com.client  # Para conversión DOCX a PDF directa
+    import win32gui  # Para localizar el proceso de Word (y terminarlo si se cuelga)
+    import win32process
+except ImportError:  # Fuera de Windows (pruebas y benchmarks con el convertidor simulado)
+    pythoncom = None
+    win32com = None
+    win32gui = None
+    win32process = None
+
+logger = logging.getLogger(__name__)
+
+# El formato 17 corresponde a wdFormatPDF
+WD_FORMAT_PDF = 17
+WD_ALERTS_NONE = 0
+
+# Carpeta para los convertidores que solo trabajan con archivos (Word): un disco
+# RAM si se configura JPI_SCRATCH_DIR, /dev/shm si existe, o la carpeta temporal
+SCRATCH_DIR = Path(
+    os.environ.get('JPI_SCRATCH_DIR')
+    or ('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir())
+)
+# En Windows, O_SHORT_LIVED marca el archivo como temporal: el sistema lo
+# mantiene en caché en lugar de escribirlo a disco
+_SCRATCH_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0) | getattr(os, 'O_SHORT_LIVED', 0)
+
+# Segundos que puede tardar una conversión antes de que el vigilante termine la
+# instancia y la reemplace (0 lo desactiva)
+CONVERSION_TIMEOUT = float(os.environ.get('JPI_CONVERSION_TIMEOUT', 120))
+
+_scratch_lock = threading.Lock()
+_scratch_io = {'files': 0, 'bytes': 0}
+
+
+def scratch_stats():
+    """Archivos y bytes que los convertidores escribieron o leyeron en SCRATCH_DIR."""
+    with _scratch_lock:
+        return {'dir': str(SCRATCH_DIR), **_scratch_io}
+
+
+def _count_scratch(files, nbytes):
+    with _scratch_lock:
+        _scratch_io['files'] += files
+        _scratch_io['bytes'] += nbytes
+
+
+class ConversionTimeout(Exception):
+    """Una conversión excedió CONVERSION_TIMEOUT y su convertidor se terminó."""
+
+
+class BaseConverter:
+    """
+    Interfaz común de los convertidores DOCX → PDF.
+
+    Cada instancia pertenece a un único hilo del pool: se inicia una vez,
+    convierte varios documentos y se cierra al reciclarse o al terminar el lote.
+    """
+    name = 'base'
+
+    def __init__(self):
+        self.documents_converted = 0
+
+    def start(self):
+        """Arranca el convertidor (costo que se paga una sola vez por instancia)."""
+        raise NotImplementedError
+
+    def convert(self, input_path, output_path):
+        """Convierte `input_path` (DOCX) en `output_path` (PDF). Lanza excepción si falla."""
+        raise NotImplementedError
+
+    def convert_bytes(self, docx_bytes):
+        """
+        Convierte un DOCX en memoria y devuelve los bytes del PDF.
+
+        Por defecto pasa por un par de archivos efímeros en SCRATCH_DIR; los
+        convertidores que pueden trabajar en memoria lo sobrescriben.
+        """
+        stem = SCRATCH_DIR / f"jpi_{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        input_path = stem.with_suffix('.docx')
+        output_path = stem.with_suffix('.pdf')
+        try:
+            fd = os.open(input_path, _SCRATCH_FLAGS, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(docx_bytes)
+            self.convert(input_path, output_path)
+            pdf_bytes = output_path.read_bytes()
+            _count_scratch(2, len(docx_bytes) + len(pdf_bytes))
+            return pdf_bytes
+        finally:
+            with metrics.stage('cleanup'):
+                for path in (input_path, output_path):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+
+    def close(self):
+        """Libera el convertidor."""
+
+    def kill(self):
+        """
+        Termina el convertidor a la fuerza cuando una conversión se colgó. Se
+        llama desde el hilo del vigilante, no desde el del convertidor.
+        """
+
+
+class WordConverter(BaseConverter):
+    """Convertidor basado en la automatización COM de Microsoft Word."""
+    name = 'word'
+
+    def __init__(self):
+        super().__init__()
+        self.word = None
+        self.pid = None
+        self.killed = False
+
+    def start(self):
+        if win32com is None:
+            raise RuntimeError("Microsoft Word (pywin32) no está disponible en este sistema")
+
+        logger.info("   🔧 Iniciando instancia de Word...")
+        self.word = win32com.client.DispatchEx("Word.Application")
+        self.word.Visible = False  # Mantenemos Word invisible
+        self.word.DisplayAlerts = WD_ALERTS_NONE  # Evita diálogos modales que bloquean la conversión
+        self.pid = self._find_pid()
+        logger.info(f"   ✅ Instancia de Word creada exitosamente (PID: {self.pid})")
+
+    def _find_pid(self):
+        # Word no expone su PID: se le pone un título único y se busca su ventana
+        try:
+            caption = f"jpi-{uuid.uuid4().hex}"
+            self.word.Caption = caption
+            hwnd = win32gui.FindWindow('OpusApp', caption)
+            return win32process.GetWindowThreadProcessId(hwnd)[1] if hwnd else None
+        except Exception as e:
+            logger.warning(f"   ⚠️ No se pudo obtener el PID de Word: {e}")
+            return None
+
+    def convert(self, input_path, output_path):
+        # Asegura que las rutas sean absolutas
+        input_path = str(Path(input_path).resolve())
+        output_path = str(Path(output_path).resolve())
+
+        doc = self.word.Documents.Open(input_path, ReadOnly=True, AddToRecentFiles=False)
+        try:
+            doc.SaveAs(output_path, FileFormat=WD_FORMAT_PDF)
+        finally:
+            doc.Close(0)  # El 0 significa no guardar cambios al cerrar
+
+    def close(self):
+        # Importantísimo: Asegurarse de que Word se cierre siempre
+        if self.word is None:
+            return
+        if self.killed:
+            self.word = None
+            return
+        try:
+            self.word.Quit()
+            logger.info("   🔒 Instancia de Word cerrada.")
+        except Exception:
+            logger.warning("   ⚠️ No se pudo cerrar Word limpiamente")
+        finally:
+            self.word = None
+
+    def kill(self):
+        self.killed = True
+        if self.pid is None:
+            logger.error("   ❌ No se conoce el PID de Word: la instancia colgada no se puede terminar")
+            return
+        # En Windows, os.kill termina el proceso (TerminateProcess); la llamada COM
+        # colgada falla y el hilo del convertidor queda libre
+        os.kill(self.pid, signal.SIGTERM)
+        logger.warning(f"   💀 Instancia de Word terminada (PID: {self.pid})")
+
+
+class FakeConverter(BaseConverter):
+    """
+    Convertidor simulado en proceso, para ejercitar el pool en Linux sin Word.
+
+    Simula el costo de arranque de Word y el costo por documento, y produce un
+    PDF real con el texto de los párrafos del DOCX. Un documento que contiene
+    `hang_text` (JPI_FAKE_HANG_TEXT) se cuelga hasta que el vigilante termina
+    el convertidor, como Word con un diálogo modal.
+    """
+    name = 'fake'
+
+    def __init__(self, startup_delay=None, per_document_delay=None, hang_text=None):
+        super().__init__()
+        # Las demoras también se leen del entorno para que los procesos de
+        # generación en paralelo usen la misma configuración que el proceso principal
+        if startup_delay is None:
+            startup_delay = float(os.environ.get('JPI_FAKE_STARTUP_DELAY', 1.5))
+        if per_document_delay is None:
+            per_document_delay = float(os.environ.get('JPI_FAKE_DOCUMENT_DELAY', 0.3))
+        if hang_text is None:
+            hang_text = os.environ.get('JPI_FAKE_HANG_TEXT') or None
+        self.startup_delay = startup_delay
+        self.per_document_delay = per_document_delay
+        self.hang_text = hang_text
+        self._killed = threading.Event()
+
+    def start(self):
+        time.sleep(self.startup_delay)
+
+    def convert(self, input_path, output_path):
+        pdf = self._render(str(input_path))
+        pdf.save(str(output_path))
+        pdf.close()
+
+    def convert_bytes(self, docx_bytes):
+        pdf = self._render(io.BytesIO(docx_bytes))
+        pdf_bytes = pdf.tobytes()
+        pdf.close()
+        return pdf_bytes
+
+    def kill(self):
+        self._killed.set()
+
+    def _render(self, source):
+        import fitz  # PyMuPDF
+        from docx import Document
+        from docx.oxml.ns import qn
+
+        time.sleep(self.per_document_delay)
+        paragraphs = Document(source).paragraphs
+        if self.hang_text and any(self.hang_text in paragraph.text for paragraph in paragraphs):
+            self._killed.wait()
+            raise RuntimeError("El convertidor simulado se terminó durante la conversión")
+        pdf = fitz.open()
+        page = pdf.new_page()
+        y = 72
+        for paragraph in paragraphs:
+            for line in _wrap(paragraph.text, 90):
+                if y > page.rect.height - 72:
+                    page = pdf.new_page()
+                    y = 72
+                page.insert_text((72, y), line, fontsize=10)
+                y += 14
+            # Los saltos de sección y de página empiezan una página nueva, igual que en Word
+            ppr = paragraph._p.pPr
+            breaks_page = (ppr is not None and ppr.find(qn('w:sectPr')) is not None) or any(
+                br.get(qn('w:type')) == 'page' for br in paragraph._p.iter(qn('w:br'))
+            )
+            if breaks_page:
+                page = pdf.new_page()
+                y = 72
+        return pdf
+
+
+def _wrap(text, width):
+    """Parte un párrafo en líneas de como máximo `width` caracteres."""
+    if not text:
+        return ['']
+    return [text[i:i + width] for i in range(0, len(text), width)]
+
+
+CONVERTER_FACTORIES = {
+    'word': WordConverter,
+    'fake': FakeConverter,
+}
+
+
+def get_converter_factory(name=None):
+    """
+    Devuelve la fábrica de convertidores a usar. Por defecto Word; la variable
+    de entorno JPI_CONVERTER permite elegir 'fake' para pruebas y benchmarks.
+    """
+    name = name or os.environ.get('JPI_CONVERTER', 'word')
+    try:
+        return CONVERTER_FACTORIES[name]
+    except KeyError:
+        raise ValueError(f"Convertidor desconocido: '{name}'. Opciones: {', '.join(CONVERTER_FACTORIES)}")
+
+
+class ConverterPool:
+    """
+    Pool de N convertidores de larga vida.
+
+    Cada convertidor vive en su propio hilo (con su propio apartamento COM, ya
+    que los objetos COM de Word no pueden compartirse entre hilos). Las
+    conversiones se reparten por una cola; una instancia se recicla después de
+    `max_documents` conversiones o cuando una conversión falla.
+
+    Un vigilante revisa las conversiones en curso: si una tarda más de
+    `timeout` segundos, termina la instancia, marca esa conversión como fallida
+    (ConversionTimeout) y arranca un hilo nuevo para su lugar, de modo que un
+    documento colgado no detiene el resto del lote.
+    """
+
+    def __init__(self, factory, size=1, max_documents=50, timeout=None):
+        self.factory = factory
+        self.size = max(1, int(size))
+        self.max_documents = max(1, int(max_documents))
+        self.timeout = CONVERSION_TIMEOUT if timeout is None else float(timeout)
+        self._jobs = queue.Queue()
+        self._threads = {}
+        # Conversión en curso por lugar: (convertidor, inicio, future)
+        self._running = {}
+        # Un hilo reemplazado por el vigilante ya no pertenece a su lugar
+        self._generations = [0] * self.size
+        self._closing = threading.Event()
+        self._watchdog = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'instances_started': 0,
+            'instances_recycled': 0,
+            'instances_killed': 0,
+            'conversions': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'startup_seconds': 0.0,
+            'conversion_seconds': 0.0,
+        }
+
+    def start(self):
+        for slot in range(self.size):
+            self._start_worker(slot)
+        if self.timeout:
+            self._watchdog = threading.Thread(target=self._watchdog_loop, name="converter-watchdog", daemon=True)
+            self._watchdog.start()
+        logger.info(f"🔧 Pool de convertidores iniciado: {self.size} instancia(s) '{self.factory.name}'")
+        return self
+
+    def _start_worker(self, slot):
+        thread = threading.Thread(
+            target=self._worker_loop,
+            args=(slot, self._generations[slot]),
+            name=f"converter-{slot}",
+            daemon=True,
+        )
+        self._threads[slot] = thread
+        thread.start()
+
+    def convert(self, input_path, output_path):
+        """
+        Convierte un documento usando el siguiente convertidor libre.
+
+        Returns:
+            bool: True si la conversión fue exitosa, False en caso contrario
+        """
+        try:
+            self._submit(lambda converter: converter.convert(input_path, output_path))
+            return True
+        except Exception as e:
+            logger.error(f"   ❌ ERROR durante la conversión a PDF: {e}")
+            return False
+
+    def convert_bytes(self, docx_bytes):
+        """
+        Convierte un DOCX en memoria usando el siguiente convertidor libre.
+
+        Returns:
+            bytes: El PDF, o None si la conversión falló
+
+        Raises:
+            ConversionTimeout: si la conversión se colgó y el vigilante la canceló
+        """
+        try:
+            return self._submit(lambda converter: converter.convert_bytes(docx_bytes))
+        except ConversionTimeout:
+            raise
+        except Exception as e:
+            logger.error(f"   ❌ ERROR durante la conversión a PDF: {e}")
+            return None
+
+    def _submit(self, work):
+        future = Future()
+        self._jobs.put((work, future))
+        return future.result()
+
+    def shutdown(self):
+        """Cierra todas las instancias y espera a que terminen sus hilos."""
+        self._closing.set()
+        threads = list(self._threads.values())
+        for _ in threads:
+            self._jobs.put(None)
+        for thread in threads:
+            thread.join()
+        if self._watchdog is not None:
+            self._watchdog.join()
+        self._threads = {}
+        logger.info(f"🔒 Pool de convertidores cerrado: {self.stats()}")
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _start_converter(self):
+        converter = self.factory()
+        started = time.perf_counter()
+        converter.start()
+        self._count('startup_seconds', time.perf_counter() - started)
+        self._count('instances_started')
+        return converter
+
+    def _close_converter(self, converter):
+        try:
+            converter.close()
+        except Exception as e:
+            logger.warning(f"   ⚠️ No se pudo cerrar el convertidor limpiamente: {e}")
+
+    def _worker_loop(self, slot, generation):
+        if pythoncom is not None:
+            pythoncom.CoInitialize()
+        converter = None
+        try:
+            # Arranque anticipado: la instancia ya está caliente cuando llega el primer documento
+            try:
+                converter = self._start_converter()
+            except Exception as e:
+                logger.warning(f"   ⚠️ No se pudo iniciar el convertidor {slot}: {e}")
+
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+                work, future = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                try:
+                    if converter is None:
+                        converter = self._start_converter()
+                    started = time.perf_counter()
+                    with self._stats_lock:
+                        self._running[slot] = (converter, started, future)
+                    result = work(converter)
+                    if not self._finish(slot, generation):
+                        return
+                    self._count('conversion_seconds', time.perf_counter() - started)
+                    self._count('conversions')
+                    converter.documents_converted += 1
+                    future.set_result(result)
+                except Exception as e:
+                    if not self._finish(slot, generation):
+                        return
+                    logger.error(f"   Traceback: {traceback.format_exc()}")
+                    self._count('errors')
+                    future.set_exception(e)
+                    # Una instancia que falló se descarta: la siguiente conversión arranca una nueva
+                    if converter is not None:
+                        self._close_converter(converter)
+                        self._count('instances_recycled')
+                        converter = None
+                    continue
+
+                if converter.documents_converted >= self.max_documents:
+                    self._close_converter(converter)
+                    self._count('instances_recycled')
+                    converter = None
+        finally:
+            if converter is not None:
+                self._close_converter(converter)
+            if pythoncom is not None:
+                pythoncom.CoUninitialize()
+
+    def _finish(self, slot, generation):
+        """
+        Cierra la conversión en curso del lugar. Devuelve False si el vigilante
+        ya la dio por colgada: el hilo quedó reemplazado y debe terminar.
+        """
+        with self._stats_lock:
+            if self._generations[slot] != generation:
+                return False
+            self._running.pop(slot, None)
+            return True
+
+    def _watchdog_loop(self):
+        interval = min(1.0, self.timeout / 4)
+        while not self._closing.wait(interval):
+            now = time.perf_counter()
+            with self._stats_lock:
+                stuck = {slot: running for slot, running in self._running.items()
+                         if now - running[1] > self.timeout}
+                for slot in stuck:
+                    del self._running[slot]
+                    self._generations[slot] += 1
+                    self._stats['timeouts'] += 1
+                    self._stats['instances_killed'] += 1
+
+            for slot, (converter, started, future) in stuck.items():
+                logger.error(f"⏱️ La conversión del convertidor {slot} lleva {now - started:.1f}s "
+                             f"(límite: {self.timeout:g}s): se termina la instancia y se reemplaza")
+                try:
+                    converter.kill()
+                except Exception as e:
+                    logger.warning(f"   ⚠️ No se pudo terminar el convertidor {slot}: {e}")
+                try:
+                    future.set_exception(ConversionTimeout(
+                        f"La conversión a PDF excedió el límite de {self.timeout:g} segundos"))
+                except InvalidStateError:
+                    pass
+                # El hilo colgado termina por su cuenta cuando la llamada falle
+                if not self._closing.is_set():
+                    self._start_worker(slot)
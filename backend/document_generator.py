@@ -3,17 +3,28 @@ Módulo de Generación de Documentos
 Genera invitaciones en PDF a partir de plantillas DOCX
 """
 
+import io
 import os
 import re
 import sys
 import time
+import atexit
 import logging
+import threading
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from copy import deepcopy
 from pathlib import Path
 import fitz  # PyMuPDF
-from docxtpl import DocxTemplate
-import win32com.client  # Para conversión DOCX a PDF directa
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
 from pypdf import PdfWriter
-import pythoncom  # Para inicializar COM en Windows
+from converters import ConverterPool, get_converter_factory, scratch_stats
+import metrics
+from asset_cache import appendix_cache, asset_fingerprint, cache_stats, preview_cache, template_cache
+from pdf_optimizer import PDF_OPTIMIZATION, optimize_pdf
+from pipeline import Pipeline, Stage, last_run_stats
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -22,15 +33,13 @@ logger = logging.getLogger(__name__)
 # Directorio de assets de solo lectura (los que vienen con la aplicación)
 READ_ONLY_ASSETS_DIR = Path(__file__).parent / 'assets'
 
-# El directorio de escritura para archivos temporales y assets del usuario se pasa como argumento.
+# El directorio de escritura para los assets del usuario se pasa como argumento.
 # Esto apunta a la carpeta de datos del usuario (ej. AppData en Windows).
 USER_DATA_DIR = Path(sys.argv[1])
 WRITABLE_ASSETS_DIR = USER_DATA_DIR / 'assets'
-TEMP_DIR = USER_DATA_DIR / 'temp_output'
 
-# Asegurarse de que los directorios de escritura existan.
+# Asegurarse de que el directorio de escritura exista.
 WRITABLE_ASSETS_DIR.mkdir(exist_ok=True)
-TEMP_DIR.mkdir(exist_ok=True)
 
 def get_asset_path(filename):
     """Busca un archivo primero en el directorio de assets del usuario y,
@@ -41,9 +50,25 @@ def get_asset_path(filename):
     return READ_ONLY_ASSETS_DIR / filename
 
 
-def _create_safe_filename(invitado_data, anio, periodo):
+def pipeline_stats():
+    """
+    Métricas por etapa del pipeline de este proceso (ver metrics.py), estado
+    de las cachés, E/S de los convertidores y colas del último pipeline por
+    etapas.
+    """
+    return {
+        'etapas': metrics.stage_stats(),
+        'caches': cache_stats(),
+        'scratch': scratch_stats(),
+        'pipeline': last_run_stats(),
+        'optimizacion': PDF_OPTIMIZATION,
+    }
+
+
+def _create_safe_filename(invitado_data, anio, periodo, tipo='DOSSIER'):
     """
     Función interna para crear un nombre de archivo seguro, truncando nombres largos.
+    `tipo` es 'DOSSIER' o 'CARTA' (solo la carta, sin anexo).
     """
     # 1. Limpiar caracteres inválidos y truncar para evitar rutas demasiado largas
     nombre_original = invitado_data.get('nombre_completo', 'INVITADO')
@@ -51,7 +76,7 @@ def _create_safe_filename(invitado_data, anio, periodo):
     nombre_truncado = nombre_limpio[:50]  # Truncar a 50 caracteres
 
     # 2. Limpiar abreviación
-    abreviacion = invitado_data.get('abreviacion_org', '')
+    abreviacion = invitado_data.get('abreviacion_org') or ''
     abrev_limpia = re.sub(r'[\\/*?:"<>|]', "", abreviacion).replace(" ", "_")
 
     # 3. Reemplazar espacios con guiones bajos
@@ -59,16 +84,19 @@ def _create_safe_filename(invitado_data, anio, periodo):
 
     # 4. Crear nomenclatura
     if abrev_limpia:
-        return f"{anio}.{periodo}-FPiT-DOSSIER-{abrev_limpia}-{nombre_final}.pdf"
+        return f"{anio}.{periodo}-FPiT-{tipo}-{abrev_limpia}-{nombre_final}.pdf"
     else:
-        return f"{anio}.{periodo}-FPiT-DOSSIER-{nombre_final}.pdf"
+        return f"{anio}.{periodo}-FPiT-{tipo}-{nombre_final}.pdf"
 
 
-def _render_template(invitado_data, context_general):
-    """
-    Rellena la plantilla DOCX con datos y la guarda temporalmente.
-    """
-    logger.info("   🔍 Buscando plantilla base...")
+def appendix_filename(context_general):
+    """Nombre del anexo compartido que acompaña a las cartas sin anexo."""
+    return f"{context_general['anio']}.{context_general['periodo']}-FPiT-ANEXO.pdf"
+
+
+def _find_template():
+    """Devuelve la ruta de la plantilla base o lanza FileNotFoundError."""
+    logger.debug("   🔍 Buscando plantilla base...")
     template_path = get_asset_path('plantilla_base.docx')
     
     if not template_path.exists():
@@ -76,288 +104,610 @@ def _render_template(invitado_data, context_general):
         logger.error(f"   ❌ {error_msg}")
         raise FileNotFoundError(error_msg)
     
-    logger.info(f"   ✅ Plantilla encontrada: {template_path}")
-    
-    logger.info("   📝 Cargando plantilla DOCX...")
-    doc = DocxTemplate(template_path)
-    
-    # Obtener puesto e institución
-    puesto_completo = invitado_data.get('puesto_completo', '')
-    institucion = invitado_data.get('institucion', '')
+    logger.debug(f"   ✅ Plantilla encontrada: {template_path}")
+    return template_path
 
-    # Contexto completo para la plantilla
-    context = {
-        'nombre_completo': invitado_data.get('nombre_completo', ''),
-        'puesto_completo': puesto_completo,
-        'institucion': institucion,
-        'caracter_invitacion': invitado_data.get('caracter_invitacion', ''),
+
+def _build_context(invitado_data, context_general):
+    """Contexto completo de renderizado: datos del invitado + datos del evento."""
+    return {
+        'nombre_completo': invitado_data.get('nombre_completo') or '',
+        'puesto_completo': invitado_data.get('puesto_completo') or '',
+        'institucion': invitado_data.get('institucion') or '',
+        'caracter_invitacion': invitado_data.get('caracter_invitacion') or '',
         **context_general  # Añade todos los datos generales del evento
     }
-    
-    logger.info(f"   📋 Contexto de renderizado:")
+
+
+def _render_template(invitado_data, context_general):
+    """
+    Rellena la plantilla DOCX con datos y devuelve el documento en memoria (bytes).
+    """
+    with metrics.stage('template'):
+        template_path = _find_template()
+
+        logger.debug("   📝 Cargando plantilla DOCX...")
+        doc = template_cache.get(template_path).new()
+
+    # Contexto completo para la plantilla
+    context = _build_context(invitado_data, context_general)
+
+    logger.debug(f"   📋 Contexto de renderizado:")
     for key, value in context.items():
-        logger.info(f"      {key}: {value}")
-    
-    logger.info("   🔄 Renderizando plantilla con datos...")
-    doc.render(context)
-    
-    # Crear nombre descriptivo para el archivo temporal
-    # Formato: {año}.{periodo}-{siglas_institucion}_{nombre_completo}_{version}.docx
-    anio = context_general.get('anio', 'XXXX')
-    periodo = context_general.get('periodo', 'X')
-    
-    # Limpiar nombre del invitado (eliminar caracteres inválidos y truncar)
-    nombre_original = invitado_data.get('nombre_completo', 'INVITADO')
-    nombre_limpio = re.sub(r'[\\/*?:"<>|]', "", nombre_original)
-    nombre_truncado = nombre_limpio[:50].replace(" ", "_")
-    
-    # Obtener y limpiar abreviación de la organización
-    abreviacion = invitado_data.get('abreviacion_org', '')
-    siglas_institucion = re.sub(r'[\\/*?:"<>|]', "", abreviacion).replace(" ", "_") if abreviacion else 'ORG'
-    
-    # Extraer versión del nombre de la plantilla si existe (ej: plantilla_base_v02.docx)
-    template_name = template_path.stem  # Nombre sin extensión
-    version_match = re.search(r'v(\d+)', template_name, re.IGNORECASE)
-    version = version_match.group(0) if version_match else 'v01'
-    
-    temp_filename = f"{anio}.{periodo}-{siglas_institucion}_{nombre_truncado}_{version}.docx"
-    filled_docx_path = TEMP_DIR / temp_filename
-    
-    logger.info(f"   💾 Guardando plantilla renderizada: {filled_docx_path}")
-    doc.save(filled_docx_path)
-    
-    time.sleep(0.1)  # Pausa para asegurar que el archivo se libere en el sistema
-    logger.info(f"   ✅ Plantilla renderizada y guardada")
-    return filled_docx_path
+        logger.debug(f"      {key}: {value}")
 
+    logger.debug("   🔄 Renderizando plantilla con datos...")
+    with metrics.stage('render'):
+        doc.render(context)
 
-def convert_docx_to_pdf_windows(input_path, output_path):
+    with metrics.stage('save') as stage:
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        stage['bytes'] = buffer.tell()
+    logger.debug(f"   ✅ Plantilla renderizada ({stage['bytes']} bytes)")
+    return buffer.getvalue()
+
+
+# --- Pool de convertidores ---
+# Número de instancias de Word que se mantienen vivas durante un lote y
+# cuántos documentos convierte cada una antes de reciclarse.
+CONVERTER_POOL_SIZE = int(os.environ.get('JPI_CONVERTER_POOL_SIZE', 1))
+CONVERTER_MAX_DOCUMENTS = int(os.environ.get('JPI_CONVERTER_MAX_DOCUMENTS', 50))
+# Segundos que sigue abierta la instancia de una vista previa (o de un dossier
+# individual) esperando la siguiente; 0 la cierra en cuanto termina
+CONVERTER_IDLE_SECONDS = float(os.environ.get('JPI_CONVERTER_IDLE_SECONDS', 120))
+
+_pool_lock = threading.Lock()
+_active_pool = None
+_active_sessions = 0
+_idle_timer = None
+
+
+@contextmanager
+def converter_session(size=None, max_documents=None, factory=None, idle_seconds=0):
     """
-    Convierte un archivo DOCX a PDF usando la automatización COM de Word
-    de forma directa y robusta, sin depender de docx2pdf.
+    Mantiene un pool de convertidores vivo mientras dure el bloque `with`.
+
+    Las sesiones anidadas (por ejemplo, una vista previa pedida durante un lote)
+    reutilizan el pool ya activo; el último en salir cierra todas las instancias.
+    Con `idle_seconds`, si es la última en salir, el pool queda caliente ese
+    tiempo y lo reutiliza la siguiente sesión que empiece (si le bastan sus
+    instancias), en lugar de volver a arrancar Word.
+    """
+    global _active_pool, _active_sessions, _idle_timer
+    size = size or CONVERTER_POOL_SIZE
+    factory = factory or get_converter_factory()
+    stale = None
+    with _pool_lock:
+        if _idle_timer is not None:
+            _idle_timer.cancel()
+            _idle_timer = None
+        if (_active_pool is not None and _active_sessions == 0
+                and (_active_pool.size < size or _active_pool.factory is not factory)):
+            # El pool caliente no sirve a esta sesión (le faltan instancias o es otro convertidor)
+            stale, _active_pool = _active_pool, None
+        if _active_pool is None:
+            _active_pool = ConverterPool(
+                factory,
+                size=size,
+                max_documents=max_documents or CONVERTER_MAX_DOCUMENTS,
+            ).start()
+        _active_sessions += 1
+        pool = _active_pool
+    if stale is not None:
+        stale.shutdown()
+    try:
+        yield pool
+    finally:
+        with _pool_lock:
+            _active_sessions -= 1
+            if _active_sessions > 0:
+                pool = None
+            elif idle_seconds > 0:
+                _idle_timer = threading.Timer(idle_seconds, _close_idle_pool, args=(pool,))
+                _idle_timer.daemon = True
+                _idle_timer.start()
+                pool = None
+            else:
+                _active_pool = None
+        if pool is not None:
+            pool.shutdown()
+
+
+def _close_idle_pool(pool):
+    """Cierra el pool caliente si nadie lo volvió a usar desde que quedó inactivo."""
+    global _active_pool, _idle_timer
+    with _pool_lock:
+        if _active_pool is not pool or _active_sessions > 0:
+            return
+        _active_pool = None
+        _idle_timer = None
+    logger.info("💤 Pool de convertidores inactivo")
+    pool.shutdown()
+
+
+@atexit.register
+def _shutdown_converter_pool():
+    """Evita dejar procesos de Word huérfanos si el servidor termina a mitad de un lote."""
+    if _idle_timer is not None:
+        _idle_timer.cancel()
+    if _active_pool is not None:
+        _active_pool.shutdown()
+
+
+def convert_docx_bytes(docx_bytes):
+    """
+    Convierte un DOCX en memoria a PDF usando el pool de convertidores activo
+    (o uno de una sola instancia si no hay un lote en curso, que queda caliente
+    CONVERTER_IDLE_SECONDS para la siguiente vista previa).
+
+    Returns:
+        bytes: El PDF, o None si la conversión falló
+    """
+    with metrics.stage('convert') as stage, \
+            converter_session(size=1, idle_seconds=CONVERTER_IDLE_SECONDS) as pool:
+        pdf_bytes = pool.convert_bytes(docx_bytes)
+        stage['bytes'] = len(pdf_bytes or b'')
+    return pdf_bytes
+
+
+def _merge_and_save_dossier(letter_pdf, invitado_data, context_general, output_dir, with_appendix=True):
+    """
+    Une la carta (ruta o stream PDF) con la convocatoria y el cronograma y
+    guarda el dossier final en la carpeta de salida. Si `output_dir` es None
+    no se escribe nada y el dossier se devuelve en memoria. Con
+    `with_appendix=False` se entrega solo la carta, sin unir el anexo.
+
+    Returns:
+        dict: {"path": str} o, sin carpeta de salida, {"filename": str, "data": bytes}
+    """
+    filename = _create_safe_filename(
+        invitado_data, 
+        context_general['anio'], 
+        context_general['periodo'],
+        'DOSSIER' if with_appendix else 'CARTA'
+    )
+    if not with_appendix:
+        letter = letter_pdf.read() if hasattr(letter_pdf, 'read') else Path(letter_pdf).read_bytes()
+        if output_dir is None:
+            return {"filename": filename, "data": letter}
+        return _write_output(letter, filename, output_dir)
+
+    # 3. Unir los 3 PDFs (carta + convocatoria + cronograma)
+    logger.debug("📑 Paso 3: Uniendo PDFs (carta + convocatoria + cronograma)...")
+    merger = PdfWriter()
+
+    # El anexo se parsea una sola vez por lote (ver asset_cache)
+    with metrics.stage('merge') as stage:
+        appendix = _get_appendix()
+        merger.append(letter_pdf if hasattr(letter_pdf, 'read') else str(letter_pdf))
+        appendix.append_to(merger)
+        buffer = io.BytesIO()
+        merger.write(buffer)
+        merger.close()
+        stage['bytes'] = buffer.tell()
+    logger.debug("✅ PDFs unidos correctamente")
+
+    dossier = buffer.getvalue()
+    if PDF_OPTIMIZATION:
+        # Las imágenes del anexo ya se optimizaron una vez por lote; aquí solo se reescribe
+        with metrics.stage('optimize') as stage:
+            stage['bytes_before'] = len(dossier)
+            dossier = optimize_pdf(dossier, PDF_OPTIMIZATION, full=False)
+            stage['bytes'] = len(dossier)
     
-    Args:
-        input_path: Ruta al archivo DOCX de entrada
-        output_path: Ruta donde se guardará el PDF resultante
+    if output_dir is None:
+        return {"filename": filename, "data": dossier}
+    return _write_output(dossier, filename, output_dir)
+
+
+def _get_appendix():
+    """Anexo (convocatoria + cronograma) vigente, desde la caché."""
+    convocatoria_path = get_asset_path('convocatoria.pdf')
+    cronograma_path = get_asset_path('cronograma.pdf')
     
+    logger.debug(f"   Convocatoria: {convocatoria_path}")
+    logger.debug(f"   Cronograma: {cronograma_path}")
+
+    if not convocatoria_path.exists():
+        error_msg = f"Archivo de convocatoria no existe: {convocatoria_path}"
+        logger.error(f"❌ {error_msg}")
+        raise FileNotFoundError(error_msg)
+        
+    if not cronograma_path.exists():
+        error_msg = f"Archivo de cronograma no existe: {cronograma_path}"
+        logger.error(f"❌ {error_msg}")
+        raise FileNotFoundError(error_msg)
+
+    return appendix_cache.get(convocatoria_path, cronograma_path, level=PDF_OPTIMIZATION)
+
+
+def save_shared_appendix(context_general, output_dir):
+    """
+    Guarda en la carpeta de salida el anexo compartido que acompaña a las
+    cartas generadas sin anexo. Solo se reescribe si cambió.
+
     Returns:
-        bool: True si la conversión fue exitosa, False en caso contrario
+        str: Ruta del anexo
     """
-    word = None
-    try:
-        # Asegura que las rutas sean absolutas
-        input_path = str(Path(input_path).resolve())
-        output_path = str(Path(output_path).resolve())
-        
-        logger.info("   🔧 Iniciando instancia de Word...")
-        logger.info("   ⏱️ Intentando crear instancia COM de Word.Application...")
-        
-        # Crear instancia directamente sin threading (el threading causaba problemas de CoInitialize)
-        word = win32com.client.DispatchEx("Word.Application")
-        logger.info("   ✅ Instancia de Word creada exitosamente")
-        
-        word.Visible = False  # Mantenemos Word invisible
-        logger.info("   ✅ Word iniciado correctamente")
-        
-        logger.info(f"   📂 Abriendo documento: {input_path}")
-        doc = word.Documents.Open(input_path)
-        
-        logger.info(f"   💾 Guardando como PDF: {output_path}")
-        # El formato 17 corresponde a wdFormatPDF
-        doc.SaveAs(output_path, FileFormat=17)
-        
-        doc.Close(0)  # El 0 significa no guardar cambios al cerrar
-        logger.info("   ✅ Conversión a PDF completada.")
-        return True
-        
-    except Exception as e:
-        logger.error(f"   ❌ ERROR durante la conversión a PDF: {e}")
-        import traceback
-        logger.error(f"   Traceback: {traceback.format_exc()}")
-        return False
-        
-    finally:
-        # Importantísimo: Asegurarse de que Word se cierre siempre
-        if word:
-            try:
-                word.Quit()
-                logger.info("   🔒 Instancia de Word cerrada.")
-            except:
-                logger.warning("   ⚠️ No se pudo cerrar Word limpiamente")
+    data = _get_appendix().pdf_bytes
+    path = Path(output_dir) / appendix_filename(context_general)
+    if path.exists() and path.stat().st_size == len(data) and path.read_bytes() == data:
+        return str(path)
+    return _write_output(data, path.name, output_dir)["path"]
+
 
+def _write_output(data, filename, output_dir):
+    # 4. Guardar en la carpeta de salida especificada
+    logger.debug("💾 Paso 4: Guardando archivo final...")
+    final_dir = Path(output_dir)
+    final_dir.mkdir(parents=True, exist_ok=True)
+    final_path = final_dir / filename
+    
+    logger.debug(f"   Nombre del archivo: {filename}")
+    logger.debug(f"   Ruta completa: {final_path}")
+    
+    # Única escritura a disco del pipeline
+    with metrics.stage('write') as stage:
+        final_path.write_bytes(data)
+        stage['bytes'] = len(data)
+    logger.debug(f"✅ Archivo guardado exitosamente")
+    return {"path": str(final_path)}
 
-def generate_full_dossier(invitado_data, context_general, output_dir):
+
+def generate_full_dossier(invitado_data, context_general, output_dir, with_appendix=True):
     """
     Genera el dossier completo en PDF para un invitado y lo guarda en el Escritorio.
     
     Args:
         invitado_data (dict): Datos del invitado
         context_general (dict): Datos del evento (año, periodo, edicion_evento, etc.)
-        output_dir (str): Directorio de salida
+        output_dir (str): Directorio de salida (None: el dossier se devuelve en "data")
+        with_appendix (bool): False para entregar solo la carta, sin convocatoria ni cronograma
     
     Returns:
-        dict: {"success": bool, "path": str} o {"success": bool, "error": str}
+        dict: {"success": bool, "path": str}, {"success": bool, "filename": str, "data": bytes}
+            o {"success": bool, "error": str}
     """
     invitado_id = invitado_data.get('id', 'UNKNOWN')
     invitado_nombre = invitado_data.get('nombre_completo', 'UNKNOWN')
     
+    started = time.perf_counter()
     try:
-        logger.info(f"{'='*60}")
-        logger.info(f"📝 Iniciando generación de dossier para: {invitado_nombre} (ID: {invitado_id})")
-        logger.info(f"📁 Directorio de salida: {output_dir}")
-        
-        # Inicializar COM para Windows (necesario para docx2pdf)
-        logger.info("🔧 Inicializando COM para Windows...")
-        pythoncom.CoInitialize()
+        logger.debug(f"{'='*60}")
+        logger.debug(f"📝 Iniciando generación de dossier para: {invitado_nombre} (ID: {invitado_id})")
+        logger.debug(f"📁 Directorio de salida: {output_dir}")
         
-        # 1. Renderizar la plantilla DOCX
-        logger.info("📄 Paso 1: Renderizando plantilla DOCX...")
-        filled_docx_path = _render_template(invitado_data, context_general)
-        logger.info(f"✅ Plantilla renderizada: {filled_docx_path}")
-        
-        # 2. Convertir a PDF
-        logger.info("🔄 Paso 2: Convirtiendo DOCX a PDF...")
-        temp_pdf_path = TEMP_DIR / f"temp_{invitado_id}.pdf"
-        logger.info(f"   Archivo temporal PDF: {temp_pdf_path}")
+        # 1. Renderizar la plantilla DOCX (en memoria)
+        logger.debug("📄 Paso 1: Renderizando plantilla DOCX...")
+        docx_bytes = _render_template(invitado_data, context_general)
         
-        conversion_exitosa = convert_docx_to_pdf_windows(filled_docx_path, temp_pdf_path)
-        if not conversion_exitosa:
+        # 2. Convertir a PDF (en memoria)
+        logger.debug("🔄 Paso 2: Convirtiendo DOCX a PDF...")
+        pdf_bytes = convert_docx_bytes(docx_bytes)
+        if pdf_bytes is None:
             raise Exception("La conversión de DOCX a PDF falló. Revisa el log para más detalles.")
         
-        logger.info(f"✅ Conversión completada")
-        
-        # 3. Unir los 3 PDFs (carta + convocatoria + cronograma)
-        logger.info("📑 Paso 3: Uniendo PDFs (carta + convocatoria + cronograma)...")
-        merger = PdfWriter()
-        convocatoria_path = get_asset_path('convocatoria.pdf')
-        cronograma_path = get_asset_path('cronograma.pdf')
-        
-        logger.info(f"   Convocatoria: {convocatoria_path}")
-        logger.info(f"   Cronograma: {cronograma_path}")
-
-        if not convocatoria_path.exists():
-            error_msg = f"Archivo de convocatoria no existe: {convocatoria_path}"
-            logger.error(f"❌ {error_msg}")
-            raise FileNotFoundError(error_msg)
-            
-        if not cronograma_path.exists():
-            error_msg = f"Archivo de cronograma no existe: {cronograma_path}"
-            logger.error(f"❌ {error_msg}")
-            raise FileNotFoundError(error_msg)
-
-        merger.append(str(temp_pdf_path))
-        merger.append(str(convocatoria_path))
-        merger.append(str(cronograma_path))
-        logger.info("✅ PDFs unidos correctamente")
-        
-        # 4. Guardar en la carpeta de salida especificada
-        logger.info("💾 Paso 4: Guardando archivo final...")
-        final_dir = Path(output_dir)
-        final_dir.mkdir(parents=True, exist_ok=True)
-        
-        filename = _create_safe_filename(
-            invitado_data, 
-            context_general['anio'], 
-            context_general['periodo']
-        )
-        final_path = final_dir / filename
-        
-        logger.info(f"   Nombre del archivo: {filename}")
-        logger.info(f"   Ruta completa: {final_path}")
+        logger.debug(f"✅ Conversión completada")
         
-        with open(final_path, "wb") as f_out:
-            merger.write(f_out)
-        merger.close()
-        logger.info(f"✅ Archivo guardado exitosamente")
-        
-        # 5. Limpieza de archivos temporales
-        logger.info("🧹 Paso 5: Limpiando archivos temporales...")
-        os.remove(filled_docx_path)
-        os.remove(temp_pdf_path)
-        logger.info("✅ Limpieza completada")
+        # 3 y 4. Unir con convocatoria y cronograma y guardar
+        saved = _merge_and_save_dossier(io.BytesIO(pdf_bytes), invitado_data, context_general, output_dir,
+                                        with_appendix)
         
-        logger.info(f"✅✅✅ DOSSIER COMPLETADO PARA: {invitado_nombre}")
-        logger.info(f"{'='*60}\n")
+        # Única línea INFO por invitado; el detalle por etapa está en GET /api/metrics
+        logger.info(f"✅ Dossier de {invitado_nombre} (ID: {invitado_id}) en "
+                    f"{time.perf_counter() - started:.2f}s")
+        logger.debug(f"{'='*60}\n")
         
-        return {"success": True, "path": str(final_path)}
+        return {"success": True, **saved}
 
     except Exception as e:
-        logger.error(f"❌ ERROR GENERANDO DOSSIER PARA: {invitado_nombre} (ID: {invitado_id})")
-        logger.error(f"   Tipo de error: {type(e).__name__}")
-        logger.error(f"   Mensaje: {str(e)}")
-        
-        # Log del traceback completo
-        import traceback
-        logger.error(f"   Traceback completo:")
-        for line in traceback.format_exc().split('\n'):
-            if line.strip():
-                logger.error(f"   {line}")
-        
-        # Limpiar archivos temporales en caso de error
-        logger.info("🧹 Limpiando archivos temporales después del error...")
-        try:
-            for p in TEMP_DIR.glob(f"*{invitado_id}*"):
-                os.remove(p)
-                logger.info(f"   Eliminado: {p}")
-        except Exception as cleanup_error:
-            logger.warning(f"   No se pudo limpiar algunos archivos temporales: {cleanup_error}")
-        
-        logger.info(f"{'='*60}\n")
+        _log_dossier_error(invitado_data, e)
+        logger.debug(f"{'='*60}\n")
         return {"success": False, "error": str(e)}
-    
-    finally:
-        # Desinicializar COM
-        try:
-            pythoncom.CoUninitialize()
-        except:
-            pass
+
+
+def _log_dossier_error(invitado_data, error):
+    invitado_id = invitado_data.get('id', 'UNKNOWN')
+    invitado_nombre = invitado_data.get('nombre_completo', 'UNKNOWN')
+    logger.error(f"❌ ERROR GENERANDO DOSSIER PARA: {invitado_nombre} (ID: {invitado_id})")
+    logger.error(f"   Tipo de error: {type(error).__name__}")
+    logger.error(f"   Mensaje: {str(error)}")
+
+    # Log del traceback completo
+    logger.error(f"   Traceback completo:")
+    for line in ''.join(traceback.format_exception(error)).split('\n'):
+        if line.strip():
+            logger.error(f"   {line}")
+
+
+def generate_pipelined_dossiers(invitados_data, context_general, output_dir, with_appendix=True):
+    """
+    Genera los dossieres con el pipeline por etapas (ver pipeline.py): el
+    render, la conversión y la unión de invitados consecutivos se solapan en
+    lugar de ejecutarse uno tras otro.
+
+    Yields:
+        dict: El resultado de cada invitado (como el de generate_full_dossier), en orden
+    """
+    def render(invitado_data):
+        return invitado_data, _render_template(invitado_data, context_general)
+
+    def convert(rendered):
+        invitado_data, docx_bytes = rendered
+        pdf_bytes = convert_docx_bytes(docx_bytes)
+        if pdf_bytes is None:
+            raise Exception("La conversión de DOCX a PDF falló. Revisa el log para más detalles.")
+        return invitado_data, pdf_bytes
+
+    def merge(converted):
+        invitado_data, pdf_bytes = converted
+        return _merge_and_save_dossier(io.BytesIO(pdf_bytes), invitado_data, context_general, output_dir,
+                                       with_appendix)
+
+    pipeline = Pipeline([
+        Stage('render', render),
+        # Un hilo por instancia de Word del pool
+        Stage('convert', convert, workers=min(CONVERTER_POOL_SIZE, len(invitados_data))),
+        Stage('merge', merge),
+    ])
+    for item in pipeline.run(invitados_data):
+        if item.error is not None:
+            _log_dossier_error(item.item, item.error)
+            yield {"success": False, "error": str(item.error)}
+            continue
+        logger.info(f"✅ Dossier de {item.item.get('nombre_completo', 'UNKNOWN')} "
+                    f"(ID: {item.item.get('id', 'UNKNOWN')}) en {item.seconds:.2f}s")
+        yield {"success": True, **item.value}
+
+
+def preview_etag(invitado_data, context_general):
+    """Clave de la vista previa (y ETag): cambia si cambian los datos o la plantilla."""
+    return preview_cache.key(invitado_data, context_general, asset_fingerprint(_find_template()))
 
 
 def generate_preview_image(invitado_data, context_general):
     """
     Genera una vista previa (imagen PNG) de la primera página de la invitación.
+    Las vistas ya generadas se sirven desde la caché de vistas previas.
     
     Args:
         invitado_data (dict): Datos del invitado
         context_general (dict): Datos del evento
     
     Returns:
-        str: Ruta al archivo PNG generado, o None si hubo error
+        tuple: (etag, bytes del PNG), o (etag, None) si hubo error
     """
+    etag = preview_etag(invitado_data, context_general)
+    png = preview_cache.get(etag)
+    if png is None:
+        with metrics.stage('preview') as stage:
+            png = _render_preview_image(invitado_data, context_general)
+            stage['bytes'] = len(png or b'')
+        if png is not None:
+            preview_cache.put(etag, invitado_data['id'], png)
+    return etag, png
+
+
+def _render_preview_image(invitado_data, context_general):
     try:
         # 1. Renderizar la plantilla DOCX
-        filled_docx_path = _render_template(invitado_data, context_general)
+        docx_bytes = _render_template(invitado_data, context_general)
         
         # 2. Convertir a PDF
-        temp_pdf_path = TEMP_DIR / f"preview_{invitado_data['id']}.pdf"
-        
-        conversion_exitosa = convert_docx_to_pdf_windows(filled_docx_path, temp_pdf_path)
-        if not conversion_exitosa:
+        pdf_bytes = convert_docx_bytes(docx_bytes)
+        if pdf_bytes is None:
             # Si la conversión falla, no podemos generar la imagen
             logger.error("No se pudo generar la vista previa: conversión a PDF falló")
             return None
         
         # 3. Convertir la primera página del PDF a una imagen (PNG)
-        doc = fitz.open(temp_pdf_path)
-        page = doc.load_page(0)  # Carga la primera página
-        pix = page.get_pixmap(dpi=150)  # Renderiza a una imagen con buena resolución
+        with metrics.stage('rasterize') as stage:
+            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+            page = doc.load_page(0)  # Carga la primera página
+            pix = page.get_pixmap(dpi=150)  # Renderiza a una imagen con buena resolución
+            png = pix.tobytes("png")
+            doc.close()
+            stage['bytes'] = len(png)
         
-        image_path = TEMP_DIR / f"preview_{invitado_data['id']}.png"
-        pix.save(image_path)
-        doc.close()
-        
-        # 4. Limpieza (ya no necesitamos el docx y el pdf temporal)
-        os.remove(filled_docx_path)
-        os.remove(temp_pdf_path)
-        
-        return str(image_path)
+        return png
 
     except Exception as e:
         print(f"Error generando vista previa para ID {invitado_data.get('id')}: {e}")
-        # Intentar limpiar archivos temporales
-        try:
-            for p in TEMP_DIR.glob(f"*preview_{invitado_data.get('id')}*"):
-                os.remove(p)
-        except:
-            pass
         return None
+
+
+# --- Modo combinado (mail merge) ---
+# Se renderizan todos los invitados en un único DOCX (una sección por invitado),
+# se convierte una sola vez y el PDF resultante se divide por rangos de páginas.
+MAIL_MERGE_CHUNK_SIZE = 100
+
+# Marca invisible (texto blanco de 1 pt) al inicio de cada sección; permite
+# ubicar en el PDF la página donde empieza la carta de cada invitado.
+_MARKER_FORMAT = "JPIMRK{:05d}X"
+_MARKER_PATTERN = re.compile(r"JPIMRK(\d{5})X")
+
+
+def _marker_run(index):
+    """Crea un run <w:r> con la marca invisible del invitado `index`."""
+    run = OxmlElement('w:r')
+    rpr = OxmlElement('w:rPr')
+    color = OxmlElement('w:color')
+    color.set(qn('w:val'), 'FFFFFF')
+    size = OxmlElement('w:sz')
+    size.set(qn('w:val'), '2')
+    rpr.append(color)
+    rpr.append(size)
+    text = OxmlElement('w:t')
+    text.text = _MARKER_FORMAT.format(index)
+    run.append(rpr)
+    run.append(text)
+    return run
+
+
+def _render_mail_merge_template(invitados_data, context_general):
+    """
+    Rellena la plantilla una vez por invitado y combina todas las cartas en un
+    único DOCX con un salto de sección (página nueva) entre invitados.
+
+    Como todas las cartas salen de la misma plantilla, comparten estilos y
+    relaciones (imágenes, encabezados), por lo que el cuerpo de cada carta se
+    puede mover tal cual al documento maestro.
+
+    Returns:
+        bytes: El DOCX combinado
+    """
+    compiled = template_cache.get(_find_template())
+    master = None
+    master_body = None
+    final_sect_pr = None
+    drawing_id = 1000
+
+    for index, invitado_data in enumerate(invitados_data):
+        doc = compiled.new()
+        doc.render(_build_context(invitado_data, context_general))
+        body = doc.docx.element.body
+
+        # Marca al inicio del primer párrafo de la carta
+        first_paragraph = body.find(qn('w:p'))
+        if first_paragraph is not None:
+            ppr = first_paragraph.find(qn('w:pPr'))
+            position = 1 if ppr is not None else 0
+            first_paragraph.insert(position, _marker_run(index))
+
+        if master is None:
+            master = doc
+            master_body = body
+            final_sect_pr = body.find(qn('w:sectPr'))
+            continue
+
+        # Cerrar la sección de la carta anterior con un salto de sección
+        paragraphs = [el for el in master_body if el.tag == qn('w:p')]
+        last_paragraph = paragraphs[-1] if paragraphs else None
+        if last_paragraph is None or last_paragraph.find(qn('w:pPr') + '/' + qn('w:sectPr')) is not None:
+            last_paragraph = OxmlElement('w:p')
+            final_sect_pr.addprevious(last_paragraph)
+        ppr = last_paragraph.find(qn('w:pPr'))
+        if ppr is None:
+            ppr = OxmlElement('w:pPr')
+            last_paragraph.insert(0, ppr)
+        ppr.append(deepcopy(final_sect_pr))
+
+        # Mover el cuerpo de la carta al documento maestro
+        for element in list(body):
+            if element.tag == qn('w:sectPr'):
+                continue
+            # Los identificadores de dibujos deben ser únicos en el documento
+            for doc_pr in element.iter(qn('wp:docPr')):
+                drawing_id += 1
+                doc_pr.set('id', str(drawing_id))
+            final_sect_pr.addprevious(element)
+
+    buffer = io.BytesIO()
+    master.save(buffer)
+    return buffer.getvalue()
+
+
+def _split_mail_merge_pdf(pdf_bytes, count):
+    """
+    Ubica las marcas de cada invitado en el PDF combinado, las borra y
+    devuelve los rangos de páginas (inicio, fin) de cada carta.
+
+    Raises:
+        ValueError: si falta alguna marca o no aparecen en orden (división incorrecta)
+    """
+    pdf = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        starts = {}
+        for page in pdf:
+            found = [int(m.group(1)) for m in _MARKER_PATTERN.finditer(page.get_text())]
+            for index in found:
+                starts.setdefault(index, page.number)
+                for rect in page.search_for(_MARKER_FORMAT.format(index)):
+                    page.add_redact_annot(rect)
+            if found:
+                page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE)
+
+        missing = [i for i in range(count) if i not in starts]
+        if missing:
+            raise ValueError(f"No se encontraron las marcas de {len(missing)} carta(s) en el PDF combinado")
+        ordered = [starts[i] for i in range(count)]
+        if any(b <= a for a, b in zip(ordered, ordered[1:])):
+            raise ValueError("Las cartas del PDF combinado no aparecen en orden")
+
+        ranges = []
+        for i, start in enumerate(ordered):
+            end = ordered[i + 1] - 1 if i + 1 < count else pdf.page_count - 1
+            ranges.append((start, end))
+
+        letters = []
+        for start, end in ranges:
+            letter = fitz.open()
+            letter.insert_pdf(pdf, from_page=start, to_page=end)
+            letters.append(letter.tobytes())
+            letter.close()
+        return letters, [end - start + 1 for start, end in ranges]
+    finally:
+        pdf.close()
+
+
+def generate_mail_merge_dossiers(invitados_data, context_general, output_dir, chunk_size=None, with_appendix=True):
+    """
+    Genera los dossieres de varios invitados con una sola conversión por bloque.
+
+    Args:
+        invitados_data (list[dict]): Datos de los invitados
+        context_general (dict): Datos del evento
+        output_dir (str): Directorio de salida
+        chunk_size (int): Invitados por documento combinado (MAIL_MERGE_CHUNK_SIZE por defecto)
+        with_appendix (bool): False para entregar solo las cartas
+
+    Yields:
+        dict: Un resultado por invitado, en el mismo orden (se entregan al terminar cada bloque):
+            {"success": bool, "path": str, "pages": int, "warning": str} o
+            {"success": bool, "error": str}
+    """
+    chunk_size = chunk_size or MAIL_MERGE_CHUNK_SIZE
+    for offset in range(0, len(invitados_data), chunk_size):
+        chunk = invitados_data[offset:offset + chunk_size]
+        yield from _generate_mail_merge_chunk(chunk, context_general, output_dir, offset // chunk_size, with_appendix)
+
+
+def _generate_mail_merge_chunk(chunk, context_general, output_dir, chunk_index, with_appendix):
+    logger.info(f"{'='*60}")
+    logger.info(f"📚 Generando bloque combinado {chunk_index} con {len(chunk)} invitado(s)")
+
+    try:
+        with metrics.stage('render') as stage:
+            docx_bytes = _render_mail_merge_template(chunk, context_general)
+            stage['bytes'] = len(docx_bytes)
+        pdf_bytes = convert_docx_bytes(docx_bytes)
+        if pdf_bytes is None:
+            raise Exception("La conversión de DOCX a PDF falló. Revisa el log para más detalles.")
+        letters, page_counts = _split_mail_merge_pdf(pdf_bytes, len(chunk))
+    except Exception as e:
+        # Si el bloque no se puede dividir con certeza, se genera invitado por invitado
+        logger.error(f"❌ Falló el bloque combinado {chunk_index}: {e}. Se generará individualmente.")
+        for invitado_data in chunk:
+            yield generate_full_dossier(invitado_data, context_general, output_dir, with_appendix)
+        return
+
+    # Una carta con un número de páginas distinto al habitual indica una posible división incorrecta
+    expected_pages = Counter(page_counts).most_common(1)[0][0]
+    logger.info(f"   📄 Páginas por carta: {page_counts}")
+
+    # Cada dossier se une y se entrega por separado: solo las cartas del bloque se retienen en memoria
+    for invitado_data, letter, pages in zip(chunk, letters, page_counts):
+        invitado_nombre = invitado_data.get('nombre_completo', 'UNKNOWN')
+        try:
+            saved = _merge_and_save_dossier(io.BytesIO(letter), invitado_data, context_general, output_dir,
+                                            with_appendix)
+            result = {"success": True, **saved, "pages": pages}
+            if pages != expected_pages:
+                result["warning"] = f"La carta tiene {pages} página(s); se esperaban {expected_pages}"
+                logger.warning(f"⚠️ {invitado_nombre}: {result['warning']}")
+        except Exception as e:
+            logger.error(f"❌ ERROR GENERANDO DOSSIER PARA: {invitado_nombre}: {e}")
+            result = {"success": False, "error": str(e)}
+        yield result
+    logger.info(f"{'='*60}\n")
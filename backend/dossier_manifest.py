@@ -0,0 +1,167 @@
+"""
+Manifiesto de Dossieres
+Guarda, junto a los PDFs de la carpeta de salida, una huella de los datos con
+que se generó cada dossier. La generación incremental solo reconstruye los
+dossieres cuya huella cambió o cuyo archivo ya no existe.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+
+from asset_cache import asset_fingerprint
+from document_generator import _find_template, get_asset_path
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = '.manifiesto_dossieres.json'
+# Las cartas sin anexo llevan su propio manifiesto: sus archivos son otros
+LETTERS_MANIFEST_NAME = '.manifiesto_cartas.json'
+MANIFEST_VERSION = 1
+
+
+def asset_hashes():
+    """Hashes de la plantilla, la convocatoria y el cronograma vigentes."""
+    return {
+        'plantilla': asset_fingerprint(_find_template()),
+        'convocatoria': asset_fingerprint(get_asset_path('convocatoria.pdf')),
+        'cronograma': asset_fingerprint(get_asset_path('cronograma.pdf')),
+    }
+
+
+def dossier_fingerprint(invitado_data, context_general, assets):
+    """Huella SHA-256 de todo lo que determina el contenido de un dossier."""
+    payload = json.dumps(
+        {'invitado': invitado_data, 'evento': context_general, 'assets': assets},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class DossierManifest:
+    """
+    Manifiesto de una carpeta de salida: {id del invitado: {huella, archivo, nombre}}.
+    Solo se borran archivos que el propio manifiesto registra como generados.
+    """
+
+    def __init__(self, output_dir, context_general, name=MANIFEST_NAME):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / name
+        self.context_general = context_general
+        self.assets = asset_hashes()
+        self.entries = self._load()
+        self.removed = 0
+
+    def _load(self):
+        if not self.path.exists():
+            return {}
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            # Un manifiesto ilegible equivale a no tener manifiesto: se regenera todo
+            logger.warning(f"⚠️ Manifiesto ilegible, se ignorará: {e}")
+            return {}
+        if data.get('version') != MANIFEST_VERSION:
+            return {}
+        return data.get('dossieres', {})
+
+    def save(self):
+        """Escribe el manifiesto de forma atómica."""
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(
+            json.dumps({'version': MANIFEST_VERSION, 'dossieres': self.entries}, ensure_ascii=False, indent=1),
+            encoding='utf-8',
+        )
+        os.replace(tmp_path, self.path)
+
+    def fingerprint(self, invitado_data):
+        return dossier_fingerprint(invitado_data, self.context_general, self.assets)
+
+    def is_current(self, invitado_data):
+        """True si el dossier existe y se generó con los mismos datos."""
+        entry = self.entries.get(str(invitado_data['id']))
+        return (
+            entry is not None
+            and entry['huella'] == self.fingerprint(invitado_data)
+            and (self.output_dir / entry['archivo']).exists()
+        )
+
+    def plan(self, invitados_data, universe=None):
+        """
+        Separa a los invitados en pendientes y sin cambios, y borra los
+        dossieres de invitados que ya no existen.
+
+        Args:
+            invitados_data: Invitados por revisar
+            universe: Todos los invitados vigentes, si `invitados_data` es solo
+                una parte (al reanudar un lote); por omisión, `invitados_data`
+
+        Returns:
+            tuple: (pendientes, omitidos) como listas de invitados
+        """
+        pendientes = []
+        omitidos = []
+        for invitado_data in invitados_data:
+            (omitidos if self.is_current(invitado_data) else pendientes).append(invitado_data)
+
+        vigentes = {str(invitado_data['id']) for invitado_data in (universe or invitados_data)}
+        for invitado_id in [key for key in self.entries if key not in vigentes]:
+            self._remove_file(self.entries.pop(invitado_id)['archivo'])
+        return pendientes, omitidos
+
+    def record(self, invitado_data, result):
+        """Registra un dossier generado; si cambió de nombre, borra el archivo anterior."""
+        if not result.get('success'):
+            return
+        invitado_id = str(invitado_data['id'])
+        archivo = Path(result['path']).name
+        previous = self.entries.get(invitado_id)
+        self.entries[invitado_id] = {
+            'huella': self.fingerprint(invitado_data),
+            'archivo': archivo,
+            'nombre': invitado_data.get('nombre_completo'),
+        }
+        if previous is not None and previous['archivo'] != archivo:
+            self._remove_file(previous['archivo'])
+
+    def _remove_file(self, archivo):
+        # Otro invitado vigente puede haber generado un archivo con el mismo nombre
+        if any(entry['archivo'] == archivo for entry in self.entries.values()):
+            return
+        path = self.output_dir / archivo
+        if path.exists():
+            os.remove(path)
+            self.removed += 1
+            logger.info(f"🗑️ Dossier obsoleto eliminado: {archivo}")
+
+
+def letter_index_filename(context_general):
+    return f"{context_general['anio']}.{context_general['periodo']}-FPiT-INDICE-CARTAS.json"
+
+
+def write_letter_index(manifest, invitados_data, appendix_path):
+    """
+    Escribe el índice de las cartas sin anexo: qué archivo corresponde a cada
+    invitado y cuál es el anexo compartido que las acompaña.
+
+    Returns:
+        str: Ruta del índice
+    """
+    cartas = []
+    for invitado_data in invitados_data:
+        entry = manifest.entries.get(str(invitado_data['id']))
+        if entry is not None:
+            cartas.append({
+                'id': invitado_data['id'],
+                'nombre_completo': invitado_data.get('nombre_completo'),
+                'institucion': invitado_data.get('institucion'),
+                'carta': entry['archivo'],
+            })
+    path = manifest.output_dir / letter_index_filename(manifest.context_general)
+    path.write_text(
+        json.dumps({'anexo': Path(appendix_path).name, 'cartas': cartas}, ensure_ascii=False, indent=1),
+        encoding='utf-8',
+    )
+    return str(path)
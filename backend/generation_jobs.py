@@ -0,0 +1,428 @@
+"""
+Módulo de Trabajos de Generación
+Ejecuta la generación de dossieres en un hilo de fondo para que la petición
+HTTP responda de inmediato. El progreso se consulta por id de trabajo y la
+cancelación es cooperativa: se detiene al terminar el invitado en curso.
+"""
+
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime
+
+from batch_generation import generate_dossiers
+from batch_journal import BatchJournal
+from document_generator import save_shared_appendix
+from dossier_manifest import LETTERS_MANIFEST_NAME, MANIFEST_NAME, DossierManifest, write_letter_index
+from print_run import PrintRun
+
+logger = logging.getLogger(__name__)
+
+# Estados de un trabajo
+PENDIENTE = 'pendiente'
+EN_CURSO = 'en_curso'
+COMPLETADO = 'completado'
+CANCELADO = 'cancelado'
+FALLIDO = 'fallido'
+INTERRUMPIDO = 'interrumpido'  # El servidor se cerró con el trabajo en curso
+ACTIVE_STATES = (PENDIENTE, EN_CURSO)
+
+# Tipo de salida: un dossier por invitado, solo las cartas con un anexo compartido,
+# o un solo PDF con todas las cartas para imprimir
+SALIDA_DOSSIERES = 'dossieres'
+SALIDA_CARTAS = 'cartas'
+SALIDA_IMPRESION = 'impresion'
+SALIDAS = (SALIDA_DOSSIERES, SALIDA_CARTAS, SALIDA_IMPRESION)
+
+# Intervalo mínimo (segundos) entre escrituras del progreso a la base de datos
+PERSIST_INTERVAL = 1.0
+# Trabajos terminados que se conservan en memoria (el resto se consulta en la BD)
+MAX_FINISHED_JOBS = 10
+
+
+class GenerationJob:
+    """
+    Un lote de generación en segundo plano.
+
+    `on_update(estado)` se llama desde el hilo del trabajo con el diccionario
+    de `to_dict()` al iniciar, periódicamente durante el progreso y al terminar,
+    para persistir el estado.
+
+    Con `incremental=True` solo se generan los dossieres cuya huella cambió
+    respecto al manifiesto de la carpeta de salida (ver dossier_manifest.py).
+
+    Con `salida=SALIDA_CARTAS` se escribe solo la carta de cada invitado, más
+    un anexo compartido y un índice de invitados y archivos. Con
+    `salida=SALIDA_IMPRESION` las cartas se generan en memoria y al final se
+    escribe un solo tiraje de impresión (ver print_run.py).
+
+    Los lotes de dossieres y de cartas llevan un diario en la carpeta de salida
+    (ver batch_journal.py). Con `journal` se reanuda un lote anterior: se
+    generan solo los invitados que el diario no registra como terminados.
+    """
+
+    def __init__(self, invitados_data, context_general, output_dir, motor='word', procesos=1,
+                 incremental=False, salida=SALIDA_DOSSIERES, on_update=None, journal=None):
+        self.id = uuid.uuid4().hex
+        self.invitados_data = invitados_data
+        self.context_general = context_general
+        self.output_dir = output_dir
+        self.motor = motor
+        self.procesos = procesos
+        self.incremental = incremental
+        self.salida = salida
+        self.on_update = on_update
+        self.journal = journal
+        self.reanuda = journal.header['lote'] if journal else None
+
+        self.estado = PENDIENTE
+        self.error = None
+        self.procesados = 0
+        self.generated_count = 0
+        self.errors = []
+        self.paginas = []
+        self.omitidos = 0
+        self.eliminados = 0
+        self.previos = 0
+        self.diario = str(journal.path) if journal else None
+        self.tiraje = None
+        self.anexo = None
+        self.indice = None
+        self.creado = datetime.now()
+        self.iniciado = None
+        self.finalizado = None
+
+        self._started = None
+        self._finished = None
+        self._done = set()
+        self._next_index = 0
+        self._last_persist = 0.0
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def active(self):
+        return self.estado in ACTIVE_STATES
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"generacion-{self.id[:8]}", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Pide la cancelación. Devuelve False si el trabajo ya había terminado."""
+        if not self.active:
+            return False
+        self._cancel.set()
+        logger.info(f"🛑 Cancelación solicitada para el trabajo {self.id}")
+        return True
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        with self._lock:
+            self.estado = EN_CURSO
+            self.iniciado = datetime.now()
+            self._started = time.perf_counter()
+        self._persist(force=True)
+        logger.info(f"🚀 Trabajo {self.id}: {len(self.invitados_data)} invitaciones "
+                    f"(motor: {self.motor}, procesos: {self.procesos}, salida: {self.salida})")
+
+        try:
+            if self.salida == SALIDA_IMPRESION:
+                estado = self._run_print_run()
+            else:
+                estado = self._run_dossiers()
+        except Exception as e:
+            logger.error(f"❌ Trabajo {self.id} falló: {e}", exc_info=True)
+            estado = FALLIDO
+            self.error = str(e)
+        finally:
+            if self.journal is not None:
+                self.journal.close()
+
+        with self._lock:
+            self.estado = estado
+            self.finalizado = datetime.now()
+            self._finished = time.perf_counter()
+        logger.info(f"🏁 Trabajo {self.id} {estado}: {self.message}")
+        self._persist(force=True)
+
+    def _run_dossiers(self):
+        letters = self.salida == SALIDA_CARTAS
+        todos = self.invitados_data
+        manifest = DossierManifest(self.output_dir, self.context_general,
+                                   LETTERS_MANIFEST_NAME if letters else MANIFEST_NAME)
+        if self.journal is None:
+            self.journal = BatchJournal.create(
+                self.output_dir, self.id, self.context_general, todos,
+                motor=self.motor, procesos=self.procesos, incremental=self.incremental, salida=self.salida,
+            )
+            self.diario = str(self.journal.path)
+        else:
+            # Reanudación: los invitados que el diario registra como generados no se repiten
+            previos = [invitado_data for invitado_data in todos if self.journal.is_done(invitado_data)]
+            for invitado_data in previos:
+                manifest.record(invitado_data, self.journal.result(invitado_data))
+            with self._lock:
+                self.invitados_data = [i for i in todos if not self.journal.is_done(i)]
+                self.previos = len(previos)
+            logger.info(f"⏯️ Reanudando el lote {self.reanuda}: {len(self.invitados_data)} por generar, "
+                        f"{len(previos)} ya generados")
+            self._persist(force=True)
+
+        if self.incremental:
+            # Los ya generados al reanudar siguen vigentes: no se borran sus dossieres
+            pendientes, omitidos = manifest.plan(self.invitados_data, universe=todos)
+            with self._lock:
+                self.invitados_data = pendientes
+                self.omitidos = len(omitidos)
+                self.eliminados = manifest.removed
+            logger.info(f"♻️ Generación incremental: {len(pendientes)} por generar, "
+                        f"{len(omitidos)} sin cambios, {manifest.removed} eliminados")
+            self._persist(force=True)
+
+        results = generate_dossiers(
+            self.invitados_data, self.context_general, self.output_dir,
+            motor=self.motor, procesos=self.procesos, with_appendix=not letters,
+        )
+        try:
+            for invitado_data, result in results:
+                self._record(invitado_data, result)
+                manifest.record(invitado_data, result)
+                self.journal.record(invitado_data, result)
+                self._persist()
+                if self._cancel.is_set():
+                    break
+        finally:
+            # Cierra el generador: libera los convertidores y descarta el trabajo pendiente
+            results.close()
+            manifest.save()
+            self.journal.close()
+            self.eliminados = manifest.removed
+        if letters:
+            # El índice incluye también las cartas que no cambiaron (incremental)
+            self.anexo = save_shared_appendix(self.context_general, self.output_dir)
+            self.indice = write_letter_index(manifest, todos, self.anexo)
+        if self.procesados < len(self.invitados_data):
+            return CANCELADO
+        # El lote terminó: no queda nada que reanudar
+        self.journal.remove()
+        self.diario = None
+        return COMPLETADO
+
+    def _run_print_run(self):
+        print_run = PrintRun(self.invitados_data, self.context_general)
+        # Solo las cartas: el anexo se agrega al armar el tiraje
+        results = generate_dossiers(
+            self.invitados_data, self.context_general, None,
+            motor=self.motor, procesos=self.procesos, with_appendix=False,
+        )
+        try:
+            for invitado_data, result in results:
+                if result["success"]:
+                    print_run.add(invitado_data, result.pop("data"))
+                self._record(invitado_data, result)
+                self._persist()
+                if self._cancel.is_set():
+                    break
+        finally:
+            results.close()
+        if self.procesados < len(self.invitados_data):
+            return CANCELADO
+        if len(print_run):
+            self.tiraje = print_run.write(self.output_dir)
+        return COMPLETADO
+
+    def _record(self, invitado_data, result):
+        nombre = invitado_data.get('nombre_completo')
+        with self._lock:
+            self.procesados += 1
+            self._done.add(id(invitado_data))
+            if result["success"]:
+                self.generated_count += 1
+                logger.debug(f"✓ Invitación generada exitosamente para {nombre}")
+                if 'pages' in result:
+                    self.paginas.append({
+                        'invitado': nombre,
+                        'paginas': result['pages'],
+                        'advertencia': result.get('warning')
+                    })
+            else:
+                error_msg = result.get('error', 'Error desconocido')
+                logger.error(f"✗ Error generando invitación para {nombre}: {error_msg}")
+                self.errors.append({
+                    'invitado': nombre,
+                    'error': error_msg
+                })
+
+    def _current(self):
+        # Primer invitado (en el orden de entrada) que aún no termina
+        while (self._next_index < len(self.invitados_data)
+               and id(self.invitados_data[self._next_index]) in self._done):
+            self._next_index += 1
+        if self._next_index < len(self.invitados_data):
+            return self.invitados_data[self._next_index].get('nombre_completo')
+        return None
+
+    @property
+    def message(self):
+        total = len(self.invitados_data)
+        if self.estado == CANCELADO:
+            return f"Generación cancelada: se generaron {self.generated_count} de {total} invitaciones"
+        if self.estado == FALLIDO:
+            return f"La generación falló: {self.error}"
+        if self.estado == COMPLETADO:
+            message = f"Se generaron {self.generated_count} de {total} invitaciones correctamente"
+            if self.incremental:
+                message += f" ({self.omitidos} sin cambios, {self.eliminados} eliminadas)"
+            if self.previos:
+                message += f"; {self.previos} ya se habían generado antes de reanudar"
+            if self.tiraje:
+                message += f"; tiraje de impresión de {self.tiraje['paginas']} páginas"
+            return message
+        return f"Generando invitaciones: {self.procesados} de {total}"
+
+    def to_dict(self):
+        """Estado del trabajo para la API (las claves finales coinciden con la respuesta del lote)."""
+        with self._lock:
+            total = len(self.invitados_data)
+            elapsed = None
+            eta = None
+            if self._started is not None:
+                elapsed = (self._finished or time.perf_counter()) - self._started
+                if self.active and self.procesados:
+                    eta = elapsed / self.procesados * (total - self.procesados)
+            return {
+                'job_id': self.id,
+                'estado': self.estado,
+                'motor': self.motor,
+                'procesos': self.procesos,
+                'incremental': self.incremental,
+                'salida': self.salida,
+                'total': total,
+                'procesados': self.procesados,
+                'generated_count': self.generated_count,
+                'count': self.generated_count,
+                'omitidos': self.omitidos,
+                'eliminados': self.eliminados,
+                'reanuda': self.reanuda,
+                'previos': self.previos,
+                'diario': self.diario,
+                'invitado_actual': self._current() if self.active else None,
+                'segundos_transcurridos': round(elapsed, 1) if elapsed is not None else None,
+                'eta_segundos': round(eta, 1) if eta is not None else None,
+                'cancelacion_solicitada': self._cancel.is_set(),
+                'output_folder': self.output_dir,
+                'errors': list(self.errors),
+                'paginas': list(self.paginas),
+                'tiraje': self.tiraje,
+                'anexo': self.anexo,
+                'indice': self.indice,
+                'creado': self.creado.isoformat(),
+                'iniciado': self.iniciado.isoformat() if self.iniciado else None,
+                'finalizado': self.finalizado.isoformat() if self.finalizado else None,
+                'message': self.message,
+            }
+
+    def _persist(self, force=False):
+        if self.on_update is None:
+            return
+        now = time.perf_counter()
+        if not force and now - self._last_persist < PERSIST_INTERVAL:
+            return
+        self._last_persist = now
+        try:
+            self.on_update(self.to_dict())
+        except Exception as e:
+            # Un fallo al guardar el progreso no debe detener la generación
+            logger.warning(f"⚠️ No se pudo guardar el estado del trabajo {self.id}: {e}")
+
+
+# --- Registro de trabajos del proceso ---
+_jobs = {}
+_jobs_lock = threading.Lock()
+# Descarga en flujo en curso (ver StreamingRun)
+_stream = None
+
+
+class StreamingRun:
+    """
+    Una generación que se entrega en flujo en la propia respuesta HTTP (el ZIP
+    de todos los dossieres). No corre en segundo plano ni se consulta en
+    /api/jobs, pero usa el mismo pool de convertidores: mientras dura la
+    respuesta ocupa el turno de los lotes (ver start_stream).
+    """
+
+    def __init__(self, total):
+        self.id = uuid.uuid4().hex
+        self.total = total
+        self.creado = datetime.now()
+
+    def finish(self):
+        """La respuesta terminó (o el cliente se desconectó): libera el turno."""
+        global _stream
+        with _jobs_lock:
+            if _stream is self:
+                _stream = None
+
+
+def _running():
+    # Llamar con _jobs_lock tomado
+    if _stream is not None:
+        return _stream
+    return next((job for job in _jobs.values() if job.active), None)
+
+
+def active_job():
+    """
+    Devuelve la generación en curso (un GenerationJob o un StreamingRun), o
+    None. Solo se ejecuta una generación a la vez.
+    """
+    with _jobs_lock:
+        return _running()
+
+
+def get_job(job_id):
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def start_job(job):
+    """
+    Registra e inicia `job`.
+
+    Returns:
+        GenerationJob: `job`, o la generación que ya estaba en curso (en cuyo
+            caso `job` no se inicia)
+    """
+    with _jobs_lock:
+        running = _running()
+        if running is not None:
+            return running
+        finished = [other for other in _jobs.values() if not other.active]
+        for other in sorted(finished, key=lambda j: j.creado)[:max(0, len(finished) - MAX_FINISHED_JOBS + 1)]:
+            del _jobs[other.id]
+        _jobs[job.id] = job
+    return job.start()
+
+
+def start_stream(run):
+    """
+    Registra la descarga en flujo `run`; hasta que se llame a `run.finish()`
+    no se inicia ningún lote ni otra descarga.
+
+    Returns:
+        StreamingRun | GenerationJob: `run`, o la generación que ya estaba en curso
+    """
+    global _stream
+    with _jobs_lock:
+        running = _running()
+        if running is not None:
+            return running
+        _stream = run
+    return run
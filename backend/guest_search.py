@@ -0,0 +1,155 @@
+"""
+Búsqueda de Invitados
+Índice de texto completo (SQLite FTS5) sobre el nombre, el puesto, la
+institución, su abreviación y la nota de cada invitado. Es una tabla de
+contenido externo: guarda solo el índice y lee el texto de `invitado`, y la
+mantienen sincronizada triggers de la propia base de datos, así que cualquier
+escritura (rutas, importación, scripts de migración) la actualiza.
+
+El tokenizador `unicode61` con `remove_diacritics 2` ignora acentos y
+mayúsculas: "jose" encuentra a "José" y "garcia" a "GARCÍA".
+"""
+
+import os
+import re
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'invitado_fts'
+SEARCH_COLUMNS = ('nombre_completo', 'puesto_completo', 'institucion', 'abreviacion_org', 'nota')
+
+# Peso de cada columna en el orden por relevancia (bm25), en el orden de SEARCH_COLUMNS
+SEARCH_WEIGHTS = (10.0, 2.0, 4.0, 4.0, 1.0)
+
+# Marcas de las coincidencias en los fragmentos
+MARK_OPEN = '<mark>'
+MARK_CLOSE = '</mark>'
+SNIPPET_TOKENS = 12
+
+# Ordenar por relevancia (bm25) cuesta en proporción al número de coincidencias.
+# Con más de estas (una búsqueda de una o dos letras, o "instituto"), los
+# resultados se ordenan por id para responder en pocos milisegundos; conviene
+# afinar la búsqueda
+RANK_MAX_MATCHES = int(os.environ.get('JPI_SEARCH_RANK_LIMIT', 2000))
+
+_columns = ', '.join(SEARCH_COLUMNS)
+_new = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+_old = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+
+_CREATE_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+    {_columns},
+    content='invitado', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+)"""
+
+_TRIGGERS = {
+    f'{SEARCH_TABLE}_ai': f"""
+CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON invitado BEGIN
+    INSERT INTO {SEARCH_TABLE}(rowid, {_columns}) VALUES (new.id, {_new});
+END""",
+    f'{SEARCH_TABLE}_ad': f"""
+CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON invitado BEGIN
+    INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old});
+END""",
+    f'{SEARCH_TABLE}_au': f"""
+CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au AFTER UPDATE OF {_columns} ON invitado BEGIN
+    INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old});
+    INSERT INTO {SEARCH_TABLE}(rowid, {_columns}) VALUES (new.id, {_new});
+END""",
+}
+
+_available = None
+
+
+class SearchUnavailable(RuntimeError):
+    """El SQLite de esta instalación no incluye FTS5."""
+
+
+def ensure_search_index(connection):
+    """
+    Crea la tabla FTS5 y sus triggers si faltan (idempotente). Si hubo que
+    crear alguno, la tabla se reconstruye desde `invitado`: es una base de
+    datos anterior, o un script de migración recreó la tabla y con ella se
+    perdieron los triggers.
+
+    Returns:
+        bool: True si la búsqueda está disponible
+    """
+    global _available
+    existing = {row[0] for row in connection.execute(text(
+        "SELECT name FROM sqlite_master WHERE name = :table OR (type = 'trigger' AND tbl_name = 'invitado')"
+    ), {'table': SEARCH_TABLE})}
+    try:
+        connection.execute(text(_CREATE_TABLE))
+    except OperationalError as e:
+        logger.warning(f"⚠️ Búsqueda de texto completo no disponible (FTS5): {e}")
+        _available = False
+        return False
+    for name, ddl in _TRIGGERS.items():
+        connection.execute(text(ddl))
+
+    missing = ({SEARCH_TABLE} | set(_TRIGGERS)) - existing
+    if missing:
+        weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+        connection.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) VALUES ('rank', 'bm25({weights})')"))
+        connection.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+        logger.info(f"🔎 Índice de búsqueda reconstruido ({', '.join(sorted(missing))} no existía)")
+    _available = True
+    return True
+
+
+def build_match_query(query):
+    """
+    Convierte lo que escribe el usuario en una consulta MATCH: cada palabra
+    entre comillas (los operadores de FTS5 no se interpretan) y como prefijo,
+    para encontrar nombres parciales ("gar lop" → García López).
+
+    Returns:
+        str | None: la consulta, o None si no hay ninguna palabra
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search(connection, query, limit, offset=0):
+    """
+    Invitados que coinciden con `query`, del más al menos relevante.
+
+    Returns:
+        tuple: (total de coincidencias, ordenadas por relevancia,
+            [(id, nombre resaltado, fragmento)]). El fragmento es el trozo de
+            la columna con más coincidencias, con las palabras encontradas
+            entre MARK_OPEN y MARK_CLOSE. Con más de RANK_MAX_MATCHES
+            coincidencias se ordenan por id en vez de por relevancia.
+    """
+    if _available is False:
+        raise SearchUnavailable("La búsqueda de texto completo (FTS5) no está disponible en esta instalación")
+    match = build_match_query(query)
+    if match is None:
+        return 0, True, []
+
+    total = connection.execute(text(
+        f"SELECT count(*) FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match"
+    ), {'match': match}).scalar()
+    ranked = total <= RANK_MAX_MATCHES
+    rows = connection.execute(text(f"""
+        SELECT rowid,
+               highlight({SEARCH_TABLE}, 0, :open, :close),
+               snippet({SEARCH_TABLE}, -1, :open, :close, '…', :tokens)
+        FROM {SEARCH_TABLE}
+        WHERE {SEARCH_TABLE} MATCH :match
+        ORDER BY {'rank' if ranked else 'rowid'}
+        LIMIT :limit OFFSET :offset
+    """), {
+        'match': match, 'open': MARK_OPEN, 'close': MARK_CLOSE, 'tokens': SNIPPET_TOKENS,
+        'limit': limit, 'offset': offset,
+    }).all()
+    return total, ranked, [tuple(row) for row in rows]
@@ -0,0 +1,120 @@
+"""
+Caché HTTP de las Lecturas de Invitados
+Un contador de versión de los datos, que incrementa cada ruta que modifica
+invitados, da el ETag de las rutas de lectura (lista, rutas por rol,
+exportación). Si el cliente ya tiene esa versión (If-None-Match), la ruta
+responde 304 sin consultar la base de datos. Las respuestas de texto que
+superan un tamaño mínimo se comprimen con gzip.
+
+La versión empieza en cada arranque con una época nueva, así que un ETag de
+una ejecución anterior nunca coincide (los datos pudieron cambiar entre tanto).
+"""
+
+import os
+import gzip
+import time
+import threading
+from functools import wraps
+
+from flask import current_app, request
+
+# Tamaño mínimo (bytes) a partir del cual se comprime una respuesta
+GZIP_MIN_BYTES = int(os.environ.get('JPI_GZIP_MIN_BYTES', 1024))
+GZIP_LEVEL = 6
+
+# Tipos que vale la pena comprimir (un XLSX ya viene comprimido)
+_COMPRESSIBLE = ('application/json', 'text/')
+
+
+class DataVersion:
+    """Versión de los datos de invitados: época del proceso + contador de escrituras."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._epoch = format(time.time_ns(), 'x')
+        self._version = 0
+        self._not_modified = 0
+        self._compressed = 0
+        self._bytes_saved = 0
+
+    @property
+    def value(self):
+        with self._lock:
+            return self._version
+
+    def bump(self):
+        """Una escritura cambió los invitados: invalida todos los ETags."""
+        with self._lock:
+            self._version += 1
+            return self._version
+
+    def etag(self):
+        with self._lock:
+            return f"{self._epoch}-{self._version}"
+
+    def _count(self, not_modified=0, compressed=0, bytes_saved=0):
+        with self._lock:
+            self._not_modified += not_modified
+            self._compressed += compressed
+            self._bytes_saved += bytes_saved
+
+    def stats(self):
+        with self._lock:
+            return {
+                'version': self._version,
+                'not_modified': self._not_modified,
+                'compressed': self._compressed,
+                'bytes_saved': self._bytes_saved,
+            }
+
+
+data_version = DataVersion()
+
+
+def _gzip(response):
+    """Comprime la respuesta si el cliente lo acepta y vale la pena."""
+    response.vary.add('Accept-Encoding')
+    if ('gzip' not in request.accept_encodings
+            or response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or not response.mimetype.startswith(_COMPRESSIBLE)):
+        return response
+
+    # send_file entrega el archivo en flujo; aquí el contenido ya está en memoria
+    response.direct_passthrough = False
+    data = response.get_data()
+    if len(data) < GZIP_MIN_BYTES:
+        return response
+    compressed = gzip.compress(data, compresslevel=GZIP_LEVEL)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = 'gzip'
+    data_version._count(compressed=1, bytes_saved=len(data) - len(compressed))
+    return response
+
+
+def versioned(view):
+    """
+    Decorador para rutas de lectura de invitados: ETag débil con la versión
+    de los datos, 304 si el cliente ya la tiene y gzip para respuestas grandes.
+    El ETag es débil (W/) porque la versión comprimida y la normal comparten
+    el mismo contenido.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # La versión se toma antes de leer: si una escritura llega mientras
+        # tanto, el ETag queda viejo y la próxima petición vuelve a leer
+        etag = data_version.etag()
+        if request.if_none_match.contains_weak(etag):
+            data_version._count(not_modified=1)
+            response = current_app.response_class(status=304)
+            response.vary.add('Accept-Encoding')
+        else:
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            response = _gzip(response)
+        response.set_etag(etag, weak=True)
+        # El navegador guarda la respuesta pero la revalida en cada petición
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return wrapper
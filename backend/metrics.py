@@ -0,0 +1,166 @@
+"""
+Métricas del Pipeline
+Mide cada etapa de la generación (plantilla, render, guardado del DOCX,
+conversión, limpieza, unión, optimización, escritura y vista previa) y
+acumula, por etapa, el número de operaciones, el tiempo y los bytes, con los
+percentiles p50/p95 de las duraciones recientes. Se exponen en JSON y en el
+formato de texto de Prometheus (ver GET /api/metrics).
+"""
+
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Duraciones recientes por etapa sobre las que se calculan los percentiles
+SAMPLE_WINDOW = 1000
+
+_lock = threading.Lock()
+_stages = {}
+# Capturas activas (ver capture()): reciben una copia de cada muestra
+_captures = []
+
+
+class StageStats:
+    """Contadores e histograma de duraciones de una etapa."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max = 0.0
+        self.counters = {'bytes': 0}
+        self.samples = deque(maxlen=SAMPLE_WINDOW)
+
+    def add(self, seconds, counters):
+        self.count += 1
+        self.seconds += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def to_dict(self):
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'seconds': round(self.seconds, 4),
+            'p50': round(_percentile(ordered, 0.50), 4),
+            'p95': round(_percentile(ordered, 0.95), 4),
+            'max': round(self.max, 4),
+            **self.counters,
+        }
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def record(name, seconds, counters=None):
+    """Registra una muestra de la etapa `name`."""
+    counters = counters or {}
+    with _lock:
+        _stages.setdefault(name, StageStats()).add(seconds, counters)
+        for samples in _captures:
+            samples.append((name, seconds, counters))
+
+
+@contextmanager
+def stage(name):
+    """
+    Mide una etapa del pipeline; el bloque asigna `stage['bytes']` con el
+    tamaño producido y puede agregar otros contadores a `stage`.
+    """
+    counters = {'bytes': 0}
+    started = time.perf_counter()
+    try:
+        yield counters
+    finally:
+        record(name, time.perf_counter() - started, counters)
+
+
+@contextmanager
+def capture():
+    """
+    Reúne las muestras registradas en este proceso mientras dura el bloque.
+    Los procesos de trabajo las devuelven junto con sus resultados para que
+    el proceso principal las agregue con `record_samples`.
+    """
+    samples = []
+    with _lock:
+        _captures.append(samples)
+    try:
+        yield samples
+    finally:
+        with _lock:
+            _captures.remove(samples)
+
+
+def record_samples(samples):
+    for name, seconds, counters in samples:
+        record(name, seconds, counters)
+
+
+def stage_stats():
+    """{etapa: {count, seconds, p50, p95, max, bytes, ...}}"""
+    with _lock:
+        return {name: stats.to_dict() for name, stats in _stages.items()}
+
+
+def reset():
+    with _lock:
+        _stages.clear()
+
+
+def prometheus(report):
+    """
+    Convierte el reporte de `document_generator.pipeline_stats()` al formato
+    de texto de Prometheus.
+    """
+    lines = [
+        '# HELP jpi_stage_seconds Duración de las etapas del pipeline de generación',
+        '# TYPE jpi_stage_seconds summary',
+    ]
+    stages = report['etapas']
+    for name, stats in stages.items():
+        label = f'stage="{name}"'
+        lines.append(f'jpi_stage_seconds{{{label},quantile="0.5"}} {stats["p50"]}')
+        lines.append(f'jpi_stage_seconds{{{label},quantile="0.95"}} {stats["p95"]}')
+        lines.append(f'jpi_stage_seconds_sum{{{label}}} {stats["seconds"]}')
+        lines.append(f'jpi_stage_seconds_count{{{label}}} {stats["count"]}')
+    lines += ['# HELP jpi_stage_seconds_max Duración máxima de cada etapa', '# TYPE jpi_stage_seconds_max gauge']
+    lines += [f'jpi_stage_seconds_max{{stage="{name}"}} {stats["max"]}' for name, stats in stages.items()]
+    lines += ['# HELP jpi_stage_bytes_total Bytes producidos por cada etapa', '# TYPE jpi_stage_bytes_total counter']
+    lines += [f'jpi_stage_bytes_total{{stage="{name}"}} {stats["bytes"]}' for name, stats in stages.items()]
+    before = {name: stats['bytes_before'] for name, stats in stages.items() if 'bytes_before' in stats}
+    if before:
+        lines += ['# HELP jpi_stage_bytes_before_total Bytes recibidos por las etapas de optimización',
+                  '# TYPE jpi_stage_bytes_before_total counter']
+        lines += [f'jpi_stage_bytes_before_total{{stage="{name}"}} {value}' for name, value in before.items()]
+
+    pipeline = report.get('pipeline') or {}
+    for metric, key, help_text in (
+            ('throughput', 'por_segundo', 'Elementos por segundo de cada etapa del último pipeline'),
+            ('utilization', 'utilizacion', 'Fracción del tiempo que cada etapa estuvo ocupada'),
+            ('queue_depth_max', 'cola_max', 'Profundidad máxima de la cola de entrada de cada etapa'),
+            ('queue_depth_mean', 'cola_media', 'Profundidad media de la cola de entrada de cada etapa')):
+        if pipeline:
+            lines += [f'# HELP jpi_pipeline_{metric} {help_text}', f'# TYPE jpi_pipeline_{metric} gauge']
+            lines += [f'jpi_pipeline_{metric}{{stage="{name}"}} {stats[key]}' for name, stats in pipeline.items()]
+
+    caches = report['caches']
+    for metric, key, kind in (('hits_total', 'hits', 'counter'), ('misses_total', 'misses', 'counter'),
+                              ('entries', 'entries', 'gauge'), ('bytes', 'bytes', 'gauge')):
+        lines.append(f'# TYPE jpi_cache_{metric} {kind}')
+        lines += [f'jpi_cache_{metric}{{cache="{name}"}} {stats[key]}' for name, stats in caches.items()]
+
+    lines += [
+        '# TYPE jpi_scratch_files_total counter',
+        f'jpi_scratch_files_total {report["scratch"]["files"]}',
+        '# TYPE jpi_scratch_bytes_total counter',
+        f'jpi_scratch_bytes_total {report["scratch"]["bytes"]}',
+        '# TYPE jpi_pdf_optimization_level gauge',
+        f'jpi_pdf_optimization_level {report["optimizacion"]}',
+    ]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,97 @@
+"""
+Optimización de PDF
+Reduce el tamaño de los dossieres: elimina objetos duplicados y sin uso,
+recomprime los flujos de contenido y, en los niveles altos, reduce la
+resolución de las imágenes del anexo. El trabajo caro (las imágenes) se hace
+una sola vez por anexo (ver asset_cache.AppendixCache); cada dossier solo se
+reescribe, lo que toma unos milisegundos.
+"""
+
+import os
+import time
+import logging
+
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+# Niveles de optimización. Las imágenes por encima de `umbral` ppp se reducen a `dpi`.
+OPTIMIZATION_LEVELS = {
+    0: None,                                          # Sin optimizar
+    1: {'dpi': None},                                 # Sin pérdida: objetos duplicados y flujos
+    2: {'umbral': 200, 'dpi': 150, 'calidad': 80},    # Imágenes a calidad de impresión
+    3: {'umbral': 120, 'dpi': 96, 'calidad': 60},     # Imágenes a calidad de pantalla (correo)
+}
+
+DEFAULT_OPTIMIZATION = 0
+
+
+def _configured_level():
+    """
+    Nivel de JPI_PDF_OPTIMIZATION. Un valor inválido no impide que el backend
+    arranque: se registra una advertencia y se usa DEFAULT_OPTIMIZATION.
+    """
+    value = os.environ.get('JPI_PDF_OPTIMIZATION', str(DEFAULT_OPTIMIZATION))
+    try:
+        level = int(value)
+    except ValueError:
+        level = None
+    if level not in OPTIMIZATION_LEVELS:
+        logger.warning(f"⚠️ JPI_PDF_OPTIMIZATION={value!r} no es válido (opciones: "
+                       f"{sorted(OPTIMIZATION_LEVELS)}); se usa el nivel {DEFAULT_OPTIMIZATION}")
+        return DEFAULT_OPTIMIZATION
+    return level
+
+
+# Nivel usado en la generación (configurable por entorno)
+PDF_OPTIMIZATION = _configured_level()
+
+
+def optimize_pdf(pdf_bytes, level=PDF_OPTIMIZATION, full=True):
+    """
+    Optimiza un PDF en memoria.
+
+    Args:
+        pdf_bytes (bytes): El PDF original
+        level (int): Uno de OPTIMIZATION_LEVELS (0 = se devuelve sin cambios)
+        full (bool): False para la pasada ligera de cada dossier: une objetos
+            idénticos y comprime flujos, sin tocar imágenes ni reescribir el
+            contenido de las páginas (que toma cientos de milisegundos)
+
+    Returns:
+        bytes: El PDF optimizado (o el original, si el resultado no es menor)
+    """
+    settings = OPTIMIZATION_LEVELS[level]
+    if settings is None:
+        return pdf_bytes
+
+    doc = fitz.open(stream=pdf_bytes, filetype='pdf')
+    try:
+        if full and settings['dpi']:
+            doc.rewrite_images(
+                dpi_threshold=settings['umbral'],
+                dpi_target=settings['dpi'],
+                quality=settings['calidad'],
+            )
+        # garbage=4: quita objetos sin uso y une los idénticos
+        optimized = doc.tobytes(garbage=4, deflate=True, deflate_fonts=True, clean=full, use_objstms=1)
+    finally:
+        doc.close()
+    return optimized if len(optimized) < len(pdf_bytes) else pdf_bytes
+
+
+def optimize_appendix(pdf_bytes, level=PDF_OPTIMIZATION):
+    """
+    Optimiza el anexo, incluidas sus imágenes.
+
+    Returns:
+        tuple: (bytes optimizados, segundos empleados)
+    """
+    if OPTIMIZATION_LEVELS[level] is None:
+        return pdf_bytes, 0.0
+    started = time.perf_counter()
+    optimized = optimize_pdf(pdf_bytes, level)
+    elapsed = time.perf_counter() - started
+    logger.info(f"🗜️ Anexo optimizado (nivel {level}): {len(pdf_bytes) / 1024:.0f} KB → "
+                f"{len(optimized) / 1024:.0f} KB en {elapsed:.2f}s")
+    return optimized, elapsed
@@ -0,0 +1,395 @@
+"""
+Motor de Estampado de PDF ("renderizar una vez, estampar muchas")
+Convierte la plantilla a PDF una sola vez con marcas en lugar de los datos del
+invitado y después escribe el texto de cada invitado sobre esas marcas con
+PyMuPDF, sin pasar por Word. Si un valor no cabe en su recuadro, o la
+plantilla lo transforma con un filtro de Jinja, ese invitado se genera por la
+ruta normal de Word.
+"""
+
+import io
+import os
+import re
+import time
+import logging
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from asset_cache import template_cache
+from document_generator import (
+    _build_context,
+    _find_template,
+    _merge_and_save_dossier,
+    convert_docx_bytes,
+    generate_full_dossier,
+)
+
+logger = logging.getLogger(__name__)
+
+# Campos que cambian entre invitados
+STAMP_FIELDS = ('nombre_completo', 'puesto_completo', 'institucion', 'caracter_invitacion')
+
+# Reducción máxima del tamaño de letra antes de declarar que un valor no cabe
+MIN_FONT_SCALE = 0.85
+FONT_SCALE_STEP = 0.05
+
+# Mayúsculas y minúsculas mezcladas: un filtro como |upper, |lower o |title
+# cambia la marca, y la marca cambiada se reconoce sin distinguir mayúsculas
+_ANCHOR_FORMAT = "JpiAnchor{}x"
+_ANCHOR_PATTERN = re.compile(r"JpiAnchor(\d+)x", re.IGNORECASE)
+
+# Directorios donde buscar las fuentes del sistema que usó Word
+_FONT_DIRS = [
+    Path(os.environ.get('WINDIR', r'C:\Windows')) / 'Fonts',
+    Path(os.environ.get('LOCALAPPDATA', '')) / 'Microsoft' / 'Windows' / 'Fonts',
+    Path('/usr/share/fonts'),
+    Path('/Library/Fonts'),
+]
+
+# Nombres PostScript comunes → nombre de archivo en Windows
+_WINDOWS_FONT_FILES = {
+    'arial': 'arial', 'arialbold': 'arialbd', 'arialitalic': 'ariali', 'arialbolditalic': 'arialbi',
+    'calibri': 'calibri', 'calibribold': 'calibrib', 'calibriitalic': 'calibrii', 'calibribolditalic': 'calibriz',
+    'timesnewroman': 'times', 'timesnewromanbold': 'timesbd', 'timesnewromanitalic': 'timesi',
+    'timesnewromanbolditalic': 'timesbi',
+}
+
+_font_index = None
+
+
+class FieldOverflow(Exception):
+    """El valor de un campo no cabe en el recuadro de su marca."""
+
+
+class FilteredField(Exception):
+    """La plantilla transforma el campo (un filtro de Jinja): estamparlo tal cual no daría lo mismo que Word."""
+
+
+def _normalize_font_name(name):
+    name = name.split('+', 1)[-1]  # Quitar el prefijo del subconjunto (ABCDEF+Arial)
+    name = re.sub(r'(PSMT|MT|PS)$', '', name.replace('-', ''))
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+def _system_font_index():
+    """Índice {nombre normalizado: ruta} de las fuentes TrueType del sistema."""
+    global _font_index
+    if _font_index is None:
+        _font_index = {}
+        for font_dir in _FONT_DIRS:
+            if not font_dir.is_dir():
+                continue
+            for path in font_dir.rglob('*'):
+                if path.suffix.lower() in ('.ttf', '.otf'):
+                    _font_index.setdefault(_normalize_font_name(path.stem), path)
+    return _font_index
+
+
+def _match_font(span):
+    """
+    Busca la fuente equivalente a la del span: primero el archivo del sistema
+    (las fuentes incrustadas por Word son subconjuntos y no sirven para texto
+    nuevo) y si no existe, la fuente base-14 más parecida.
+
+    Returns:
+        tuple: (fontname, fontfile o None, fitz.Font)
+    """
+    normalized = _normalize_font_name(span['font'])
+    index = _system_font_index()
+    path = index.get(normalized) or index.get(_WINDOWS_FONT_FILES.get(normalized, ''))
+    if path is not None:
+        return 'F' + normalized[:20], str(path), fitz.Font(fontfile=str(path))
+
+    bold = bool(span['flags'] & 16)
+    italic = bool(span['flags'] & 2)
+    if span['flags'] & 8:
+        base = 'co'
+    elif span['flags'] & 4:
+        base = 'ti'
+    else:
+        base = 'he'
+    suffix = {(False, False): 'lv' if base == 'he' else ('ro' if base == 'ti' else 'ur'),
+              (True, False): 'bo', (False, True): 'it', (True, True): 'bi'}[(bold, italic)]
+    fontname = base + suffix
+    return fontname, None, fitz.Font(fontname)
+
+
+class Anchor:
+    """Recuadro de un campo en la página base, con la tipografía que usó Word."""
+
+    def __init__(self, page_number, rect, origin, span, box, max_height):
+        self.page_number = page_number
+        self.rect = rect
+        self.origin = origin
+        self.fontsize = span['size']
+        rgb = span['color']
+        self.color = ((rgb >> 16 & 255) / 255, (rgb >> 8 & 255) / 255, (rgb & 255) / 255)
+        self.fontname, self.fontfile, self.font = _match_font(span)
+        self.box = box
+        self.max_height = max_height
+        self.align = 'left'
+        if abs(rect.x0 - box.x0) > 2:
+            center = (rect.x0 + rect.x1) / 2
+            self.align = 'center' if abs(center - (box.x0 + box.x1) / 2) < 4 else 'right'
+
+    def layout(self, text):
+        """
+        Acomoda el texto en el recuadro, partiendo en líneas y reduciendo la
+        letra si hace falta.
+
+        Returns:
+            tuple: (líneas, tamaño de letra)
+
+        Raises:
+            FieldOverflow: si no cabe ni con la letra mínima
+        """
+        if any(not self.font.has_glyph(ord(ch)) for ch in text if not ch.isspace()):
+            raise FieldOverflow(f"La fuente {self.fontname} no tiene todos los caracteres de '{text}'")
+
+        scale = 1.0
+        while scale >= MIN_FONT_SCALE - 1e-9:
+            size = self.fontsize * scale
+            lines = self._wrap(text, size)
+            if lines is not None and len(lines) * self.rect.height * scale <= self.max_height + 0.5:
+                return lines, size
+            scale -= FONT_SCALE_STEP
+        raise FieldOverflow(f"'{text}' no cabe en el espacio de la plantilla")
+
+    def _wrap(self, text, size):
+        lines = []
+        current = ''
+        for word in text.split():
+            candidate = f"{current} {word}".strip()
+            if self.font.text_length(candidate, fontsize=size) <= self.box.width:
+                current = candidate
+                continue
+            if not current:
+                return None  # Una sola palabra más ancha que el recuadro
+            lines.append(current)
+            current = word
+            if self.font.text_length(current, fontsize=size) > self.box.width:
+                return None
+        lines.append(current)
+        return lines
+
+    def stamp(self, page, text):
+        lines, size = self.layout(text)
+        line_height = self.rect.height * size / self.fontsize
+        y = self.origin.y
+        for line in lines:
+            width = self.font.text_length(line, fontsize=size)
+            if self.align == 'center':
+                x = self.box.x0 + (self.box.width - width) / 2
+            elif self.align == 'right':
+                x = self.box.x1 - width
+            else:
+                x = self.box.x0
+            page.insert_text((x, y), line, fontname=self.fontname, fontfile=self.fontfile,
+                             fontsize=size, color=self.color)
+            y += line_height
+
+
+class StampTemplate:
+    """PDF base (sin marcas) y las marcas encontradas para cada campo."""
+
+    def __init__(self, base_pdf, anchors, inline_fields, filtered_fields=()):
+        self.base_pdf = base_pdf
+        self.anchors = anchors  # {campo: [Anchor, ...]}
+        self.inline_fields = inline_fields
+        self.filtered_fields = filtered_fields
+
+    def render(self, invitado_data):
+        """Estampa los datos del invitado y devuelve la carta en bytes PDF."""
+        for field in self.filtered_fields:
+            if (invitado_data.get(field) or '').strip():
+                raise FilteredField(f"La plantilla aplica un filtro a '{field}'")
+        pdf = fitz.open('pdf', self.base_pdf)
+        try:
+            for field, anchors in self.anchors.items():
+                value = (invitado_data.get(field) or '').strip()
+                if not value:
+                    continue
+                for anchor in anchors:
+                    anchor.stamp(pdf[anchor.page_number], value)
+            return pdf.tobytes(garbage=1, deflate=True)
+        finally:
+            pdf.close()
+
+
+def _analyze_base_pdf(pdf_bytes, fields):
+    """
+    Localiza las marcas en el PDF convertido, las borra y calcula el recuadro
+    disponible para cada campo. Una marca que no aparece exactamente como se
+    escribió pasó por un filtro de la plantilla: su campo no se estampa.
+
+    Returns:
+        StampTemplate
+    """
+    pdf = fitz.open('pdf', pdf_bytes)
+    anchors = {}
+    inline_fields = set()
+    filtered_fields = set()
+    try:
+        for page in pdf:
+            words = page.get_text('words')
+            if not words:
+                continue
+            column = fitz.Rect(min(w[0] for w in words), 0, max(w[2] for w in words), 0)
+            spans = [span for block in page.get_text('dict')['blocks'] for line in block.get('lines', [])
+                     for span in line['spans']]
+            found = False
+            for span in spans:
+                for match in _ANCHOR_PATTERN.finditer(span['text']):
+                    field = fields[int(match.group(1))]
+                    rect = page.search_for(match.group(0), clip=fitz.Rect(span['bbox']))
+                    rect = rect[0] if rect else fitz.Rect(span['bbox'])
+                    found = True
+                    page.add_redact_annot(rect)
+                    if match.group(0) != _ANCHOR_FORMAT.format(match.group(1)):
+                        filtered_fields.add(field)
+                        continue
+
+                    # Un campo con más texto en su misma línea no puede crecer: se resuelve en Word
+                    same_line = [w for w in words if not _ANCHOR_PATTERN.search(w[4])
+                                 and w[1] < rect.y1 - 1 and w[3] > rect.y0 + 1]
+                    if same_line:
+                        inline_fields.add(field)
+                        continue
+
+                    below = [w[1] for w in words if w[1] >= rect.y1 - 1
+                             and w[0] < column.x1 and w[2] > column.x0]
+                    bottom = min(below) if below else page.rect.height - 36
+                    box = fitz.Rect(column.x0, rect.y0, column.x1, rect.y1)
+                    anchors.setdefault(field, []).append(
+                        Anchor(page.number, rect, fitz.Point(span['origin']), span, box, bottom - rect.y0)
+                    )
+            if found:
+                page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE)
+        for field in filtered_fields:
+            anchors.pop(field, None)
+        return StampTemplate(pdf.tobytes(garbage=1, deflate=True), anchors, inline_fields - filtered_fields,
+                             tuple(sorted(filtered_fields)))
+    finally:
+        pdf.close()
+
+
+def _convert_with_anchors(context_general, values, fields):
+    """Renderiza la plantilla con marcas para `fields` y valores reales para el resto."""
+    context = _build_context(values, context_general)
+    for i, field in enumerate(fields):
+        context[field] = _ANCHOR_FORMAT.format(i)
+
+    doc = template_cache.get(_find_template()).new()
+    doc.render(context)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    pdf_bytes = convert_docx_bytes(buffer.getvalue())
+    if pdf_bytes is None:
+        raise Exception("La conversión de la plantilla base a PDF falló. Revisa el log para más detalles.")
+    return pdf_bytes
+
+
+class StampEngine:
+    """
+    Genera cartas estampando los datos sobre un PDF base convertido una vez.
+
+    Los campos que quedan dentro de un párrafo (con texto antes o después en la
+    misma línea) no pueden reacomodarse sin Word; para ellos se convierte una
+    variante de la base por cada combinación distinta de valores, que en la
+    práctica son muy pocas (por ejemplo, los distintos `caracter_invitacion`).
+    """
+
+    def __init__(self, context_general):
+        self.context_general = context_general
+        self.stamp_fields = STAMP_FIELDS
+        self.inline_fields = ()
+        self.filtered_fields = ()
+        self._variants = {}
+        self.conversions = 0
+
+    def prepare(self):
+        """Conversión de análisis: detecta qué campos son de línea propia."""
+        pdf_bytes = _convert_with_anchors(self.context_general, {}, STAMP_FIELDS)
+        self.conversions += 1
+        template = _analyze_base_pdf(pdf_bytes, STAMP_FIELDS)
+        self.inline_fields = tuple(f for f in STAMP_FIELDS if f in template.inline_fields)
+        self.filtered_fields = template.filtered_fields
+        self.stamp_fields = tuple(f for f in STAMP_FIELDS if f not in self.inline_fields)
+        if not self.inline_fields:
+            self._variants[()] = template
+        logger.info(f"🖨️ Motor de estampado listo. Campos estampados: {self.stamp_fields}; "
+                    f"por variante: {self.inline_fields}; con filtro (Word): {self.filtered_fields}")
+        return self
+
+    def _template_for(self, invitado_data):
+        key = tuple((invitado_data.get(f) or '') for f in self.inline_fields)
+        if key not in self._variants:
+            values = dict(zip(self.inline_fields, key))
+            pdf_bytes = _convert_with_anchors(self.context_general, values, self.stamp_fields)
+            self.conversions += 1
+            self._variants[key] = _analyze_base_pdf(pdf_bytes, self.stamp_fields)
+        return self._variants[key]
+
+    def render_letter(self, invitado_data):
+        """
+        Returns:
+            bytes: La carta del invitado en PDF
+
+        Raises:
+            FieldOverflow: si algún valor no cabe; el llamador debe usar Word
+            FilteredField: si la plantilla filtra un campo con valor; también con Word
+        """
+        return self._template_for(invitado_data).render(invitado_data)
+
+
+def generate_stamped_dossiers(invitados_data, context_general, output_dir, with_appendix=True):
+    """
+    Genera los dossieres estampando los datos sobre la plantilla convertida.
+    Los invitados cuyos datos no caben, que tienen un campo que la plantilla
+    filtra, o cuya variante de la base no se pudo convertir, se generan por la
+    ruta normal de Word; si falla la conversión
+    de análisis, todo el lote se genera con Word.
+
+    Yields:
+        dict: Un resultado por invitado, en el mismo orden que `invitados_data`
+    """
+    try:
+        engine = StampEngine(context_general).prepare()
+    except Exception as e:
+        logger.error(f"❌ No se pudo preparar el motor de estampado: {e}. El lote se generará con Word.")
+        for invitado_data in invitados_data:
+            yield generate_full_dossier(invitado_data, context_general, output_dir, with_appendix)
+        return
+
+    done = 0
+    fallbacks = 0
+    started = time.perf_counter()
+    try:
+        for invitado_data in invitados_data:
+            invitado_nombre = invitado_data.get('nombre_completo', 'UNKNOWN')
+            try:
+                letter = engine.render_letter(invitado_data)
+            except (FieldOverflow, FilteredField) as e:
+                logger.info(f"↩️ {invitado_nombre}: {e}. Se generará con Word.")
+                fallbacks += 1
+                result = generate_full_dossier(invitado_data, context_general, output_dir, with_appendix)
+            except Exception as e:
+                # La conversión de su variante de la base falló (o excedió el tiempo límite)
+                logger.error(f"❌ {invitado_nombre}: no se pudo estampar ({e}). Se generará con Word.")
+                fallbacks += 1
+                result = generate_full_dossier(invitado_data, context_general, output_dir, with_appendix)
+            else:
+                try:
+                    saved = _merge_and_save_dossier(io.BytesIO(letter), invitado_data, context_general, output_dir,
+                                                    with_appendix)
+                    result = {"success": True, **saved}
+                except Exception as e:
+                    logger.error(f"❌ ERROR GENERANDO DOSSIER PARA: {invitado_nombre}: {e}")
+                    result = {"success": False, "error": str(e)}
+            done += 1
+            yield result
+    finally:
+        elapsed = time.perf_counter() - started
+        logger.info(f"🖨️ Estampado: {done} invitado(s) en {elapsed:.2f}s, "
+                    f"{engine.conversions} conversión(es) de la base, {fallbacks} con Word")
@@ -0,0 +1,251 @@
+"""
+Pipeline por Etapas
+Ejecuta las fases de la generación de cada dossier (render de la plantilla,
+conversión a PDF, unión con el anexo y escritura) en hilos separados unidos
+por colas acotadas: mientras el invitado N se convierte, el N+1 ya se está
+renderizando y el N-1 se une y se guarda. Las colas acotadas frenan a las
+etapas rápidas (contrapresión) para no acumular documentos en memoria.
+
+Cada etapa reporta su rendimiento, su tiempo ocupado, esperando entrada o
+bloqueada por la siguiente, y la profundidad de su cola de entrada.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Capacidad de cada cola entre etapas (0 desactiva el pipeline: los invitados
+# se procesan uno tras otro)
+PIPELINE_QUEUE_SIZE = int(os.environ.get('JPI_PIPELINE_QUEUE_SIZE', 2))
+
+# Intervalo con el que los hilos bloqueados revisan si el pipeline se detuvo
+_POLL_SECONDS = 0.1
+
+_DONE = object()
+
+_stats_lock = threading.Lock()
+_last_run = {}
+
+
+class PipelineStopped(Exception):
+    """El consumidor dejó de leer resultados (p. ej., un trabajo cancelado)."""
+
+
+class PipelineItem:
+    """Un elemento en tránsito: la entrada original, el valor actual y el error, si lo hubo."""
+
+    def __init__(self, index, item):
+        self.index = index
+        self.item = item
+        self.value = item
+        self.error = None
+        self.started = None
+        self.seconds = 0.0
+
+
+class Stage:
+    """
+    Una etapa del pipeline: `func(valor)` devuelve el valor para la etapa
+    siguiente. Con `workers > 1` varios hilos toman de la misma cola (p. ej.,
+    la conversión con un pool de varias instancias de Word).
+    """
+
+    def __init__(self, name, func, workers=1):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.processed = 0
+        self.failed = 0
+        self.busy = 0.0
+        self.starved = 0.0  # Esperando entrada
+        self.blocked = 0.0  # Esperando lugar en la cola siguiente
+        self.depth_max = 0
+        self.depth_total = 0
+        self.depth_samples = 0
+
+    def _count(self, **amounts):
+        with self._lock:
+            for key, value in amounts.items():
+                setattr(self, key, getattr(self, key) + value)
+
+    def _sample_depth(self, depth):
+        with self._lock:
+            self.depth_max = max(self.depth_max, depth)
+            self.depth_total += depth
+            self.depth_samples += 1
+
+    def to_dict(self, wall_seconds, capacity):
+        with self._lock:
+            return {
+                'hilos': self.workers,
+                'procesados': self.processed,
+                'fallidos': self.failed,
+                'por_segundo': round(self.processed / wall_seconds, 2) if wall_seconds else 0.0,
+                'segundos_ocupado': round(self.busy, 3),
+                'segundos_esperando': round(self.starved, 3),
+                'segundos_bloqueado': round(self.blocked, 3),
+                'utilizacion': round(self.busy / (wall_seconds * self.workers), 3) if wall_seconds else 0.0,
+                'cola_capacidad': capacity,
+                'cola_max': self.depth_max,
+                'cola_media': round(self.depth_total / self.depth_samples, 2) if self.depth_samples else 0.0,
+            }
+
+
+class Pipeline:
+    """
+    Encadena etapas con colas acotadas de `queue_size` elementos.
+
+    Un elemento que falla en una etapa atraviesa las siguientes sin
+    procesarse, con su error. Los resultados se entregan en el orden de
+    entrada aunque una etapa tenga varios hilos.
+    """
+
+    def __init__(self, stages, queue_size=None):
+        self.stages = stages
+        self.queue_size = max(1, queue_size or PIPELINE_QUEUE_SIZE or 1)
+        self._stop = threading.Event()
+        self._started = None
+
+    def run(self, items):
+        """
+        Procesa `items` a través de todas las etapas.
+
+        Yields:
+            PipelineItem: con `value` (resultado de la última etapa) o `error`,
+                en el orden de `items`
+        """
+        self._stop.clear()
+        self._started = time.perf_counter()
+        for stage in self.stages:
+            stage._reset()
+
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        output = queue.Queue(maxsize=self.queue_size)
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0]), name='pipeline-entrada', daemon=True)]
+        for position, stage in enumerate(self.stages):
+            target = queues[position + 1] if position + 1 < len(self.stages) else output
+            next_workers = self.stages[position + 1].workers if position + 1 < len(self.stages) else 1
+            remaining = [stage.workers]
+            for worker in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work,
+                    args=(stage, queues[position], target, next_workers, remaining),
+                    name=f"pipeline-{stage.name}-{worker}",
+                    daemon=True,
+                ))
+        for thread in threads:
+            thread.start()
+
+        pending = {}
+        next_index = 0
+        try:
+            while True:
+                pipeline_item = self._get(output)
+                if pipeline_item is _DONE:
+                    break
+                pending[pipeline_item.index] = pipeline_item
+                # Reordena: una etapa con varios hilos puede terminar fuera de orden
+                while next_index in pending:
+                    yield pending.pop(next_index)
+                    next_index += 1
+        finally:
+            # Si el consumidor deja de leer, los hilos terminan su elemento actual y salen
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self._publish()
+
+    def stats(self):
+        """{etapa: {hilos, procesados, por_segundo, utilizacion, cola_capacidad, cola_max, cola_media, ...}}"""
+        wall = time.perf_counter() - self._started if self._started else 0.0
+        return {stage.name: stage.to_dict(wall, self.queue_size) for stage in self.stages}
+
+    def _feed(self, items, target):
+        try:
+            for index, item in enumerate(items):
+                self._put(target, PipelineItem(index, item))
+            for _ in range(self.stages[0].workers):
+                self._put(target, _DONE)
+        except PipelineStopped:
+            pass
+
+    def _work(self, stage, source, target, next_workers, remaining):
+        try:
+            while True:
+                waited = time.perf_counter()
+                pipeline_item = self._get(source)
+                stage._count(starved=time.perf_counter() - waited)
+                if pipeline_item is _DONE:
+                    break
+                # Profundidad al tomar el elemento, incluido este (== capacidad: cola llena)
+                stage._sample_depth(source.qsize() + 1)
+                if pipeline_item.error is None:
+                    self._process(stage, pipeline_item)
+                waited = time.perf_counter()
+                self._put(target, pipeline_item)
+                stage._count(blocked=time.perf_counter() - waited)
+
+            # El último hilo de la etapa avisa a la siguiente
+            with stage._lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                for _ in range(next_workers):
+                    self._put(target, _DONE)
+        except PipelineStopped:
+            pass
+
+    def _process(self, stage, pipeline_item):
+        started = time.perf_counter()
+        if pipeline_item.started is None:
+            pipeline_item.started = started
+        try:
+            pipeline_item.value = stage.func(pipeline_item.value)
+            stage._count(processed=1)
+        except Exception as e:
+            pipeline_item.error = e
+            stage._count(processed=1, failed=1)
+        finished = time.perf_counter()
+        stage._count(busy=finished - started)
+        pipeline_item.seconds = finished - pipeline_item.started
+
+    def _put(self, target, pipeline_item):
+        while True:
+            try:
+                target.put(pipeline_item, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                if self._stop.is_set():
+                    raise PipelineStopped()
+
+    def _get(self, source):
+        while True:
+            try:
+                return source.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if self._stop.is_set():
+                    raise PipelineStopped()
+
+    def _publish(self):
+        stats = self.stats()
+        with _stats_lock:
+            _last_run.clear()
+            _last_run.update(stats)
+        for name, stage in stats.items():
+            logger.info(f"🏭 Etapa '{name}': {stage['procesados']} en {stage['por_segundo']}/s, "
+                        f"utilización {stage['utilizacion'] * 100:.0f}%, cola máx. {stage['cola_max']} "
+                        f"(media {stage['cola_media']})")
+
+
+def last_run_stats():
+    """Estadísticas por etapa del último pipeline ejecutado en este proceso."""
+    with _stats_lock:
+        return dict(_last_run)
@@ -0,0 +1,101 @@
+"""
+Tiraje de Impresión
+Une las cartas de todos los invitados en un solo PDF listo para imprimir, con
+un marcador por invitado. Cada carta va seguida del anexo (convocatoria +
+cronograma), pero las páginas del anexo comparten sus objetos (contenido,
+fuentes, imágenes), así que el anexo se escribe en el archivo una sola vez.
+"""
+
+import io
+import time
+import logging
+from pathlib import Path
+
+from pypdf import PdfReader, PdfWriter
+
+import metrics
+from document_generator import _get_appendix
+from pdf_optimizer import PDF_OPTIMIZATION, optimize_pdf
+
+logger = logging.getLogger(__name__)
+
+
+def print_run_filename(context_general):
+    return f"{context_general['anio']}.{context_general['periodo']}-FPiT-TIRAJE-IMPRESION.pdf"
+
+
+class PrintRun:
+    """
+    Acumula las cartas (PDF en memoria) de un lote y escribe el tiraje en el
+    orden de `invitados_data`, sin importar el orden en que se agregaron.
+    """
+
+    def __init__(self, invitados_data, context_general):
+        self.invitados_data = invitados_data
+        self.context_general = context_general
+        self._letters = {}
+
+    def __len__(self):
+        return len(self._letters)
+
+    def add(self, invitado_data, letter_bytes):
+        self._letters[id(invitado_data)] = letter_bytes
+
+    def write(self, output_dir):
+        """
+        Escribe el tiraje en `output_dir`.
+
+        Returns:
+            dict: {"path": str, "bytes": int, "paginas": int, "invitados": int, "segundos": float}
+        """
+        started = time.perf_counter()
+        appendix = _get_appendix()
+
+        with metrics.stage('merge') as stage:
+            writer = PdfWriter()
+            count = 0
+            for invitado_data in self.invitados_data:
+                letter = self._letters.get(id(invitado_data))
+                if letter is None:
+                    continue
+                first_page = len(writer.pages)
+                for page in PdfReader(io.BytesIO(letter)).pages:
+                    writer.add_page(page)
+                # Las páginas del anexo se agregan de nuevo, pero sus objetos ya están en el archivo
+                appendix.append_to(writer, outline=False)
+                writer.add_outline_item(invitado_data.get('nombre_completo') or f"Invitado {invitado_data.get('id')}",
+                                        first_page)
+                count += 1
+            # Las cartas traen cada una sus propias copias de fuentes e imágenes (logos)
+            writer.compress_identical_objects()
+            writer.page_mode = '/UseOutlines'
+            pages = len(writer.pages)
+            buffer = io.BytesIO()
+            writer.write(buffer)
+            writer.close()
+            stage['bytes'] = buffer.tell()
+
+        data = buffer.getvalue()
+        if PDF_OPTIMIZATION:
+            with metrics.stage('optimize') as stage:
+                stage['bytes_before'] = len(data)
+                data = optimize_pdf(data, PDF_OPTIMIZATION, full=False)
+                stage['bytes'] = len(data)
+
+        final_dir = Path(output_dir)
+        final_dir.mkdir(parents=True, exist_ok=True)
+        final_path = final_dir / print_run_filename(self.context_general)
+        with metrics.stage('write') as stage:
+            final_path.write_bytes(data)
+            stage['bytes'] = len(data)
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"🖨️ Tiraje de impresión: {count} invitado(s), {pages} páginas, "
+                    f"{len(data) / 1024 / 1024:.1f} MB en {elapsed:.2f}s → {final_path}")
+        return {
+            'path': str(final_path),
+            'bytes': len(data),
+            'paginas': pages,
+            'invitados': count,
+            'segundos': round(elapsed, 2),
+        }
@@ -0,0 +1,1360 @@
+import pandas as pd
+import io
+import os
+import json
+import base64
+import binascii
+import sys
+from pathlib import Path
+import logging
+from flask import Flask, Response, jsonify, request, send_file
+from flask_cors import CORS
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_, case, false, func, literal_column, not_, or_
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.schema import CreateIndex
+from werkzeug.utils import secure_filename
+from datetime import datetime
+from document_generator import (
+    generate_full_dossier,
+    generate_preview_image,
+    pipeline_stats,
+    preview_etag,
+    save_shared_appendix
+)
+from batch_generation import ENGINES, generate_dossiers_zip
+from batch_journal import BatchJournal
+from asset_cache import cache_stats, invalidate_assets, preview_cache
+from http_cache import data_version, versioned
+from guest_search import SearchUnavailable, ensure_search_index, search as search_guests
+import generation_jobs
+import metrics
+import sqlite_storage
+from generation_jobs import GenerationJob, SALIDAS, SALIDA_CARTAS, SALIDA_DOSSIERES, SALIDA_IMPRESION
+
+import shutil
+
+# --- CONFIGURACIÓN DE RUTAS Y BASE DE DATOS CON LOGGING ---
+# Directorio de assets de solo lectura (los que vienen con la aplicación)
+READ_ONLY_ASSETS_DIR = Path(__file__).parent / 'assets'
+# Recibimos la ruta segura para datos desde Electron.
+# Si no se pasa (modo dev), usamos el directorio del script actual.
+if len(sys.argv) > 1:
+    USER_DATA_PATH = Path(sys.argv[1])
+else:
+    USER_DATA_PATH = Path(os.path.abspath(os.path.dirname(__file__)))
+
+# Configuramos el archivo de log en esa misma carpeta segura
+LOG_FILE_PATH = USER_DATA_PATH / 'debug.log'
+logging.basicConfig(
+    filename=str(LOG_FILE_PATH),
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+logging.info("==================================")
+logging.info("INICIANDO SERVIDOR FLASK...")
+logging.info(f"Ruta de datos de usuario recibida: {USER_DATA_PATH}")
+
+# Directorio de assets (plantillas, etc.) en la carpeta de datos del usuario
+ASSETS_DIR = USER_DATA_PATH / 'assets'
+ASSETS_DIR.mkdir(exist_ok=True)
+logging.info(f"Directorio de assets para escritura: {ASSETS_DIR}")
+DB_PATH = USER_DATA_PATH / 'db.sqlite'
+logging.info(f"Ruta completa de la base de datos: {DB_PATH}")
+
+app = Flask(__name__)
+app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + str(DB_PATH)
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_storage.engine_options()
+
+db = SQLAlchemy(app)
+# WAL, synchronous y demás PRAGMAs en cada conexión (ver sqlite_storage.py)
+with app.app_context():
+    sqlite_storage.configure_engine(db.engine)
+# Habilitar CORS para permitir peticiones desde el frontend servido por file:// o distinto origen
+CORS(app)
+
+def ensure_assets_exist():
+    """Asegura que los assets por defecto existan en la carpeta de datos del usuario,
+    copiándolos desde la carpeta de solo lectura si es necesario."""
+    default_files = ['plantilla_base.docx', 'convocatoria.pdf', 'cronograma.pdf']
+    for filename in default_files:
+        writable_path = ASSETS_DIR / filename
+        if not writable_path.exists():
+            read_only_path = READ_ONLY_ASSETS_DIR / filename
+            if read_only_path.exists():
+                logging.info(f"Copiando asset por defecto '{filename}' a la carpeta de datos del usuario.")
+                shutil.copy(read_only_path, writable_path)
+            else:
+                logging.warning(f"El asset por defecto '{filename}' no se encontró en la carpeta de solo lectura.")
+
+
+
+def format_fecha_carta(fecha_str):
+    """Convierte fecha YYYY-MM-DD a formato 'DD de mes de YYYY' en español."""
+    try:
+        fecha = datetime.strptime(fecha_str, '%Y-%m-%d')
+        meses = ['', 'enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
+                 'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
+        return f"{fecha.day} de {meses[fecha.month]} de {fecha.year}"
+    except:
+        return fecha_str
+
+
+class Invitado(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    nombre_completo = db.Column(db.String(200), nullable=False)
+    caracter_invitacion = db.Column(db.String(300), nullable=False)  # Motivo de la invitación
+    nota = db.Column(db.Text)  # Notas opcionales del usuario
+    
+    # Puesto e institución (separados para mejor estructura en documentos)
+    puesto_completo = db.Column(db.String(300))  # Ej: "Jefe del Departamento de Investigación"
+    institucion = db.Column(db.String(300))  # Ej: "Instituto Tecnológico de Morelia"
+    
+    # Abreviación de la institución (para nomenclatura de archivos)
+    abreviacion_org = db.Column(db.String(50))  # Ej: "ITM", "UNAM", "IPN"
+    
+    # Campo para marcar invitados especiales (VIP, autoridades, etc.)
+    es_invitado_especial = db.Column(db.Boolean, default=False)
+ 
+    es_asesor_t1 = db.Column(db.Boolean, default=False)
+    es_asesor_t2 = db.Column(db.Boolean, default=False)
+
+    # Elegibilidad como jurado: se deriva de los asesores (ver las propiedades
+    # híbridas de abajo). Las columnas guardan una copia para quien lea la base
+    # de datos directamente; se mantienen al escribir y con actualizar_jurados().
+    _puede_ser_jurado_protocolo = db.Column('puede_ser_jurado_protocolo', db.Boolean, default=False)
+    _puede_ser_jurado_informe = db.Column('puede_ser_jurado_informe', db.Boolean, default=False)
+
+    @hybrid_property
+    def puede_ser_jurado_protocolo(self):
+        """Un asesor de Taller 1 no puede ser jurado de su protocolo."""
+        return not self.es_asesor_t1
+
+    @puede_ser_jurado_protocolo.expression
+    def puede_ser_jurado_protocolo(cls):
+        # Igualdad sobre una expresión (no `IS NOT 1`) para que el índice parcial
+        # se pueda buscar; un valor nulo cuenta como falso
+        return func.coalesce(cls.es_asesor_t1, false()) == false()
+
+    @hybrid_property
+    def puede_ser_jurado_informe(self):
+        """Un asesor de Taller 2 no puede ser jurado de su informe."""
+        return not self.es_asesor_t2
+
+    @puede_ser_jurado_informe.expression
+    def puede_ser_jurado_informe(cls):
+        return func.coalesce(cls.es_asesor_t2, false()) == false()
+
+    def compute_jurado_flags(self):
+        """Determina si el invitado puede ser jurado de protocolo/informe
+        según la tabla de verdad provista:
+
+        A = es_asesor_t1, B = es_asesor_t2
+
+        A0B0 -> protocolo=True, informe=True
+        A1B0 -> protocolo=False, informe=True
+        A0B1 -> protocolo=True, informe=False
+        A1B1 -> protocolo=False, informe=False
+
+        Es decir, protocolo = no A e informe = no B (las propiedades híbridas).
+        Solo actualiza las columnas guardadas; se llama antes de guardar.
+        """
+        self._puede_ser_jurado_protocolo = self.puede_ser_jurado_protocolo
+        self._puede_ser_jurado_informe = self.puede_ser_jurado_informe
+    
+    def to_dict(self):
+        """Función para convertir el objeto Invitado a un diccionario (JSON)"""
+        data = {
+            'id': self.id,
+            'nombre_completo': self.nombre_completo,
+            'caracter_invitacion': self.caracter_invitacion,
+            'nota': self.nota,
+            'puesto_completo': self.puesto_completo,
+            'institucion': self.institucion,
+            'abreviacion_org': self.abreviacion_org,
+            'es_invitado_especial': self.es_invitado_especial,
+            'es_asesor_t1': self.es_asesor_t1,
+            'es_asesor_t2': self.es_asesor_t2,
+            # Calculadas a partir de los asesores, sin modificar el objeto
+            'puede_ser_jurado_protocolo': self.puede_ser_jurado_protocolo,
+            'puede_ser_jurado_informe': self.puede_ser_jurado_informe,
+        }
+        return data
+
+
+# Columnas de la lista de invitados: se consultan como tuplas, sin cargar
+# objetos del ORM. La nota (texto libre) solo se incluye si se pide.
+COLUMNAS_LISTA = (
+    Invitado.id,
+    Invitado.nombre_completo,
+    Invitado.caracter_invitacion,
+    Invitado.puesto_completo,
+    Invitado.institucion,
+    Invitado.abreviacion_org,
+    Invitado.es_invitado_especial,
+    Invitado.es_asesor_t1,
+    Invitado.es_asesor_t2,
+    Invitado.puede_ser_jurado_protocolo.label('puede_ser_jurado_protocolo'),
+    Invitado.puede_ser_jurado_informe.label('puede_ser_jurado_informe'),
+)
+
+
+# --- Índices de Invitado ---
+# Expresiones normalizadas para ordenar y buscar por nombre e institución sin
+# distinguir mayúsculas. Las consultas deben usar exactamente estas expresiones
+# para que SQLite aproveche los índices; la cadena vacía va como literal (un
+# parámetro `?` no coincidiría con la expresión del índice).
+NOMBRE_NORMALIZADO = func.lower(Invitado.nombre_completo)
+INSTITUCION_NORMALIZADA = func.lower(func.coalesce(Invitado.institucion, literal_column("''")))
+
+# Condición de cada rol (los mismos nombres que los filtros del frontend). Cada
+# una tiene un índice parcial que solo contiene a los invitados con ese rol y
+# cubre las rutas por rol; los de jurado indexan el asesor del que derivan.
+ROLES = {
+    'asesor_t1': Invitado.es_asesor_t1.is_(True),
+    'asesor_t2': Invitado.es_asesor_t2.is_(True),
+    'jurado_protocolo': Invitado.puede_ser_jurado_protocolo,
+    'jurado_informe': Invitado.puede_ser_jurado_informe,
+    'especial': Invitado.es_invitado_especial.is_(True),
+}
+db.Index('ix_invitado_es_asesor_t1', Invitado.es_asesor_t1, sqlite_where=ROLES['asesor_t1'])
+db.Index('ix_invitado_es_asesor_t2', Invitado.es_asesor_t2, sqlite_where=ROLES['asesor_t2'])
+db.Index('ix_invitado_jurado_protocolo', func.coalesce(Invitado.es_asesor_t1, false()),
+         sqlite_where=ROLES['jurado_protocolo'])
+db.Index('ix_invitado_jurado_informe', func.coalesce(Invitado.es_asesor_t2, false()),
+         sqlite_where=ROLES['jurado_informe'])
+db.Index('ix_invitado_es_invitado_especial', Invitado.es_invitado_especial, sqlite_where=ROLES['especial'])
+db.Index('ix_invitado_nombre_normalizado', NOMBRE_NORMALIZADO, Invitado.id)
+db.Index('ix_invitado_institucion_normalizada', INSTITUCION_NORMALIZADA, Invitado.id)
+
+# Índices que ya no corresponden al modelo (las banderas de jurado guardadas
+# dejaron de consultarse)
+INDICES_OBSOLETOS = ('ix_invitado_puede_ser_jurado_protocolo', 'ix_invitado_puede_ser_jurado_informe')
+
+
+def asegurar_indices():
+    """
+    Crea los índices de las tablas que falten, incluido el de búsqueda de
+    texto completo (guest_search.py). db.create_all() solo los crea junto con
+    una tabla nueva, así que una base de datos existente los recibe aquí; es
+    idempotente (CREATE INDEX IF NOT EXISTS).
+    """
+    with db.engine.begin() as conexion:
+        for nombre in INDICES_OBSOLETOS:
+            conexion.exec_driver_sql(f"DROP INDEX IF EXISTS {nombre}")
+        for tabla in db.metadata.sorted_tables:
+            for indice in tabla.indexes:
+                conexion.execute(CreateIndex(indice, if_not_exists=True))
+        ensure_search_index(conexion)
+        conexion.exec_driver_sql("ANALYZE")
+    logging.info("Índices de la base de datos verificados.")
+
+
+def actualizar_jurados():
+    """
+    Corrige, en un solo UPDATE, las banderas de jurado guardadas que no
+    coincidan con las que se derivan de los asesores (filas de versiones
+    anteriores o editadas fuera de la aplicación).
+    """
+    tabla = Invitado.__table__
+    resultado = db.session.execute(
+        tabla.update()
+        .where(or_(
+            tabla.c.puede_ser_jurado_protocolo.isnot(Invitado.puede_ser_jurado_protocolo),
+            tabla.c.puede_ser_jurado_informe.isnot(Invitado.puede_ser_jurado_informe),
+        ))
+        .values(
+            puede_ser_jurado_protocolo=Invitado.puede_ser_jurado_protocolo,
+            puede_ser_jurado_informe=Invitado.puede_ser_jurado_informe,
+        )
+    )
+    db.session.commit()
+    if resultado.rowcount:
+        logging.info(f"Banderas de jurado corregidas en {resultado.rowcount} invitado(s).")
+
+
+class TrabajoGeneracion(db.Model):
+    """Último estado conocido de un trabajo de generación en segundo plano (ver generation_jobs.py)."""
+    id = db.Column(db.String(32), primary_key=True)
+    estado = db.Column(db.String(20), nullable=False)
+    datos = db.Column(db.Text, nullable=False)  # JSON con el estado completo (GenerationJob.to_dict)
+    actualizado = db.Column(db.DateTime, default=datetime.now)
+
+    def to_dict(self):
+        return json.loads(self.datos)
+
+
+def guardar_trabajo(estado):
+    """Persiste el estado de un trabajo; se llama desde el hilo del trabajo."""
+    with app.app_context():
+        trabajo = TrabajoGeneracion.query.get(estado['job_id']) or TrabajoGeneracion(id=estado['job_id'])
+        trabajo.estado = estado['estado']
+        trabajo.datos = json.dumps(estado, ensure_ascii=False)
+        trabajo.actualizado = datetime.now()
+        db.session.add(trabajo)
+        db.session.commit()
+
+
+def marcar_trabajos_interrumpidos():
+    """Los trabajos que quedaron en curso al cerrarse el servidor ya no avanzarán."""
+    trabajos = TrabajoGeneracion.query.filter(
+        TrabajoGeneracion.estado.in_(generation_jobs.ACTIVE_STATES)
+    ).all()
+    for trabajo in trabajos:
+        datos = trabajo.to_dict()
+        datos['estado'] = generation_jobs.INTERRUMPIDO
+        datos['invitado_actual'] = None
+        datos['eta_segundos'] = None
+        datos['message'] = (f"La generación se interrumpió al cerrarse la aplicación: "
+                            f"se generaron {datos['generated_count']} de {datos['total']} invitaciones")
+        if datos.get('diario'):
+            datos['message'] += "; se puede reanudar desde donde se quedó"
+
+        trabajo.estado = generation_jobs.INTERRUMPIDO
+        trabajo.datos = json.dumps(datos, ensure_ascii=False)
+    if trabajos:
+        db.session.commit()
+        logging.warning(f"{len(trabajos)} trabajo(s) de generación marcados como interrumpidos.")
+
+
+### Rutas del CRUD ###
+
+# Health check - verifica que el backend esté funcionando
+@app.route('/api/health')
+def health_check():
+    return jsonify({
+        'status': 'ok',
+        'message': 'Backend Flask está funcionando correctamente',
+        'database': 'connected'
+    })
+
+# --- Consulta de invitados: filtros, orden y paginación resueltos en SQL ---
+# Banderas que se pueden filtrar directamente (?es_asesor_t1=true); los roles
+# están junto al modelo (ROLES)
+FILTROS_BOOLEANOS = {
+    'es_asesor_t1': ROLES['asesor_t1'],
+    'es_asesor_t2': ROLES['asesor_t2'],
+    'puede_ser_jurado_protocolo': ROLES['jurado_protocolo'],
+    'puede_ser_jurado_informe': ROLES['jurado_informe'],
+    'es_invitado_especial': ROLES['especial'],
+}
+# Órdenes disponibles (?sort=nombre_completo, ?sort=-institucion); el id desempata
+ORDENES = {
+    'id': Invitado.id,
+    'nombre_completo': NOMBRE_NORMALIZADO,
+    'institucion': INSTITUCION_NORMALIZADA,
+}
+PARAMETROS_CONSULTA = ('limit', 'cursor', 'sort', 'rol', *FILTROS_BOOLEANOS)
+LIMITE_PAGINA = 50
+LIMITE_MAXIMO = 500
+
+
+class ConsultaInvalida(ValueError):
+    """Un parámetro de la consulta de invitados no es válido (responde 400)."""
+
+
+def _leer_booleano(nombre, valor):
+    valor = valor.strip().lower()
+    if valor in ('1', 'true', 'si', 'sí'):
+        return True
+    if valor in ('0', 'false', 'no'):
+        return False
+    raise ConsultaInvalida(f"El filtro '{nombre}' debe ser true o false")
+
+
+def _codificar_cursor(valor, invitado_id):
+    datos = json.dumps([valor, invitado_id], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(datos).decode('ascii')
+
+
+def _decodificar_cursor(cursor):
+    try:
+        valor, invitado_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return valor, int(invitado_id)
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise ConsultaInvalida("El cursor no es válido")
+
+
+def _consultar_invitados(args, rol=None):
+    """
+    Construye la consulta de invitados a partir de los parámetros de la petición.
+
+    Args:
+        args: Parámetros de la URL (`rol`, banderas, `sort`, `limit`, `cursor`, `nota`)
+        rol (str): Rol fijo (las rutas por rol, como /api/invitados/asesores_t1)
+
+    Returns:
+        tuple: (consulta de tuplas con COLUMNAS_LISTA y el valor de orden
+            (`orden`), expresión de orden, descendente, filtros aplicados)
+    """
+    filtros = []
+    rol = rol or args.get('rol')
+    if rol:
+        if rol not in ROLES:
+            raise ConsultaInvalida(f"Rol no válido: {rol}. Opciones: {', '.join(ROLES)}")
+        filtros.append(ROLES[rol])
+    for nombre, condicion in FILTROS_BOOLEANOS.items():
+        if nombre in args:
+            # Un valor nulo cuenta como falso
+            filtros.append(condicion if _leer_booleano(nombre, args[nombre]) else not_(condicion))
+
+    sort = args.get('sort', 'id')
+    descendente = sort.startswith('-')
+    if sort.lstrip('-') not in ORDENES:
+        raise ConsultaInvalida(f"Orden no válido: {sort}. Opciones: {', '.join(ORDENES)}")
+    orden = ORDENES[sort.lstrip('-')]
+
+    columnas = list(COLUMNAS_LISTA)
+    if 'nota' in args and _leer_booleano('nota', args['nota']):
+        columnas.insert(3, Invitado.nota)
+    consulta = db.session.query(*columnas, orden.label('orden')).filter(*filtros)
+    # El id desempata; si ya es el orden, no se repite
+    criterios = [orden] if orden is Invitado.id else [orden, Invitado.id]
+    consulta = consulta.order_by(*(c.desc() if descendente else c.asc() for c in criterios))
+    return consulta, orden, descendente, filtros
+
+
+def _fila_a_dict(fila):
+    """Una fila de _consultar_invitados como el JSON de Invitado.to_dict()."""
+    datos = dict(fila._mapping)
+    del datos['orden']
+    return datos
+
+
+def _leer_limite(args):
+    try:
+        limite = int(args.get('limit', LIMITE_PAGINA))
+    except ValueError:
+        raise ConsultaInvalida("El límite debe ser un entero")
+    if not 1 <= limite <= LIMITE_MAXIMO:
+        raise ConsultaInvalida(f"El límite debe estar entre 1 y {LIMITE_MAXIMO}")
+    return limite
+
+
+def _pagina_invitados(args, rol=None):
+    """
+    Una página de invitados con paginación por cursor (keyset): la página
+    siguiente empieza después del último invitado de esta, sin OFFSET.
+
+    Returns:
+        dict: {invitados, total, limit, siguiente}; `siguiente` es el cursor de
+            la página siguiente, o None si es la última
+    """
+    consulta, orden, descendente, filtros = _consultar_invitados(args, rol)
+    limite = _leer_limite(args)
+
+    total = db.session.query(func.count(Invitado.id)).filter(*filtros).scalar()
+
+    if args.get('cursor'):
+        valor, ultimo_id = _decodificar_cursor(args['cursor'])
+        if orden is Invitado.id:
+            # Rango simple sobre la clave primaria
+            consulta = consulta.filter(Invitado.id < ultimo_id if descendente else Invitado.id > ultimo_id)
+        elif descendente:
+            consulta = consulta.filter(or_(orden < valor, and_(orden == valor, Invitado.id < ultimo_id)))
+        else:
+            consulta = consulta.filter(or_(orden > valor, and_(orden == valor, Invitado.id > ultimo_id)))
+
+    # Una fila de más indica si hay página siguiente
+    filas = consulta.limit(limite + 1).all()
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = _codificar_cursor(filas[-1].orden, filas[-1].id)
+    return {
+        'invitados': [_fila_a_dict(fila) for fila in filas],
+        'total': total,
+        'limit': limite,
+        'siguiente': siguiente,
+    }
+
+
+def _listar_invitados(rol=None):
+    """
+    Respuesta común de la lista de invitados y de las rutas por rol. Sin
+    parámetros se mantiene la respuesta original (un arreglo con todos); con
+    cualquiera de PARAMETROS_CONSULTA se responde una página. En ambos casos la
+    nota se incluye solo con `?nota=true`.
+    """
+    try:
+        if not any(parametro in request.args for parametro in PARAMETROS_CONSULTA):
+            consulta = _consultar_invitados(request.args, rol)[0]
+            return jsonify([_fila_a_dict(fila) for fila in consulta.all()])
+        return jsonify(_pagina_invitados(request.args, rol))
+    except ConsultaInvalida as e:
+        return jsonify({'error': str(e)}), 400
+
+
+# Obtener todos los invitados (o una página, con filtros y orden)
+@app.route('/api/invitados')
+@versioned
+def get_invitados():
+    return _listar_invitados()
+
+# Buscar invitados por nombre, puesto, institución, abreviación o nota
+@app.route('/api/invitados/buscar')
+@versioned
+def buscar_invitados():
+    """
+    Búsqueda de texto completo (FTS5), sin distinguir acentos ni mayúsculas y
+    por prefijo de cada palabra. Devuelve una página de coincidencias de la
+    más a la menos relevante (por id si son demasiadas, ver
+    guest_search.RANK_MAX_MATCHES), cada una con `nombre_resaltado` y `fragmento`.
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': "El parámetro 'q' es requerido"}), 400
+    try:
+        limite = _leer_limite(request.args)
+        try:
+            desde = int(request.args.get('offset', 0))
+        except ValueError:
+            raise ConsultaInvalida("El desplazamiento debe ser un entero")
+        if desde < 0:
+            raise ConsultaInvalida("El desplazamiento no puede ser negativo")
+        columnas = list(COLUMNAS_LISTA)
+        if 'nota' in request.args and _leer_booleano('nota', request.args['nota']):
+            columnas.insert(3, Invitado.nota)
+    except ConsultaInvalida as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        total, por_relevancia, coincidencias = search_guests(db.session.connection(), q, limite, desde)
+    except SearchUnavailable as e:
+        return jsonify({'error': str(e)}), 503
+
+    # Columnas de la página, en el orden de relevancia
+    filas = {fila.id: fila for fila in db.session.query(*columnas)
+             .filter(Invitado.id.in_([invitado_id for invitado_id, _, _ in coincidencias]))}
+    invitados = [
+        {**filas[invitado_id]._asdict(), 'nombre_resaltado': nombre, 'fragmento': fragmento}
+        for invitado_id, nombre, fragmento in coincidencias if invitado_id in filas
+    ]
+    return jsonify({
+        'invitados': invitados,
+        'total': total,
+        'limit': limite,
+        'offset': desde,
+        'siguiente': desde + limite if desde + limite < total else None,
+        'por_relevancia': por_relevancia,
+    })
+
+
+# --- Estadísticas de invitados: todos los conteos en una sola consulta ---
+CONTEOS_ESTADISTICAS = {
+    'total': func.count(Invitado.id),
+    'asesores_t1': func.sum(case((ROLES['asesor_t1'], 1), else_=0)),
+    'asesores_t2': func.sum(case((ROLES['asesor_t2'], 1), else_=0)),
+    'jurados_protocolo': func.sum(case((ROLES['jurado_protocolo'], 1), else_=0)),
+    'jurados_informe': func.sum(case((ROLES['jurado_informe'], 1), else_=0)),
+    'jurados_ambos': func.sum(case((and_(ROLES['jurado_protocolo'], ROLES['jurado_informe']), 1), else_=0)),
+}
+
+# Últimas estadísticas calculadas: {'actual': (versión de los datos, estadísticas)}
+_estadisticas_cache = {}
+
+
+def _sumar_conteos(destino, fila):
+    for nombre in CONTEOS_ESTADISTICAS:
+        destino[nombre] = destino.get(nombre, 0) + (getattr(fila, nombre) or 0)
+
+
+def _calcular_estadisticas():
+    """
+    Conteos por rol, en total, por institución y por invitado especial. Una
+    sola consulta agrupa por (institución, especial) con SUM(CASE ...); los
+    totales y los dos desgloses se suman aquí sobre esos pocos grupos.
+    """
+    filas = db.session.query(
+        Invitado.institucion,
+        func.coalesce(Invitado.es_invitado_especial, false()).label('especial'),
+        *(expresion.label(nombre) for nombre, expresion in CONTEOS_ESTADISTICAS.items()),
+    ).group_by(Invitado.institucion, 'especial').all()
+
+    totales = dict.fromkeys(CONTEOS_ESTADISTICAS, 0)
+    por_institucion = {}
+    por_especial = {}
+    for fila in filas:
+        _sumar_conteos(totales, fila)
+        _sumar_conteos(por_institucion.setdefault(fila.institucion, {'institucion': fila.institucion}), fila)
+        _sumar_conteos(por_especial.setdefault(bool(fila.especial), {'es_invitado_especial': bool(fila.especial)}), fila)
+
+    return {
+        **totales,
+        'por_institucion': sorted(por_institucion.values(),
+                                  key=lambda grupo: (-grupo['total'], grupo['institucion'] or '')),
+        'por_especial': [por_especial[clave] for clave in (True, False) if clave in por_especial],
+    }
+
+
+@app.route('/api/invitados/estadisticas')
+@versioned
+def get_estadisticas():
+    """Conteos por rol y sus desgloses; se recalculan solo si cambiaron los invitados."""
+    version = data_version.etag()
+    cacheada = _estadisticas_cache.get('actual')
+    if cacheada is None or cacheada[0] != version:
+        cacheada = _estadisticas_cache['actual'] = (version, _calcular_estadisticas())
+    return jsonify(cacheada[1])
+
+
+# Obtener un invitado por ID
+@app.route('/api/invitados/<int:id>')
+@versioned
+def get_invitado(id):
+    invitado = Invitado.query.get_or_404(id)
+    return jsonify(invitado.to_dict())
+
+# Crear un nuevo invitado
+@app.route('/api/invitados', methods=['POST'])
+def create_invitado():
+    from flask import request
+
+    data = request.get_json() or {}
+    nombre = data.get('nombre_completo')
+    caracter = data.get('caracter_invitacion')
+    
+    if not nombre:
+        return jsonify({'error': 'nombre_completo es requerido'}), 400
+    if not caracter:
+        return jsonify({'error': 'caracter_invitacion es requerido'}), 400
+
+    invitado = Invitado(
+        nombre_completo=nombre,
+        caracter_invitacion=caracter,
+        nota=data.get('nota'),
+        puesto_completo=data.get('puesto_completo'),
+        institucion=data.get('institucion'),
+        abreviacion_org=data.get('abreviacion_org'),
+        es_invitado_especial=bool(data.get('es_invitado_especial', False)),
+        es_asesor_t1=bool(data.get('es_asesor_t1', False)),
+        es_asesor_t2=bool(data.get('es_asesor_t2', False)),
+    )
+
+    # Calcular flags de jurado según asesores antes de persistir
+    invitado.compute_jurado_flags()
+
+    db.session.add(invitado)
+    db.session.commit()
+    data_version.bump()
+
+    return jsonify(invitado.to_dict()), 201
+
+
+# Actualizar un invitado existente
+@app.route('/api/invitados/<int:id>', methods=['PUT'])
+def update_invitado(id):
+    from flask import request
+
+    invitado = Invitado.query.get_or_404(id)
+    data = request.get_json() or {}
+
+    # Actualizar campos si están presentes
+    if 'nombre_completo' in data:
+        invitado.nombre_completo = data.get('nombre_completo')
+    if 'caracter_invitacion' in data:
+        invitado.caracter_invitacion = data.get('caracter_invitacion')
+    if 'nota' in data:
+        invitado.nota = data.get('nota')
+    
+    if 'puesto_completo' in data:
+        invitado.puesto_completo = data.get('puesto_completo')
+    if 'institucion' in data:
+        invitado.institucion = data.get('institucion')
+    if 'abreviacion_org' in data:
+        invitado.abreviacion_org = data.get('abreviacion_org')
+    if 'es_invitado_especial' in data:
+        invitado.es_invitado_especial = bool(data.get('es_invitado_especial'))
+
+    if 'es_asesor_t1' in data:
+        invitado.es_asesor_t1 = bool(data.get('es_asesor_t1'))
+    if 'es_asesor_t2' in data:
+        invitado.es_asesor_t2 = bool(data.get('es_asesor_t2'))
+
+    # Recalcular jurado
+    invitado.compute_jurado_flags()
+
+    db.session.commit()
+    data_version.bump()
+    preview_cache.discard_invitado(invitado.id)
+    return jsonify(invitado.to_dict())
+
+
+# Eliminar un invitado
+@app.route('/api/invitados/<int:id>', methods=['DELETE'])
+def delete_invitado(id):
+    invitado = Invitado.query.get_or_404(id)
+    db.session.delete(invitado)
+    db.session.commit()
+    data_version.bump()
+    preview_cache.discard_invitado(id)
+    return jsonify({'result': 'deleted'})
+
+#Obtener asesores de T1
+@app.route('/api/invitados/asesores_t1')
+@versioned
+def get_asesores_t1():
+    return _listar_invitados(rol='asesor_t1')
+
+#Obtener asesores de T2
+@app.route('/api/invitados/asesores_t2')
+@versioned
+def get_asesores_t2():
+    return _listar_invitados(rol='asesor_t2')
+
+#Obtener invitados que pueden ser jurados de protocolo
+@app.route('/api/invitados/jurados_protocolo')
+@versioned
+def get_jurados_protocolo():
+    return _listar_invitados(rol='jurado_protocolo')
+
+#Obtener invitados que pueden ser jurados de informe 
+@app.route('/api/invitados/jurados_informe')
+@versioned
+def get_jurados_informe():
+    return _listar_invitados(rol='jurado_informe')
+
+
+# ========== RUTAS PARA GENERACIÓN DE INVITACIONES ==========
+
+@app.route('/api/upload-files', methods=['POST'])
+def upload_files():
+    """Recibe y guarda los 3 archivos base (plantilla DOCX, convocatoria PDF, cronograma PDF)."""
+    try:
+        # Los nombres deben coincidir con los del FormData en el frontend
+        template_file = request.files.get('plantilla_docx')
+        convocatoria_file = request.files.get('convocatoria_pdf')
+        cronograma_file = request.files.get('cronograma_pdf')
+
+        if not template_file or not convocatoria_file or not cronograma_file:
+            return jsonify({
+                'success': False,
+                'error': 'Faltan archivos. Se requieren los 3 archivos (plantilla DOCX, convocatoria PDF, cronograma PDF).'
+            }), 400
+
+        # Guardar archivos en el directorio de assets del usuario
+        template_filename = secure_filename('plantilla_base.docx')
+        template_file.save(ASSETS_DIR / template_filename)
+        
+        convocatoria_filename = secure_filename('convocatoria.pdf')
+        convocatoria_file.save(ASSETS_DIR / convocatoria_filename)
+        
+        cronograma_filename = secure_filename('cronograma.pdf')
+        cronograma_file.save(ASSETS_DIR / cronograma_filename)
+
+        # Los anexos y plantillas cacheados corresponden a los archivos anteriores
+        invalidate_assets()
+            
+        return jsonify({
+            'success': True,
+            'message': 'Archivos cargados correctamente',
+            'files': {
+                'plantilla_docx': template_filename,
+                'convocatoria_pdf': convocatoria_filename,
+                'cronograma_pdf': cronograma_filename
+            }
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/cache-stats')
+def get_cache_stats():
+    """Aciertos, fallos y bytes retenidos por las cachés de generación y la caché HTTP, y rondas de mantenimiento de SQLite."""
+    return jsonify({**cache_stats(), 'http': data_version.stats(), 'sqlite': sqlite_storage.maintenance.stats()})
+
+
+@app.route('/api/pipeline-stats')
+def get_pipeline_stats():
+    """Tiempo y bytes acumulados por etapa del pipeline de generación."""
+    return jsonify(pipeline_stats())
+
+
+@app.route('/api/metrics')
+def get_metrics():
+    """
+    Métricas del pipeline (percentiles por etapa, cachés y E/S de los
+    convertidores) en JSON o, con `?format=prometheus` o `Accept: text/plain`,
+    en el formato de texto de Prometheus.
+    """
+    report = pipeline_stats()
+    formato = request.args.get('format')
+    if formato is None:
+        # Prometheus pide `text/plain;version=0.0.4` (con parámetros que Werkzeug no empareja)
+        tipos = {parte.split(';')[0].strip() for parte in request.headers.get('Accept', '').split(',')}
+        texto = tipos & {'text/plain', 'application/openmetrics-text'}
+        formato = 'prometheus' if texto and 'application/json' not in tipos else 'json'
+    if formato == 'prometheus':
+        return Response(metrics.prometheus(report), mimetype='text/plain; version=0.0.4')
+    return jsonify(report)
+
+
+def _leer_datos_generacion(data):
+    """
+    Valida los datos del evento y el motor de una petición de generación.
+
+    Returns:
+        tuple: (context_general, motor, None) o (None, None, respuesta de error)
+    """
+    context_general = {
+        "anio": data.get("anio"),
+        "periodo": data.get("periodo"),
+        "edicion_evento": data.get("edicion_evento"),
+        "fecha_evento": data.get("fecha_evento"),
+        "fecha_carta": format_fecha_carta(data.get("fecha_carta")),  # Formatear fecha
+        "nombre_firmante": "Claudio Ernesto Florián Arenas",
+        "cargo_firmante": "Jefe del Departamento de Ingeniería en Sistemas y Computación"
+    }
+    
+    # Validar que todos los campos estén presentes
+    if not all(context_general.values()):
+        return None, None, (jsonify({
+            'success': False,
+            'error': 'Faltan datos del evento'
+        }), 400)
+
+    # Motor de generación (ver batch_generation.ENGINES)
+    motor = data.get("motor", "word")
+    if motor not in ENGINES:
+        return None, None, (jsonify({'success': False, 'error': f"Motor de generación no válido: {motor}"}), 400)
+    return context_general, motor, None
+
+
+def _generacion_en_curso(running):
+    """Respuesta 409: ya hay un lote o una descarga ZIP en curso."""
+    if isinstance(running, generation_jobs.StreamingRun):
+        # No hay trabajo que seguir en /api/jobs: la descarga termina por su cuenta
+        return jsonify({
+            'success': False,
+            'error': 'Hay una descarga ZIP de invitaciones en curso'
+        }), 409
+    return jsonify({
+        'success': False,
+        'error': 'Ya hay una generación en curso',
+        'job_id': running.id
+    }), 409
+
+
+def _invitados_para_generacion():
+    """Todos los invitados como diccionarios con los campos que usa la plantilla."""
+    invitados_dicts = []
+    for invitado in Invitado.query.all():
+        invitado_dict = invitado.to_dict()
+        # Los campos ya están incluidos en to_dict()
+        invitado_dict['puesto_completo'] = getattr(invitado, 'puesto_completo', '')
+        invitado_dict['institucion'] = getattr(invitado, 'institucion', '')
+        invitado_dict['abreviacion_org'] = getattr(invitado, 'abreviacion_org', '')
+        invitados_dicts.append(invitado_dict)
+    return invitados_dicts
+
+
+@app.route('/api/generate-all-invitations', methods=['POST'])
+def generate_all_invitations():
+    """Genera las invitaciones para TODOS los invitados en la base de datos."""
+    data = request.get_json()
+    context_general, motor, error = _leer_datos_generacion(data)
+    if error:
+        return error
+
+    # Número de procesos de trabajo
+    try:
+        procesos = int(data.get("procesos", 1))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'El número de procesos debe ser un entero'}), 400
+    # Incremental: solo se regeneran los dossieres cuyos datos o archivos base cambiaron
+    incremental = bool(data.get("incremental", False))
+    # Salida: un dossier por invitado o un solo tiraje de impresión con todas las cartas
+    salida = data.get("salida", SALIDA_DOSSIERES)
+    if salida not in SALIDAS:
+        return jsonify({'success': False, 'error': f"Tipo de salida no válido: {salida}"}), 400
+    if incremental and salida == SALIDA_IMPRESION:
+        return jsonify({
+            'success': False,
+            'error': 'La generación incremental solo aplica a los dossieres individuales'
+        }), 400
+
+    # Solo un lote a la vez: comparten las instancias de Word y la carpeta de salida
+    running = generation_jobs.active_job()
+    if running is not None:
+        return _generacion_en_curso(running)
+
+    # Obtener todos los invitados
+    invitados_dicts = _invitados_para_generacion()
+    if not invitados_dicts:
+        return jsonify({
+            'success': False,
+            'error': 'No hay invitados en la base de datos para generar invitaciones'
+        }), 404
+    
+    # Generar carpeta automáticamente en el Desktop
+    anio = data.get("anio")
+    periodo = data.get("periodo")
+    folder_name = f"{anio}.{periodo}-invitaciones"
+    
+    # Obtener ruta del Desktop del usuario
+    desktop_path = Path.home() / "Desktop"
+    output_dir = str(desktop_path / folder_name)
+    
+    # Crear el directorio si no existe
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    logging.info(f"Carpeta de salida creada/verificada: {output_dir}")
+
+    # La generación corre en segundo plano; el progreso se consulta en /api/jobs/<id>
+    job = GenerationJob(invitados_dicts, context_general, output_dir,
+                        motor=motor, procesos=procesos, incremental=incremental,
+                        salida=salida, on_update=guardar_trabajo)
+    started = generation_jobs.start_job(job)
+    if started is not job:
+        return _generacion_en_curso(started)
+
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'total': len(invitados_dicts),
+        'output_folder': output_dir,
+        'message': f"Generación iniciada para {len(invitados_dicts)} invitaciones"
+    }), 202
+
+
+@app.route('/api/generate-all-invitations/zip', methods=['POST'])
+def generate_all_invitations_zip():
+    """
+    Genera las invitaciones de TODOS los invitados y las descarga como un ZIP
+    en flujo: el primer dossier llega en cuanto se genera y no se escribe nada
+    en la carpeta de salida.
+    """
+    data = request.get_json()
+    context_general, motor, error = _leer_datos_generacion(data)
+    if error:
+        return error
+
+    invitados_dicts = _invitados_para_generacion()
+    if not invitados_dicts:
+        return jsonify({
+            'success': False,
+            'error': 'No hay invitados en la base de datos para generar invitaciones'
+        }), 404
+
+    # Comparte las instancias de Word con los lotes en segundo plano: mientras
+    # dura la respuesta no se puede iniciar un lote (ni otra descarga)
+    run = generation_jobs.StreamingRun(len(invitados_dicts))
+    started = generation_jobs.start_stream(run)
+    if started is not run:
+        return _generacion_en_curso(started)
+
+    filename = f"{context_general['anio']}.{context_general['periodo']}-invitaciones.zip"
+    logging.info(f"📦 Generando ZIP en flujo con {len(invitados_dicts)} invitaciones")
+    response = Response(generate_dossiers_zip(invitados_dicts, context_general, motor=motor),
+                        mimetype='application/zip')
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # Se llama al cerrar la respuesta: al terminar el ZIP o si el cliente se desconecta
+    response.call_on_close(run.finish)
+    return response
+
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Progreso de un trabajo de generación (en curso o terminado)."""
+    job = generation_jobs.get_job(job_id)
+    if job is not None:
+        return jsonify(job.to_dict())
+
+    trabajo = TrabajoGeneracion.query.get(job_id)
+    if trabajo is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+    return jsonify(trabajo.to_dict())
+
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancela un trabajo en curso; se detiene al terminar el invitado que está procesando."""
+    job = generation_jobs.get_job(job_id)
+    if job is None:
+        if TrabajoGeneracion.query.get(job_id) is None:
+            return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+        return jsonify({'success': False, 'error': 'El trabajo ya terminó'}), 409
+
+    if not job.cancel():
+        return jsonify({'success': False, 'error': 'El trabajo ya terminó'}), 409
+    return jsonify(job.to_dict()), 202
+
+
+@app.route('/api/jobs/<job_id>/resume', methods=['POST'])
+def resume_job(job_id):
+    """
+    Reanuda un lote interrumpido, cancelado o fallido a partir de su diario:
+    solo se generan los invitados que aún no tenían su dossier.
+    """
+    job = generation_jobs.get_job(job_id)
+    if job is not None and job.active:
+        return jsonify({'success': False, 'error': 'El trabajo sigue en curso'}), 409
+
+    trabajo = TrabajoGeneracion.query.get(job_id)
+    if trabajo is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+    diario = trabajo.to_dict().get('diario')
+    if not diario or not Path(diario).exists():
+        return jsonify({'success': False, 'error': 'El trabajo no tiene nada pendiente que reanudar'}), 409
+
+    running = generation_jobs.active_job()
+    if running is not None:
+        return _generacion_en_curso(running)
+
+    journal = BatchJournal.open(diario)
+    header = journal.header
+    # Los invitados del lote original que aún existen, con sus datos actuales
+    por_id = {invitado['id']: invitado for invitado in _invitados_para_generacion()}
+    invitados_dicts = [por_id[i] for i in header['invitados'] if i in por_id]
+    pendientes = sum(1 for invitado in invitados_dicts if not journal.is_done(invitado))
+
+    job = GenerationJob(invitados_dicts, header['context_general'], header['output_dir'],
+                        motor=header['motor'], procesos=header['procesos'], incremental=header['incremental'],
+                        salida=header['salida'], on_update=guardar_trabajo, journal=journal)
+    started = generation_jobs.start_job(job)
+    if started is not job:
+        return _generacion_en_curso(started)
+
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'reanuda': job.reanuda,
+        'total': pendientes,
+        'output_folder': header['output_dir'],
+        'message': f"Reanudando la generación: {pendientes} de {len(invitados_dicts)} invitaciones pendientes"
+    }), 202
+
+
+@app.route('/api/generate-single-invitation/<int:invitado_id>', methods=['POST'])
+def generate_single_invitation(invitado_id):
+    """Genera la invitación para un solo invitado específico."""
+    data = request.get_json()
+    
+    context_general = {
+        "anio": data.get("anio"),
+        "periodo": data.get("periodo"),
+        "edicion_evento": data.get("edicion_evento"),
+        "fecha_evento": data.get("fecha_evento"),
+        "fecha_carta": format_fecha_carta(data.get("fecha_carta")),
+        "nombre_firmante": "Claudio Ernesto Florián Arenas",
+        "cargo_firmante": "Jefe del Departamento de Ingeniería en Sistemas y Computación"
+    }
+    
+    if not all(context_general.values()):
+        return jsonify({'success': False, 'error': 'Faltan datos del evento'}), 400
+
+    # Salida: el dossier completo o solo la carta, con el anexo compartido aparte
+    salida = data.get("salida", SALIDA_DOSSIERES)
+    if salida not in (SALIDA_DOSSIERES, SALIDA_CARTAS):
+        return jsonify({'success': False, 'error': f"Tipo de salida no válido: {salida}"}), 400
+
+    # Generar carpeta automáticamente en el Desktop
+    anio = data.get("anio")
+    periodo = data.get("periodo")
+    folder_name = f"{anio}.{periodo}-invitaciones"
+    
+    # Obtener ruta del Desktop del usuario
+    desktop_path = Path.home() / "Desktop"
+    output_dir = str(desktop_path / folder_name)
+    
+    # Crear el directorio si no existe
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    logging.info(f"Carpeta de salida creada/verificada: {output_dir}")
+
+    invitado = Invitado.query.get(invitado_id)
+    if not invitado:
+        return jsonify({'success': False, 'error': 'Invitado no encontrado'}), 404
+        
+    invitado_dict = invitado.to_dict()
+    invitado_dict['puesto_completo'] = getattr(invitado, 'puesto_completo', '')
+    invitado_dict['institucion'] = getattr(invitado, 'institucion', '')
+    invitado_dict['abreviacion_org'] = getattr(invitado, 'abreviacion_org', '')
+    
+    logging.info(f"Generando invitación individual para: {invitado.nombre_completo} (ID: {invitado.id})")
+    result = generate_full_dossier(invitado_dict, context_general, output_dir,
+                                   with_appendix=salida == SALIDA_DOSSIERES)
+    
+    if result["success"]:
+        logging.info(f"✓ Invitación generada exitosamente para {invitado.nombre_completo}")
+        response = {
+            'success': True,
+            'message': f"Se generó la invitación para {invitado.nombre_completo} correctamente.",
+            'output_folder': output_dir,
+            'file_path': result.get('path')
+        }
+        if salida == SALIDA_CARTAS:
+            try:
+                response['anexo'] = save_shared_appendix(context_general, output_dir)
+            except FileNotFoundError as e:
+                return jsonify({'success': False, 'error': str(e)}), 500
+        return jsonify(response), 200
+    else:
+        error_msg = result.get('error', 'Error desconocido')
+        logging.error(f"✗ Error generando invitación para {invitado.nombre_completo}: {error_msg}")
+        return jsonify({
+            'success': False,
+            'error': error_msg,
+            'invitado': invitado.nombre_completo
+        }), 500
+
+
+@app.route('/api/preview-invitation/<int:invitado_id>', methods=['GET', 'POST'])
+def preview_invitation(invitado_id):
+    """
+    Genera una imagen de vista previa para un invitado específico.
+    Los datos del evento llegan en el cuerpo JSON (POST) o como parámetros de
+    la URL (GET). La respuesta lleva un ETag; si el cliente ya tiene esa
+    versión (If-None-Match) se responde 304 sin generar nada.
+    """
+    data = request.get_json(silent=True) if request.method == 'POST' else request.args
+    data = data or {}
+    
+    context_general = {
+        "anio": data.get("anio"),
+        "periodo": data.get("periodo"),
+        "edicion_evento": data.get("edicion_evento"),
+        "fecha_evento": data.get("fecha_evento"),
+        "fecha_carta": format_fecha_carta(data.get("fecha_carta")),  # Formatear fecha
+        "nombre_firmante": "Claudio Ernesto Florián Arenas",
+        "cargo_firmante": "Jefe del Departamento de Ingeniería en Sistemas y Computación"
+    }
+    
+    if not all(context_general.values()):
+        return jsonify({'error': 'Faltan datos del evento para generar la vista previa'}), 400
+
+    invitado = Invitado.query.get(invitado_id)
+    if not invitado:
+        return jsonify({'error': 'Invitado no encontrado'}), 404
+
+    # Convertir a diccionario y agregar todos los campos
+    invitado_dict = invitado.to_dict()
+    invitado_dict['cargo'] = getattr(invitado, 'cargo', '')
+    invitado_dict['organizacion'] = getattr(invitado, 'organizacion', '')
+
+    try:
+        etag = preview_etag(invitado_dict, context_general)
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 500
+
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        etag, png = generate_preview_image(invitado_dict, context_general)
+        if png is None:
+            return jsonify({'error': 'No se pudo generar la vista previa'}), 500
+        # Devuelve la imagen directamente desde memoria
+        response = send_file(io.BytesIO(png), mimetype='image/png', etag=False)
+    response.set_etag(etag)
+    # El cliente puede guardarla, pero debe revalidar (la respuesta 304 es inmediata)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+### Rutas para Importación y Exportación ###
+
+# Mapeo de nombres de columna internos a cabeceras amigables para el usuario
+USER_FRIENDLY_HEADERS = {
+    'nombre_completo': 'Nombre Completo del Invitado',
+    'caracter_invitacion': 'Carácter de la Invitación',
+    'nota': 'Nota Adicional (Opcional)',
+    'puesto_completo': 'Puesto o Cargo Completo',
+    'institucion': 'Institución / Organización',
+    'abreviacion_org': 'Abreviación de Institución',
+    'es_invitado_especial': '¿Es Invitado Especial? (1=Sí, 0=No)',
+    'es_asesor_t1': '¿Es Asesor de Taller 1? (1=Sí, 0=No)',
+    'es_asesor_t2': '¿Es Asesor de Taller 2? (1=Sí, 0=No)',
+    'puede_ser_jurado_protocolo': 'Jurado de Protocolo (Automático)',
+    'puede_ser_jurado_informe': 'Jurado de Informe (Automático)'
+}
+
+# Mapeo inverso para la importación (de amigable a interno)
+INTERNAL_HEADERS = {v.lower(): k for k, v in USER_FRIENDLY_HEADERS.items()}
+
+
+@app.route('/api/invitados/plantilla', methods=['GET'])
+def descargar_plantilla():
+    """Genera y sirve una plantilla de Excel con instrucciones para la importación."""
+    try:
+        # Hoja 1: La plantilla a llenar
+        template_df = pd.DataFrame(columns=[h for h in USER_FRIENDLY_HEADERS.values() if 'Automático' not in h])
+
+        # Hoja 2: Las instrucciones
+        instructions_data = {
+            'Campo': list(USER_FRIENDLY_HEADERS.values()),
+            'Descripción': [
+                'Nombre completo del invitado, incluyendo título (Ej: Dr. Juan Pérez García). Requerido.',
+                'Motivo de la invitación (Ej: Jurado en evento académico, Ponente magistral). Requerido.',
+                'Cualquier nota o comentario relevante sobre el invitado.',
+                'Puesto completo del invitado (Ej: Jefe del Departamento de Investigación).',
+                'Nombre completo de la institución, organización o empresa a la que pertenece.',
+                'Abreviación corta para la nomenclatura de archivos (Ej: ITM, UNAM, UMSNH).',
+                'Marcar con 1 si el invitado es una autoridad o VIP. Dejar en 0 o vacío si no.',
+                'Marcar con 1 si el invitado es Asesor de Taller de Investigación 1. Dejar en 0 o vacío si no.',
+                'Marcar con 1 si el invitado es Asesor de Taller de Investigación 2. Dejar en 0 o vacío si no.',
+                'Este campo se calcula automáticamente al guardar. No es necesario llenarlo.',
+                'Este campo se calcula automáticamente al guardar. No es necesario llenarlo.'
+            ]
+        }
+        instructions_df = pd.DataFrame(instructions_data)
+
+        output = io.BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            template_df.to_excel(writer, index=False, sheet_name='Plantilla de Invitados')
+            instructions_df.to_excel(writer, index=False, sheet_name='Instrucciones')
+        output.seek(0)
+        
+        logging.info("Se ha generado y enviado la plantilla de Excel mejorada para invitados.")
+        
+        return send_file(
+            output,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            as_attachment=True,
+            download_name='plantilla_invitados_con_instrucciones.xlsx'
+        )
+    except Exception as e:
+        logging.error(f"Error al generar la plantilla de Excel: {e}", exc_info=True)
+        return jsonify({'error': f'No se pudo generar la plantilla: {e}'}), 500
+
+
+@app.route('/api/invitados/exportar', methods=['GET'])
+@versioned
+def exportar_invitados():
+    """Exporta todos los invitados a un archivo Excel o CSV con cabeceras amigables."""
+    formato = request.args.get('formato', 'excel').lower()
+    
+    try:
+        invitados = Invitado.query.all()
+        if not invitados:
+            return jsonify({'error': 'No hay invitados para exportar'}), 404
+
+        datos_invitados = [invitado.to_dict() for invitado in invitados]
+        df = pd.DataFrame(datos_invitados)
+
+        # Convertir booleanos a 1/0 para mayor claridad en el archivo exportado
+        for col in ['es_invitado_especial', 'es_asesor_t1', 'es_asesor_t2', 'puede_ser_jurado_protocolo', 'puede_ser_jurado_informe']:
+            if col in df.columns:
+                df[col] = df[col].astype(int)
+
+        # Renombrar columnas a formato amigable
+        df.rename(columns=USER_FRIENDLY_HEADERS, inplace=True)
+        
+        # Asegurar el orden de las columnas en la exportación
+        ordered_columns = [h for h in USER_FRIENDLY_HEADERS.values() if h in df.columns]
+        df = df[ordered_columns]
+
+        output = io.BytesIO()
+        
+        if formato == 'excel':
+            df.to_excel(output, index=False, sheet_name='Invitados Exportados')
+            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            filename = 'exportacion_invitados.xlsx'
+        elif formato == 'csv':
+            df.to_csv(output, index=False, encoding='utf-8-sig') # utf-8-sig para mejor compatibilidad con Excel
+            mimetype = 'text/csv'
+            filename = 'exportacion_invitados.csv'
+        else:
+            return jsonify({'error': 'Formato no soportado. Use \'excel\' o \'csv\'.'}), 400
+
+        output.seek(0)
+        logging.info(f"Se han exportado {len(invitados)} invitados a formato {formato}.")
+
+        return send_file(output, mimetype=mimetype, as_attachment=True, download_name=filename)
+
+    except Exception as e:
+        logging.error(f"Error al exportar invitados: {e}", exc_info=True)
+        return jsonify({'error': f'No se pudo completar la exportación: {e}'}), 500
+
+
+@app.route('/api/invitados/importar', methods=['POST'])
+def importar_invitados():
+    """Importa invitados desde un archivo Excel o CSV usando cabeceras amigables."""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No se encontró ningún archivo en la solicitud'}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No se seleccionó ningún archivo'}), 400
+
+    try:
+        filename = secure_filename(file.filename)
+        if filename.endswith('.xlsx') or filename.endswith('.xls'):
+            df = pd.read_excel(file, engine='openpyxl')
+        elif filename.endswith('.csv'):
+            df = pd.read_csv(file)
+        else:
+            return jsonify({'error': 'Formato de archivo no soportado. Use .xlsx, .xls o .csv'}), 400
+
+        # Normalizar cabeceras del archivo (a minúsculas, sin espacios extra)
+        df.rename(columns={col: col.strip().lower() for col in df.columns}, inplace=True)
+        # Mapear cabeceras amigables a nombres de columna internos
+        df.rename(columns=INTERNAL_HEADERS, inplace=True)
+
+        def to_bool(value):
+            if pd.isna(value):
+                return False
+            return str(value).lower() in ['1', 'true', 't', 'y', 'yes', 'si', 'verdadero']
+
+        nuevos_invitados = []
+        for index, row in df.iterrows():
+            if pd.isna(row.get('nombre_completo')) or pd.isna(row.get('caracter_invitacion')):
+                logging.warning(f"Omitiendo fila {index+2} por falta de datos requeridos.")
+                continue
+
+            invitado = Invitado(
+                nombre_completo=row.get('nombre_completo'),
+                caracter_invitacion=row.get('caracter_invitacion'),
+                nota=row.get('nota') if pd.notna(row.get('nota')) else None,
+                puesto_completo=row.get('puesto_completo') if pd.notna(row.get('puesto_completo')) else None,
+                institucion=row.get('institucion') if pd.notna(row.get('institucion')) else None,
+                abreviacion_org=row.get('abreviacion_org') if pd.notna(row.get('abreviacion_org')) else None,
+                es_invitado_especial=to_bool(row.get('es_invitado_especial')),
+                es_asesor_t1=to_bool(row.get('es_asesor_t1')),
+                es_asesor_t2=to_bool(row.get('es_asesor_t2')),
+            )
+            invitado.compute_jurado_flags()
+            nuevos_invitados.append(invitado)
+
+        if nuevos_invitados:
+            db.session.add_all(nuevos_invitados)
+            db.session.commit()
+            data_version.bump()
+            logging.info(f"Se han importado {len(nuevos_invitados)} nuevos invitados.")
+        
+        return jsonify({'message': f'Importación completada. Se agregaron {len(nuevos_invitados)} invitados.'}), 201
+
+    except Exception as e:
+        logging.error(f"Error durante la importación de archivo: {e}", exc_info=True)
+        return jsonify({'error': f'Ocurrió un error al procesar el archivo: {e}'}), 500
+
+
+def iniciar_servidor():
+    """Prepara la base de datos y los assets y atiende peticiones (ver main.py)."""
+    try:
+        with app.app_context():
+            logging.info("Contexto de la aplicación creado.")
+            if not DB_PATH.exists():
+                logging.warning("La base de datos NO existe. Se creará ahora.")
+            else:
+                logging.info("La base de datos ya existe.")
+            
+            # Esta línea crea el archivo .sqlite y las tablas si no existen
+            db.create_all()
+            logging.info("db.create_all() ejecutado correctamente.")
+            asegurar_indices()
+            actualizar_jurados()
+            logging.info(f"Perfil de SQLite: {sqlite_storage.storage_settings(db.engine)}")
+            sqlite_storage.maintenance.start(db.engine)
+            marcar_trabajos_interrumpidos()
+
+            # Asegurarse de que los assets por defecto estén en su lugar
+            ensure_assets_exist()
+
+    except Exception as e:
+        logging.error(f"!!! ERROR DURANTE LA INICIALIZACIÓN DE LA BD: {e}", exc_info=True)
+
+    logging.info("Iniciando app.run()... El servidor está listo.")
+    app.run(debug=True)
\ No newline at end of file
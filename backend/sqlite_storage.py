@@ -0,0 +1,146 @@
+"""
+Perfil de Almacenamiento de SQLite
+Configura cada conexión a db.sqlite con un perfil pensado para una aplicación
+de escritorio con un solo escritor y varios lectores concurrentes:
+
+- WAL: los lectores no bloquean al escritor ni el escritor a los lectores (la
+  interfaz sigue respondiendo mientras un trabajo de generación guarda su
+  avance), y un commit escribe al final del WAL en vez de reescribir el
+  diario de reversión.
+- synchronous=NORMAL: con WAL, un commit no espera al fsync (el WAL se
+  sincroniza en cada checkpoint). Ante un corte de luz se puede perder el
+  último commit, pero la base de datos no se corrompe.
+- Caché de páginas, mmap, tablas temporales en memoria y busy_timeout para que
+  un escritor espere al otro en vez de fallar con "database is locked".
+
+Un hilo de mantenimiento corre periódicamente `PRAGMA optimize` (actualiza
+las estadísticas del planificador cuando hace falta) y un checkpoint pasivo
+del WAL para que no crezca sin límite.
+"""
+
+import os
+import time
+import logging
+import threading
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_MODE = os.environ.get('JPI_SQLITE_JOURNAL_MODE', 'WAL')
+SYNCHRONOUS = os.environ.get('JPI_SQLITE_SYNCHRONOUS', 'NORMAL')
+CACHE_MB = int(os.environ.get('JPI_SQLITE_CACHE_MB', 32))
+MMAP_MB = int(os.environ.get('JPI_SQLITE_MMAP_MB', 128))
+BUSY_TIMEOUT_MS = int(os.environ.get('JPI_SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+# Conexiones que se mantienen abiertas (cada hilo de Flask o de un trabajo
+# toma una) y cuántas más se permiten en picos
+POOL_SIZE = int(os.environ.get('JPI_SQLITE_POOL_SIZE', 8))
+POOL_OVERFLOW = int(os.environ.get('JPI_SQLITE_POOL_OVERFLOW', 8))
+
+# Segundos entre rondas de mantenimiento (0 lo desactiva)
+MAINTENANCE_SECONDS = float(os.environ.get('JPI_SQLITE_MAINTENANCE_SECONDS', 600))
+
+
+def connection_pragmas():
+    """PRAGMAs que se aplican a cada conexión nueva, en orden."""
+    return [
+        ('journal_mode', JOURNAL_MODE),
+        ('synchronous', SYNCHRONOUS),
+        # Negativo: tamaño en KiB en vez de páginas
+        ('cache_size', -CACHE_MB * 1024),
+        ('mmap_size', MMAP_MB * 1024 * 1024),
+        ('temp_store', 'MEMORY'),
+        ('busy_timeout', BUSY_TIMEOUT_MS),
+    ]
+
+
+def engine_options():
+    """Opciones de create_engine (SQLALCHEMY_ENGINE_OPTIONS) para el pool de conexiones."""
+    return {
+        'pool_size': POOL_SIZE,
+        'max_overflow': POOL_OVERFLOW,
+        'pool_timeout': 30,
+        'connect_args': {
+            # Las conexiones del pool pasan de un hilo a otro
+            'check_same_thread': False,
+            'timeout': BUSY_TIMEOUT_MS / 1000,
+        },
+    }
+
+
+def configure_engine(engine):
+    """Aplica connection_pragmas() a cada conexión que abra `engine`."""
+    pragmas = connection_pragmas()
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return engine
+
+
+def storage_settings(engine):
+    """Valores efectivos de los PRAGMAs en una conexión del pool (para diagnóstico)."""
+    with engine.connect() as connection:
+        return {
+            name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name, _ in connection_pragmas()
+        }
+
+
+class _Maintenance:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.runs = 0
+        self.last_checkpoint = None  # (ocupado, páginas en el WAL, páginas copiadas)
+
+    def run_once(self, engine):
+        """Una ronda: PRAGMA optimize y checkpoint pasivo del WAL."""
+        started = time.perf_counter()
+        with engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA optimize")
+            checkpoint = connection.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        with self._lock:
+            self.runs += 1
+            self.last_checkpoint = tuple(checkpoint) if checkpoint else None
+        logger.info(f"🧹 Mantenimiento de SQLite en {time.perf_counter() - started:.3f}s "
+                    f"(checkpoint: {self.last_checkpoint})")
+
+    def start(self, engine, interval=None):
+        interval = MAINTENANCE_SECONDS if interval is None else interval
+        if interval <= 0:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop, args=(engine, interval), name='sqlite-mantenimiento', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self, engine, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.run_once(engine)
+            except Exception as e:
+                # Por ejemplo, la base de datos ocupada más allá de busy_timeout
+                logger.warning(f"⚠️ Falló el mantenimiento de SQLite: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {'runs': self.runs, 'last_checkpoint': self.last_checkpoint}
+
+
+maintenance = _Maintenance()
@@ -0,0 +1,51 @@
+"""
+Configuración común de las pruebas del backend.
+
+server.py y document_generator.py toman la carpeta de datos de sys.argv[1] al
+importarse, así que antes de que se importen se apunta a una carpeta temporal
+(con su propia db.sqlite y su log) y se usa el convertidor simulado.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+MUESTRAS_DIR = BACKEND_DIR.parent / 'Para pruebas de invitaciones'
+DATA_DIR = Path(tempfile.mkdtemp(prefix='jpi_pruebas_'))
+
+sys.path.insert(0, str(BACKEND_DIR))
+sys.argv = [sys.argv[0], str(DATA_DIR)]
+os.environ['HOME'] = os.environ['USERPROFILE'] = str(DATA_DIR)
+os.environ['JPI_CONVERTER'] = 'fake'
+os.environ.setdefault('JPI_FAKE_STARTUP_DELAY', '0')
+os.environ.setdefault('JPI_FAKE_DOCUMENT_DELAY', '0')
+
+
+@pytest.fixture(scope='session')
+def aplicacion():
+    """El módulo server con las tablas creadas en la base de datos temporal."""
+    import server
+
+    with server.app.app_context():
+        server.db.create_all()
+    return server
+
+
+@pytest.fixture(scope='session')
+def archivos_base():
+    """Plantilla, convocatoria y cronograma de muestra en la carpeta de assets de las pruebas."""
+    assets = DATA_DIR / 'assets'
+    assets.mkdir(exist_ok=True)
+    muestras = {
+        'plantilla_base.docx': next(MUESTRAS_DIR.glob('*.docx')),
+        'convocatoria.pdf': next(MUESTRAS_DIR.glob('*Convocatoria*.pdf')),
+        'cronograma.pdf': next(MUESTRAS_DIR.glob('*Programa*.pdf')),
+    }
+    for nombre, origen in muestras.items():
+        shutil.copy(origen, assets / nombre)
+    return assets
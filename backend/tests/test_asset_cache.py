@@ -0,0 +1,92 @@
+"""
+Plantilla compilada en caché contra DocxTemplate.
+
+La plantilla en caché reutiliza el documento parseado, el XML parcheado y el
+Jinja compilado entre renders; el DOCX resultante debe ser el mismo que el de
+DocxTemplate cargando la plantilla desde disco, también a partir del segundo
+render (cuando ya todo sale de la caché). Además, el paquete que escribe
+_write_package (con partes internas de python-docx) debe abrirse y contener
+lo mismo que el de Document.save.
+"""
+
+import io
+from zipfile import ZipFile, ZIP_STORED
+
+import pytest
+from docx import Document
+from docxtpl import DocxTemplate
+
+from asset_cache import CompiledTemplate, _write_package
+
+EVENTO = {
+    'anio': '2025',
+    'periodo': '1',
+    'edicion_evento': '8',
+    'fecha_evento': '28 de mayo de 2025',
+    'fecha_carta': '1 de mayo de 2025',
+}
+INVITADOS = [
+    {
+        'nombre_completo': 'Dra. Ana María López Hernández',
+        'puesto_completo': 'Jefa del Departamento de Sistemas',
+        'institucion': 'Instituto Tecnológico de Morelia',
+        'caracter_invitacion': 'jurado',
+    },
+    {
+        'nombre_completo': 'Ing. José Ñúñez',
+        'puesto_completo': '',
+        'institucion': None,
+        'caracter_invitacion': 'asesor',
+    },
+]
+
+
+def _partes(docx_bytes):
+    """{nombre: contenido} de cada parte del paquete DOCX."""
+    with ZipFile(io.BytesIO(docx_bytes)) as paquete:
+        return {nombre: paquete.read(nombre) for nombre in paquete.namelist()}
+
+
+def _render(doc, invitado):
+    from document_generator import _build_context
+
+    doc.render(_build_context(invitado, EVENTO))
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope='module')
+def plantilla(archivos_base):
+    return archivos_base / 'plantilla_base.docx'
+
+
+def test_render_en_cache_igual_a_docxtemplate(plantilla):
+    compilada = CompiledTemplate(plantilla, plantilla.read_bytes())
+    for vuelta in range(2):
+        for invitado in INVITADOS:
+            esperado = _partes(_render(DocxTemplate(str(plantilla)), invitado))
+            obtenido = _partes(_render(compilada.new(), invitado))
+            assert obtenido.keys() == esperado.keys()
+            distintas = [nombre for nombre in esperado if obtenido[nombre] != esperado[nombre]]
+            assert not distintas, f"vuelta {vuelta}, {invitado['nombre_completo']}: {distintas}"
+    # El segundo render ya usó el Jinja compilado
+    assert compilada.jinja._compiled
+
+
+def test_write_package_igual_a_document_save(plantilla):
+    documento = Document(str(plantilla))
+    esperado = io.BytesIO()
+    documento.save(esperado)
+    obtenido = io.BytesIO()
+    _write_package(documento, obtenido)
+
+    with ZipFile(obtenido) as paquete:
+        assert paquete.testzip() is None
+        medios = [info for info in paquete.infolist() if info.filename.startswith('word/media/')]
+    assert medios and all(info.compress_type == ZIP_STORED for info in medios)
+    assert _partes(obtenido.getvalue()) == _partes(esperado.getvalue())
+
+    reabierto = Document(io.BytesIO(obtenido.getvalue()))
+    assert [p.text for p in reabierto.paragraphs] == [p.text for p in documento.paragraphs]
+    assert len(reabierto.inline_shapes) == len(documento.inline_shapes)
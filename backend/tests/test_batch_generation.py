@@ -0,0 +1,31 @@
+"""Generación en paralelo entre procesos de trabajo."""
+
+import os
+import logging
+
+from test_batch_journal import EVENTO, _invitados
+
+
+def test_los_procesos_de_trabajo_escriben_en_el_log(archivos_base, tmp_path):
+    import batch_generation
+
+    log = tmp_path / 'debug.log'
+    handler = logging.FileHandler(log, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(process)d - %(levelname)s - %(message)s'))
+    raiz = logging.getLogger()
+    nivel = raiz.level
+    # Antes que los manejadores de pytest: los procesos repiten el primer archivo de log
+    raiz.handlers.insert(0, handler)
+    raiz.setLevel(logging.INFO)
+    try:
+        resultados = list(batch_generation._generate_parallel(
+            _invitados(2), EVENTO, str(tmp_path), 'word', 2, True,
+        ))
+    finally:
+        raiz.removeHandler(handler)
+        raiz.setLevel(nivel)
+        handler.close()
+
+    assert all(resultado['success'] for _, resultado in resultados)
+    procesos = {linea.split(' - ')[0] for linea in log.read_text(encoding='utf-8').splitlines()}
+    assert procesos - {str(os.getpid())}, "ningún proceso de trabajo escribió en el log"
@@ -0,0 +1,108 @@
+"""Diario de lotes y reanudación de un lote interrumpido."""
+
+import json
+
+from batch_journal import BatchJournal, journal_path
+
+EVENTO = {
+    'anio': '2025',
+    'periodo': '1',
+    'edicion_evento': '8',
+    'fecha_evento': '28 de mayo de 2025',
+    'fecha_carta': '1 de mayo de 2025',
+}
+
+
+def _invitados(cantidad):
+    return [
+        {
+            'id': i,
+            'nombre_completo': f"Dra. Invitada de Prueba {i}",
+            'puesto_completo': 'Coordinadora de Posgrado',
+            'institucion': 'Instituto Tecnológico de Morelia',
+            'abreviacion_org': 'ITM',
+            'caracter_invitacion': 'jurado',
+        }
+        for i in range(1, cantidad + 1)
+    ]
+
+
+def test_open_ignora_una_ultima_linea_incompleta(tmp_path):
+    invitados = _invitados(3)
+    diario = BatchJournal.create(tmp_path, 'lote1', EVENTO, invitados, motor='word', procesos=1,
+                                 incremental=False, salida='dossieres')
+    diario.record(invitados[0], {'success': True, 'path': str(tmp_path / 'uno.pdf')})
+    diario.record(invitados[1], {'success': True, 'path': str(tmp_path / 'dos.pdf')})
+    diario.close()
+    # El servidor se cerró mientras escribía la línea del tercer invitado
+    with open(diario.path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'id': 3, 'ok': True, 'archivo': 'tres.pdf'})[:12])
+
+    reabierto = BatchJournal.open(diario.path)
+
+    assert reabierto.header['lote'] == 'lote1'
+    assert reabierto.header['invitados'] == [1, 2, 3]
+    assert reabierto.completed == {1: 'uno.pdf', 2: 'dos.pdf'}
+    assert not reabierto.is_done(invitados[2])
+
+
+def test_reanudar_genera_solo_los_invitados_pendientes(aplicacion, archivos_base, tmp_path, monkeypatch):
+    import generation_jobs
+
+    invitados = _invitados(4)
+    # Lote interrumpido: el primero se generó, el segundo falló y los demás no empezaron
+    diario = BatchJournal.create(tmp_path, 'interrumpido', EVENTO, invitados, motor='word', procesos=1,
+                                 incremental=False, salida='dossieres')
+    (tmp_path / 'primero.pdf').write_bytes(b'%PDF-1.7')
+    diario.record(invitados[0], {'success': True, 'path': str(tmp_path / 'primero.pdf')})
+    diario.record(invitados[1], {'success': False, 'error': 'La conversión a PDF falló'})
+    diario.close()
+
+    generados = []
+    generate_dossiers = generation_jobs.generate_dossiers
+
+    def _registrar(invitados_data, *args, **kwargs):
+        generados.extend(invitado['id'] for invitado in invitados_data)
+        yield from generate_dossiers(invitados_data, *args, **kwargs)
+
+    monkeypatch.setattr(generation_jobs, 'generate_dossiers', _registrar)
+
+    journal = BatchJournal.open(journal_path(tmp_path, 'interrumpido'))
+    job = generation_jobs.GenerationJob(invitados, EVENTO, str(tmp_path), journal=journal).start()
+    job.join(timeout=60)
+
+    assert job.estado == generation_jobs.COMPLETADO, job.error
+    assert generados == [2, 3, 4]
+    assert job.previos == 1
+    assert job.generated_count == 3
+    assert len(list(tmp_path.glob('*.pdf'))) == 4
+    # El lote terminó completo: ya no hay diario que reanudar
+    assert not journal.path.exists()
+
+
+def test_reanudar_un_lote_incremental_conserva_los_dossieres_generados(aplicacion, archivos_base, tmp_path):
+    import generation_jobs
+
+    invitados = _invitados(4)
+    # Un lote incremental interrumpido después de los dos primeros invitados
+    primero = generation_jobs.GenerationJob(invitados[:2], EVENTO, str(tmp_path), incremental=True).start()
+    primero.join(timeout=60)
+    assert primero.estado == generation_jobs.COMPLETADO, primero.error
+    generados = sorted(tmp_path.glob('*.pdf'))
+    assert len(generados) == 2
+
+    diario = BatchJournal.create(tmp_path, 'incremental', EVENTO, invitados, motor='word', procesos=1,
+                                 incremental=True, salida='dossieres')
+    for invitado, pdf in zip(invitados, generados):
+        diario.record(invitado, {'success': True, 'path': str(pdf)})
+    diario.close()
+
+    journal = BatchJournal.open(journal_path(tmp_path, 'incremental'))
+    job = generation_jobs.GenerationJob(invitados, EVENTO, str(tmp_path), incremental=True, journal=journal).start()
+    job.join(timeout=60)
+
+    assert job.estado == generation_jobs.COMPLETADO, job.error
+    assert job.previos == 2
+    assert job.generated_count == 2
+    assert job.eliminados == 0
+    assert len(list(tmp_path.glob('*.pdf'))) == 4
@@ -0,0 +1,78 @@
+"""Búsqueda de texto completo (FTS5) de /api/invitados/buscar y sus triggers."""
+
+import pytest
+
+
+@pytest.fixture
+def cliente(aplicacion):
+    import guest_search
+
+    with aplicacion.app.app_context():
+        aplicacion.Invitado.query.delete()
+        aplicacion.db.session.commit()
+        # Crea el índice y sus triggers si ninguna prueba anterior lo hizo
+        with aplicacion.db.engine.begin() as conexion:
+            if not guest_search.ensure_search_index(conexion):
+                pytest.skip("El SQLite de esta instalación no incluye FTS5")
+    cliente = aplicacion.app.test_client()
+    for nombre, institucion in [
+        ('Dr. José García López', 'Instituto Tecnológico de Morelia'),
+        ('Mtra. Ana Pérez', 'Universidad Nacional Autónoma de México'),
+        ('Ing. Joaquín Ruiz', 'Instituto Politécnico Nacional'),
+    ]:
+        respuesta = cliente.post('/api/invitados', json={
+            'nombre_completo': nombre, 'institucion': institucion, 'caracter_invitacion': 'jurado',
+        })
+        assert respuesta.status_code == 201
+    return cliente
+
+
+def _nombres(cliente, q):
+    respuesta = cliente.get('/api/invitados/buscar', query_string={'q': q})
+    assert respuesta.status_code == 200, respuesta.get_json()
+    return [invitado['nombre_completo'] for invitado in respuesta.get_json()['invitados']]
+
+
+@pytest.mark.parametrize('q', ['jose', 'JOSÉ', 'garcia', 'GARCÍA lopez'])
+def test_sin_distinguir_acentos_ni_mayusculas(cliente, q):
+    assert _nombres(cliente, q) == ['Dr. José García López']
+
+
+def test_por_prefijo(cliente):
+    assert _nombres(cliente, 'gar lop') == ['Dr. José García López']
+    assert sorted(_nombres(cliente, 'jo')) == ['Dr. José García López', 'Ing. Joaquín Ruiz']
+    # La institución también se busca
+    assert _nombres(cliente, 'autonoma') == ['Mtra. Ana Pérez']
+
+
+def test_resalta_las_coincidencias(cliente):
+    respuesta = cliente.get('/api/invitados/buscar', query_string={'q': 'jose'}).get_json()
+    assert respuesta['total'] == 1
+    assert respuesta['invitados'][0]['nombre_resaltado'] == 'Dr. <mark>José</mark> García López'
+
+
+def test_el_indice_sigue_a_las_ediciones(cliente):
+    invitado_id = cliente.get('/api/invitados/buscar', query_string={'q': 'garcia'}).get_json()['invitados'][0]['id']
+
+    editado = cliente.put(f'/api/invitados/{invitado_id}', json={'nombre_completo': 'Dra. Josefina Martínez'})
+    assert editado.status_code == 200
+    assert _nombres(cliente, 'garcia') == []
+    assert _nombres(cliente, 'martinez') == ['Dra. Josefina Martínez']
+
+    # Cambiar otra columna indexada también actualiza el índice
+    cliente.put(f'/api/invitados/{invitado_id}', json={'institucion': 'Universidad de Guadalajara'})
+    assert _nombres(cliente, 'guadalajara') == ['Dra. Josefina Martínez']
+    assert _nombres(cliente, 'morelia') == []
+
+
+def test_un_invitado_eliminado_ya_no_aparece(cliente):
+    invitado_id = cliente.get('/api/invitados/buscar', query_string={'q': 'ana'}).get_json()['invitados'][0]['id']
+
+    assert cliente.delete(f'/api/invitados/{invitado_id}').status_code == 200
+    assert _nombres(cliente, 'ana') == []
+    assert _nombres(cliente, 'perez') == []
+    assert _nombres(cliente, 'jose') == ['Dr. José García López']
+
+
+def test_sin_q_responde_400(cliente):
+    assert cliente.get('/api/invitados/buscar').status_code == 400
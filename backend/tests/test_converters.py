@@ -0,0 +1,85 @@
+"""
+Pool de convertidores: el vigilante, con el convertidor simulado que se
+cuelga, y el pool caliente que reutilizan las vistas previas seguidas.
+"""
+
+import io
+import time
+
+import pytest
+from docx import Document
+
+from converters import ConversionTimeout, ConverterPool, FakeConverter
+
+
+def _docx(texto):
+    documento = Document()
+    documento.add_paragraph(texto)
+    buffer = io.BytesIO()
+    documento.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    # Un documento con este texto cuelga al convertidor simulado hasta que el vigilante lo termina
+    monkeypatch.setenv('JPI_FAKE_HANG_TEXT', 'COLGAR')
+    pool = ConverterPool(FakeConverter, size=1, timeout=0.5).start()
+    yield pool
+    pool.shutdown()
+
+
+def test_conversion_colgada_se_cancela_y_el_lugar_se_reemplaza(pool):
+    with pytest.raises(ConversionTimeout):
+        pool.convert_bytes(_docx("Este documento hace COLGAR al convertidor"))
+
+    stats = pool.stats()
+    assert stats['timeouts'] == 1
+    assert stats['instances_killed'] == 1
+
+    # El único lugar del pool tiene un convertidor nuevo: la siguiente conversión funciona
+    pdf = pool.convert_bytes(_docx("Dr. Invitado de Prueba"))
+    assert pdf.startswith(b'%PDF')
+    assert pool.stats()['conversions'] == 1
+    assert pool.stats()['instances_started'] == 2
+
+
+@pytest.fixture
+def generador(aplicacion, monkeypatch):
+    """document_generator sin pool activo, con un tiempo de inactividad corto."""
+    import document_generator
+
+    if document_generator._active_pool is not None:
+        # El pool caliente que dejó otra prueba
+        document_generator._close_idle_pool(document_generator._active_pool)
+    monkeypatch.setattr(document_generator, 'CONVERTER_IDLE_SECONDS', 0.5)
+    yield document_generator
+    if document_generator._active_pool is not None:
+        document_generator._close_idle_pool(document_generator._active_pool)
+
+
+def test_las_vistas_previas_seguidas_reutilizan_el_convertidor(generador):
+    for i in range(3):
+        assert generador.convert_docx_bytes(_docx(f"Vista previa {i}")).startswith(b'%PDF')
+    pool = generador._active_pool
+    assert pool is not None
+    assert pool.stats()['instances_started'] == 1
+    assert pool.stats()['conversions'] == 3
+
+    # Un lote que necesita más instancias no se queda con el pool caliente de una
+    with generador.converter_session(size=2) as lote:
+        assert lote is not pool
+        assert lote.size == 2
+    assert pool.stats()['instances_started'] == 1
+    assert generador._active_pool is None
+
+
+def test_el_pool_caliente_se_cierra_tras_la_inactividad(generador):
+    generador.convert_docx_bytes(_docx("Vista previa"))
+    pool = generador._active_pool
+    assert pool is not None
+
+    time.sleep(1.0)
+    assert generador._active_pool is None
+    # Sus hilos terminaron
+    assert pool._closing.is_set()
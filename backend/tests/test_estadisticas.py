@@ -0,0 +1,94 @@
+"""Conteos de /api/invitados/estadisticas y su caché por versión de los datos."""
+
+import pytest
+
+# (institución, especial, asesor T1, asesor T2)
+INVITADOS = [
+    ('ITM', False, True, False),
+    ('ITM', False, False, True),
+    ('ITM', True, True, True),
+    ('UNAM', False, False, False),
+    ('UNAM', True, False, False),
+    (None, False, True, False),
+]
+CONTEOS = ('total', 'asesores_t1', 'asesores_t2', 'jurados_protocolo', 'jurados_informe', 'jurados_ambos')
+
+
+def _esperados(invitados):
+    """Los conteos calculados aquí: protocolo = no es asesor T1, informe = no es asesor T2."""
+    return {
+        'total': len(invitados),
+        'asesores_t1': sum(t1 for _, _, t1, _ in invitados),
+        'asesores_t2': sum(t2 for _, _, _, t2 in invitados),
+        'jurados_protocolo': sum(not t1 for _, _, t1, _ in invitados),
+        'jurados_informe': sum(not t2 for _, _, _, t2 in invitados),
+        'jurados_ambos': sum(not t1 and not t2 for _, _, t1, t2 in invitados),
+    }
+
+
+def _agregar(aplicacion, invitados):
+    with aplicacion.app.app_context():
+        for i, (institucion, especial, t1, t2) in enumerate(invitados):
+            invitado = aplicacion.Invitado(
+                nombre_completo=f"Invitado {i}", caracter_invitacion='jurado', institucion=institucion,
+                es_invitado_especial=especial, es_asesor_t1=t1, es_asesor_t2=t2,
+            )
+            invitado.compute_jurado_flags()
+            aplicacion.db.session.add(invitado)
+        aplicacion.db.session.commit()
+
+
+@pytest.fixture
+def cliente(aplicacion):
+    with aplicacion.app.app_context():
+        aplicacion.Invitado.query.delete()
+        aplicacion.db.session.commit()
+    _agregar(aplicacion, INVITADOS)
+    aplicacion.data_version.bump()
+    return aplicacion.app.test_client()
+
+
+def _conteos(grupo):
+    return {nombre: grupo[nombre] for nombre in CONTEOS}
+
+
+def test_conteos_totales_y_desgloses(cliente):
+    estadisticas = cliente.get('/api/invitados/estadisticas').get_json()
+
+    assert _conteos(estadisticas) == _esperados(INVITADOS)
+    por_institucion = {grupo['institucion']: _conteos(grupo) for grupo in estadisticas['por_institucion']}
+    assert por_institucion == {
+        institucion: _esperados([i for i in INVITADOS if i[0] == institucion])
+        for institucion in ('ITM', 'UNAM', None)
+    }
+    # De mayor a menor total
+    assert [grupo['institucion'] for grupo in estadisticas['por_institucion']] == ['ITM', 'UNAM', None]
+    assert [(grupo['es_invitado_especial'], _conteos(grupo)) for grupo in estadisticas['por_especial']] == [
+        (True, _esperados([i for i in INVITADOS if i[1]])),
+        (False, _esperados([i for i in INVITADOS if not i[1]])),
+    ]
+
+
+def test_se_recalculan_despues_de_una_escritura(aplicacion, cliente):
+    antes = cliente.get('/api/invitados/estadisticas').get_json()
+
+    # Sin pasar por las rutas la versión no cambia: sigue la copia en caché
+    _agregar(aplicacion, [('UNAM', False, False, False)])
+    assert cliente.get('/api/invitados/estadisticas').get_json() == antes
+
+    nuevo = cliente.post('/api/invitados', json={
+        'nombre_completo': 'Dr. Nuevo', 'caracter_invitacion': 'jurado', 'institucion': 'IPN', 'es_asesor_t1': True,
+    })
+    assert nuevo.status_code == 201
+    despues = cliente.get('/api/invitados/estadisticas').get_json()
+    agregados = INVITADOS + [('UNAM', False, False, False), ('IPN', False, True, False)]
+    assert _conteos(despues) == _esperados(agregados)
+
+    # Editar: deja de ser asesor T1 y pasa a ser jurado de protocolo
+    editado = cliente.put(f"/api/invitados/{nuevo.get_json()['id']}", json={'es_asesor_t1': False})
+    assert editado.status_code == 200
+    editados = agregados[:-1] + [('IPN', False, False, False)]
+    estadisticas = cliente.get('/api/invitados/estadisticas').get_json()
+    assert _conteos(estadisticas) == _esperados(editados)
+    ipn, = [grupo for grupo in estadisticas['por_institucion'] if grupo['institucion'] == 'IPN']
+    assert _conteos(ipn) == _esperados([('IPN', False, False, False)])
@@ -0,0 +1,77 @@
+"""Una sola generación a la vez: los lotes en segundo plano y la descarga ZIP en flujo se excluyen."""
+
+import io
+import zipfile
+import threading
+
+import pytest
+
+EVENTO = {
+    'anio': '2025',
+    'periodo': '1',
+    'edicion_evento': '8',
+    'fecha_evento': '28 de mayo de 2025',
+    'fecha_carta': '2025-05-01',
+}
+
+
+@pytest.fixture
+def cliente(aplicacion, archivos_base, tmp_path, monkeypatch):
+    # La carpeta de salida de los lotes se crea en el Escritorio del usuario
+    monkeypatch.setenv('HOME', str(tmp_path))
+    with aplicacion.app.app_context():
+        aplicacion.Invitado.query.delete()
+        for i in range(2):
+            invitado = aplicacion.Invitado(nombre_completo=f"Dr. Invitado {i}", caracter_invitacion='jurado')
+            invitado.compute_jurado_flags()
+            aplicacion.db.session.add(invitado)
+        aplicacion.db.session.commit()
+    return aplicacion.app.test_client()
+
+
+def test_un_lote_no_inicia_mientras_se_descarga_el_zip(aplicacion, cliente):
+    import generation_jobs
+
+    descarga = cliente.post('/api/generate-all-invitations/zip', json=EVENTO, buffered=False)
+    assert descarga.status_code == 200
+    try:
+        lote = cliente.post('/api/generate-all-invitations', json=EVENTO)
+        assert lote.status_code == 409
+        # No hay trabajo que seguir en /api/jobs
+        assert 'job_id' not in lote.get_json()
+        assert cliente.post('/api/generate-all-invitations/zip', json=EVENTO).status_code == 409
+
+        contenido = b''.join(descarga.response)
+    finally:
+        descarga.close()
+
+    with zipfile.ZipFile(io.BytesIO(contenido)) as archivo:
+        assert len(archivo.namelist()) == 2
+    assert generation_jobs.active_job() is None
+
+
+def test_la_descarga_zip_no_inicia_durante_un_lote(aplicacion, cliente, monkeypatch):
+    import generation_jobs
+
+    # El lote espera a que la prueba lo libere: sigue en curso al pedir el ZIP
+    liberar = threading.Event()
+    generate_dossiers = generation_jobs.generate_dossiers
+
+    def _retenido(*args, **kwargs):
+        assert liberar.wait(timeout=60)
+        yield from generate_dossiers(*args, **kwargs)
+
+    monkeypatch.setattr(generation_jobs, 'generate_dossiers', _retenido)
+
+    inicio = cliente.post('/api/generate-all-invitations', json=EVENTO)
+    assert inicio.status_code == 202
+    job = generation_jobs.get_job(inicio.get_json()['job_id'])
+    try:
+        descarga = cliente.post('/api/generate-all-invitations/zip', json=EVENTO)
+        assert descarga.status_code == 409
+        assert descarga.get_json()['job_id'] == job.id
+    finally:
+        liberar.set()
+        job.join(timeout=60)
+    assert job.estado == generation_jobs.COMPLETADO, job.error
+    assert job.generated_count == 2
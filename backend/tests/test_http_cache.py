@@ -0,0 +1,88 @@
+"""ETag, 304 y gzip de las lecturas de invitados (http_cache.versioned)."""
+
+import gzip
+
+import pytest
+
+INVITADOS = 30
+
+
+@pytest.fixture
+def cliente(aplicacion):
+    with aplicacion.app.app_context():
+        aplicacion.Invitado.query.delete()
+        for i in range(INVITADOS):
+            invitado = aplicacion.Invitado(
+                nombre_completo=f"Dra. Invitada de Prueba {i}",
+                puesto_completo='Coordinadora de Posgrado',
+                institucion='Instituto Tecnológico de Morelia',
+                caracter_invitacion='jurado',
+            )
+            invitado.compute_jurado_flags()
+            aplicacion.db.session.add(invitado)
+        aplicacion.db.session.commit()
+    # Como las rutas que escriben: los datos cambiaron
+    aplicacion.data_version.bump()
+    return aplicacion.app.test_client()
+
+
+def _primer_id(cliente):
+    return cliente.get('/api/invitados').get_json()[0]['id']
+
+
+def test_304_con_el_etag_vigente(cliente):
+    primera = cliente.get('/api/invitados')
+    assert primera.status_code == 200
+    assert primera.headers['Cache-Control'] == 'no-cache'
+    etag = primera.headers['ETag']
+    assert etag.startswith('W/')
+
+    revalidada = cliente.get('/api/invitados', headers={'If-None-Match': etag})
+    assert revalidada.status_code == 304
+    assert revalidada.data == b''
+    assert revalidada.headers['ETag'] == etag
+
+
+@pytest.mark.parametrize('escritura', ['crear', 'editar', 'eliminar'])
+def test_una_escritura_cambia_el_etag(cliente, escritura):
+    etag = cliente.get('/api/invitados').headers['ETag']
+
+    invitado_id = _primer_id(cliente)
+    if escritura == 'crear':
+        respuesta = cliente.post('/api/invitados', json={'nombre_completo': 'Nuevo', 'caracter_invitacion': 'jurado'})
+    elif escritura == 'editar':
+        respuesta = cliente.put(f'/api/invitados/{invitado_id}', json={'institucion': 'UNAM'})
+    else:
+        respuesta = cliente.delete(f'/api/invitados/{invitado_id}')
+    assert respuesta.status_code in (200, 201)
+
+    despues = cliente.get('/api/invitados', headers={'If-None-Match': etag})
+    assert despues.status_code == 200
+    assert despues.headers['ETag'] != etag
+    total = INVITADOS + {'crear': 1, 'editar': 0, 'eliminar': -1}[escritura]
+    assert len(despues.get_json()) == total
+
+
+def test_gzip_solo_si_el_cliente_lo_acepta(cliente):
+    normal = cliente.get('/api/invitados')
+    assert len(normal.data) > 1024
+    assert 'Content-Encoding' not in normal.headers
+    assert 'Accept-Encoding' in normal.headers['Vary']
+
+    comprimida = cliente.get('/api/invitados', headers={'Accept-Encoding': 'gzip'})
+    assert comprimida.headers['Content-Encoding'] == 'gzip'
+    assert len(comprimida.data) < len(normal.data)
+    assert gzip.decompress(comprimida.data) == normal.data
+    # El mismo ETag: es el mismo contenido
+    assert comprimida.headers['ETag'] == normal.headers['ETag']
+
+
+def test_gzip_solo_por_encima_del_minimo(cliente):
+    import http_cache
+
+    # Un solo invitado ocupa menos del mínimo
+    respuesta = cliente.get(f'/api/invitados/{_primer_id(cliente)}', headers={'Accept-Encoding': 'gzip'})
+    assert respuesta.status_code == 200
+    assert len(respuesta.data) < http_cache.GZIP_MIN_BYTES
+    assert 'Content-Encoding' not in respuesta.headers
+    assert respuesta.get_json()['nombre_completo'].startswith('Dra. Invitada')
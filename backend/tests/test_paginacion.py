@@ -0,0 +1,87 @@
+"""Paginación por cursor (keyset) de la lista de invitados y de las rutas por rol."""
+
+import base64
+import json
+
+import pytest
+
+# Pocos valores distintos: muchas filas comparten la clave de orden y el id desempata
+NOMBRES = ['Ana Pérez', 'ANA PÉREZ', 'Bruno Díaz', 'Carla Ruiz']
+INSTITUCIONES = ['ITM', 'itm', 'UNAM', None, '']
+INVITADOS = 37
+LIMITE = 5
+
+
+@pytest.fixture
+def cliente(aplicacion):
+    with aplicacion.app.app_context():
+        aplicacion.Invitado.query.delete()
+        for i in range(INVITADOS):
+            invitado = aplicacion.Invitado(
+                nombre_completo=NOMBRES[i % len(NOMBRES)],
+                institucion=INSTITUCIONES[i % len(INSTITUCIONES)],
+                caracter_invitacion='jurado',
+                es_asesor_t1=i % 3 == 0,
+            )
+            invitado.compute_jurado_flags()
+            aplicacion.db.session.add(invitado)
+        aplicacion.db.session.commit()
+    return aplicacion.app.test_client()
+
+
+def _recorrer(cliente, ruta, sort):
+    """Todas las páginas de `ruta` siguiendo el cursor; devuelve (invitados, total)."""
+    invitados = []
+    parametros = {'sort': sort, 'limit': LIMITE}
+    for _ in range(INVITADOS + 1):
+        respuesta = cliente.get(ruta, query_string=parametros)
+        assert respuesta.status_code == 200, respuesta.get_json()
+        pagina = respuesta.get_json()
+        assert len(pagina['invitados']) <= LIMITE
+        invitados.extend(pagina['invitados'])
+        if pagina['siguiente'] is None:
+            return invitados, pagina['total']
+        parametros['cursor'] = pagina['siguiente']
+    pytest.fail(f"{ruta} ?sort={sort}: el cursor no llega a la última página")
+
+
+def _clave(invitado, sort):
+    campo = sort.lstrip('-')
+    if campo == 'id':
+        return invitado['id']
+    # Mismo orden que en SQL: en minúsculas (lower() de SQLite solo cambia ASCII) y sin nulos
+    return ''.join(c.lower() if c.isascii() else c for c in invitado[campo] or '')
+
+
+@pytest.mark.parametrize('ruta', ['/api/invitados', '/api/invitados/asesores_t1', '/api/invitados/jurados_protocolo'])
+@pytest.mark.parametrize('sort', ['id', '-id', 'nombre_completo', '-nombre_completo', 'institucion', '-institucion'])
+def test_el_cursor_recorre_todas_las_filas_una_vez(cliente, ruta, sort):
+    esperados = {invitado['id'] for invitado in cliente.get(ruta).get_json()}
+    invitados, total = _recorrer(cliente, ruta, sort)
+
+    ids = [invitado['id'] for invitado in invitados]
+    assert len(ids) == len(set(ids)), "hay invitados repetidos entre páginas"
+    assert set(ids) == esperados, "faltan invitados"
+    assert total == len(esperados)
+
+    descendente = sort.startswith('-')
+    claves = [(_clave(invitado, sort), invitado['id']) for invitado in invitados]
+    assert claves == sorted(claves, reverse=descendente)
+
+
+def _cursor(valor):
+    return base64.urlsafe_b64encode(valor).decode('ascii')
+
+
+@pytest.mark.parametrize('cursor', [
+    'esto no es base64',
+    _cursor(b'no es json'),
+    _cursor(b'\xff\xfe'),
+    _cursor(json.dumps([1]).encode()),
+    _cursor(json.dumps(['ana', 'abc']).encode()),
+    _cursor(json.dumps({'valor': 'ana', 'id': 3}).encode()),
+])
+def test_un_cursor_malformado_responde_400(cliente, cursor):
+    respuesta = cliente.get('/api/invitados', query_string={'sort': 'nombre_completo', 'cursor': cursor})
+    assert respuesta.status_code == 400
+    assert respuesta.get_json()['error'] == "El cursor no es válido"
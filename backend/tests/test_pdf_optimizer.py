@@ -0,0 +1,16 @@
+"""Nivel de optimización configurado por entorno."""
+
+import pytest
+
+import pdf_optimizer
+
+
+@pytest.mark.parametrize('valor', ['abc', '7', '-1', ''])
+def test_nivel_invalido_usa_el_nivel_por_defecto(monkeypatch, valor):
+    monkeypatch.setenv('JPI_PDF_OPTIMIZATION', valor)
+    assert pdf_optimizer._configured_level() == pdf_optimizer.DEFAULT_OPTIMIZATION
+
+
+def test_nivel_valido(monkeypatch):
+    monkeypatch.setenv('JPI_PDF_OPTIMIZATION', '2')
+    assert pdf_optimizer._configured_level() == 2
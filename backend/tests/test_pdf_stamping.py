@@ -0,0 +1,74 @@
+"""Motor de estampado con una plantilla que filtra un campo."""
+
+import io
+import zipfile
+
+import pytest
+
+EVENTO = {
+    'anio': '2025',
+    'periodo': '1',
+    'edicion_evento': '8',
+    'fecha_evento': '28 de mayo de 2025',
+    'fecha_carta': '1 de mayo de 2025',
+}
+INVITADO = {
+    'id': 1,
+    'nombre_completo': 'Dra. Ana María López',
+    'puesto_completo': 'Jefa del Departamento de Sistemas',
+    'institucion': 'Instituto Tecnológico de Morelia',
+    'abreviacion_org': 'ITM',
+    'caracter_invitacion': 'jurado',
+}
+
+
+@pytest.fixture
+def plantilla_con_filtro(archivos_base, tmp_path, monkeypatch):
+    """La plantilla de muestra con `{{ nombre_completo|upper }}` en lugar de `{{ nombre_completo }}`."""
+    import pdf_stamping
+    import document_generator
+
+    origen = archivos_base / 'plantilla_base.docx'
+    destino = tmp_path / 'plantilla_filtro.docx'
+    with zipfile.ZipFile(origen) as entrada, zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED) as salida:
+        for info in entrada.infolist():
+            datos = entrada.read(info.filename)
+            if info.filename == 'word/document.xml':
+                assert b'<w:t>nombre_completo</w:t>' in datos
+                datos = datos.replace(b'<w:t>nombre_completo</w:t>', b'<w:t>nombre_completo|upper</w:t>')
+            salida.writestr(info, datos)
+    monkeypatch.setattr(pdf_stamping, '_find_template', lambda: str(destino))
+    monkeypatch.setattr(document_generator, '_find_template', lambda: str(destino))
+    return destino
+
+
+def test_un_campo_filtrado_se_genera_con_word(plantilla_con_filtro, tmp_path, monkeypatch):
+    import fitz
+    import pdf_stamping
+
+    engine = pdf_stamping.StampEngine(EVENTO).prepare()
+    assert engine.filtered_fields == ('nombre_completo',)
+    assert 'puesto_completo' in engine.stamp_fields
+    with pytest.raises(pdf_stamping.FilteredField):
+        engine.render_letter(INVITADO)
+    # Sin valor en el campo filtrado no hay nada que difiera de Word
+    assert engine.render_letter({**INVITADO, 'nombre_completo': ''}).startswith(b'%PDF')
+
+    con_word = []
+    generate_full_dossier = pdf_stamping.generate_full_dossier
+
+    def _con_word(invitado_data, *args, **kwargs):
+        con_word.append(invitado_data['id'])
+        return generate_full_dossier(invitado_data, *args, **kwargs)
+
+    monkeypatch.setattr(pdf_stamping, 'generate_full_dossier', _con_word)
+    salida = tmp_path / 'salida'
+    salida.mkdir()
+    resultado, = pdf_stamping.generate_stamped_dossiers([INVITADO], EVENTO, str(salida))
+
+    assert resultado['success'], resultado.get('error')
+    assert con_word == [1]
+    with fitz.open(resultado['path']) as pdf:
+        texto = pdf[0].get_text()
+    # El nombre con el filtro aplicado, como lo escribe Word
+    assert INVITADO['nombre_completo'].upper() in texto
@@ -0,0 +1,128 @@
+"""
+Planes de consulta de la lista de invitados y de las rutas por rol.
+
+Llama a cada ruta (tal cual y paginada en cada orden) sobre invitados
+sintéticos y revisa con EXPLAIN QUERY PLAN cada consulta que hace sobre la
+tabla `invitado`. Falla si alguna filtra recorriendo la tabla completa sin
+índice, ordena en una tabla temporal filas que no seleccionó el índice del rol
+o, en una ruta por rol, ninguna de sus consultas usa el índice parcial de ese
+rol. Una consulta sin filtros (la lista completa) sí puede recorrer la tabla
+en el orden de la clave primaria.
+
+Cuando un rol abarca a la mayoría de los invitados, SQLite prefiere (con razón)
+recorrer la tabla. Por eso cada ruta se revisa con datos en los que su rol es
+minoría: los asesores con pocos asesores y los jurados (que son los que no son
+asesores) con muchos.
+"""
+
+import pytest
+from sqlalchemy import event
+
+INVITADOS = 2000
+SEMILLA = 2025
+
+# Índice parcial que debe usar cada filtro por rol
+INDICES_POR_ROL = {
+    '/api/invitados/asesores_t1': 'ix_invitado_es_asesor_t1',
+    '/api/invitados/asesores_t2': 'ix_invitado_es_asesor_t2',
+    '/api/invitados/jurados_protocolo': 'ix_invitado_jurado_protocolo',
+    '/api/invitados/jurados_informe': 'ix_invitado_jurado_informe',
+}
+ORDENES = ['id', 'nombre_completo', '-nombre_completo', 'institucion', '-institucion']
+
+# (probabilidad de ser asesor, rutas que se revisan con esos datos)
+ESCENARIOS = {
+    'asesores_en_minoria': (0.3, ['/api/invitados', '/api/invitados/asesores_t1', '/api/invitados/asesores_t2']),
+    'jurados_en_minoria': (0.8, ['/api/invitados/jurados_protocolo', '/api/invitados/jurados_informe']),
+}
+
+
+def _consultas_de_prueba(rutas):
+    """(ruta, parámetros, paginar, índice esperado): cada ruta tal cual y paginada en cada orden."""
+    casos = [(ruta, {}, False, INDICES_POR_ROL.get(ruta)) for ruta in rutas]
+    if '/api/invitados' in rutas:
+        casos.append(('/api/invitados', {'rol': 'especial', 'limit': 20}, True, 'ix_invitado_es_invitado_especial'))
+    for ruta in rutas:
+        for orden in ORDENES:
+            casos.append((ruta, {'sort': orden, 'limit': 20}, True, INDICES_POR_ROL.get(ruta)))
+    return casos
+
+
+def _problemas(statement, plan, indice=None):
+    """
+    Pasos del plan que filtran `invitado` sin índice u ordenan en una tabla
+    temporal. Ordenar se permite solo sobre las filas que ya seleccionó el
+    índice parcial del rol (`indice`), que son la minoría de la tabla.
+    """
+    filtra = ' WHERE ' in ' '.join(statement.split())
+    por_indice_del_rol = indice is not None and any(indice in paso for paso in plan)
+    problemas = []
+    for paso in plan:
+        if paso.startswith('SCAN invitado') and 'USING' not in paso and filtra:
+            problemas.append(paso)
+        elif paso.startswith('USE TEMP B-TREE FOR ORDER BY') and not por_indice_del_rol:
+            problemas.append(paso)
+    return problemas
+
+
+@pytest.fixture
+def consultas(aplicacion):
+    """SELECTs sobre `invitado` que se ejecutan durante la prueba."""
+    capturadas = []
+
+    def _capturar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'FROM invitado' in statement:
+            capturadas.append((statement, parameters))
+
+    with aplicacion.app.app_context():
+        engine = aplicacion.db.engine
+    event.listen(engine, 'before_cursor_execute', _capturar)
+    yield capturadas
+    event.remove(engine, 'before_cursor_execute', _capturar)
+
+
+def _sembrar(aplicacion, prob_asesor):
+    """Reemplaza los invitados por unos sintéticos y actualiza las estadísticas del planificador."""
+    from bench_generacion import _invitados_sinteticos
+
+    with aplicacion.app.app_context():
+        aplicacion.Invitado.query.delete()
+        aplicacion.db.session.add_all(_invitados_sinteticos(aplicacion, INVITADOS, SEMILLA, prob_asesor))
+        aplicacion.db.session.commit()
+        # Después de cargar los datos, para que ANALYZE tenga estadísticas reales
+        aplicacion.asegurar_indices()
+        # Cada conexión carga las estadísticas al abrirse: las del pool que
+        # abrieron otras pruebas conservarían las anteriores
+        aplicacion.db.engine.dispose()
+
+
+@pytest.mark.parametrize('escenario', ESCENARIOS)
+def test_consultas_usan_indices(aplicacion, consultas, escenario):
+    prob_asesor, rutas = ESCENARIOS[escenario]
+    _sembrar(aplicacion, prob_asesor)
+    cliente = aplicacion.app.test_client()
+    with aplicacion.app.app_context():
+        engine = aplicacion.db.engine
+
+    fallas = []
+    for ruta, parametros, paginar, indice in _consultas_de_prueba(rutas):
+        consultas.clear()
+        respuesta = cliente.get(ruta, query_string=parametros)
+        assert respuesta.status_code == 200, f"{ruta} {parametros}: HTTP {respuesta.status_code}"
+        if paginar and respuesta.get_json()['siguiente']:
+            # La segunda página ejercita el filtro del cursor
+            cliente.get(ruta, query_string={**parametros, 'cursor': respuesta.get_json()['siguiente']})
+        assert consultas, f"{ruta} {parametros}: no se capturó ninguna consulta"
+
+        usa_indice = False
+        with engine.connect() as conexion:
+            for statement, parameters in consultas:
+                plan = [fila[3] for fila in conexion.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+                usa_indice = usa_indice or any(indice and indice in paso for paso in plan)
+                problemas = _problemas(statement, plan, indice)
+                if problemas:
+                    fallas.append(f"{ruta} {parametros}: {' | '.join(plan)}")
+        if indice and not usa_indice:
+            fallas.append(f"{ruta} {parametros}: ninguna consulta usa {indice}")
+
+    assert not fallas, "Consultas sin índice:\n" + '\n'.join(fallas)
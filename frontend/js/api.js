@@ -6,12 +6,17 @@ const API_CONFIG = {
   BASE_URL: "http://127.0.0.1:5000",
   ENDPOINTS: {
     INVITADOS: "/api/invitados",
+    ESTADISTICAS: "/api/invitados/estadisticas",
+    BUSCAR: "/api/invitados/buscar",
     GENERAR_INVITACIONES: "/api/invitaciones/generar",
   },
   MAX_RETRIES: 5,
   RETRY_DELAY: 1000,
 };
 
+// Invitados por página en la lista
+const INVITADOS_POR_PAGINA = 100;
+
 // ========== FUNCIONES DE INVITADOS ==========
 
 /**
@@ -49,6 +54,72 @@ async function obtenerInvitados(retryCount = 0) {
   }
 }
 
+/**
+ * Busca invitados por nombre, puesto, institución, abreviación o nota (sin distinguir acentos)
+ * @param {Object} params - { q, limit, offset, nota }
+ * @returns {Promise<Object>} - { invitados, total, limit, offset, siguiente, por_relevancia }
+ */
+async function buscarInvitados(params = {}) {
+  const query = new URLSearchParams();
+  Object.entries(params).forEach(([clave, valor]) => {
+    if (valor !== null && valor !== undefined && valor !== "") {
+      query.set(clave, valor);
+    }
+  });
+  if (!query.has("limit")) query.set("limit", INVITADOS_POR_PAGINA);
+
+  const response = await fetch(
+    `${API_CONFIG.BASE_URL}${API_CONFIG.ENDPOINTS.BUSCAR}?${query}`
+  );
+
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+
+  return await response.json();
+}
+
+/**
+ * Obtiene los conteos por rol y sus desgloses por institución y por invitado especial
+ * @returns {Promise<Object>} - { total, asesores_t1, ..., por_institucion, por_especial }
+ */
+async function obtenerEstadisticas() {
+  const response = await fetch(
+    `${API_CONFIG.BASE_URL}${API_CONFIG.ENDPOINTS.ESTADISTICAS}`
+  );
+
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+
+  return await response.json();
+}
+
+/**
+ * Consulta una página de invitados con filtros y orden resueltos en el servidor
+ * @param {Object} params - { rol, sort, limit, cursor } y filtros por bandera
+ * @returns {Promise<Object>} - { invitados, total, limit, siguiente }
+ */
+async function consultarInvitados(params = {}) {
+  const query = new URLSearchParams();
+  Object.entries(params).forEach(([clave, valor]) => {
+    if (valor !== null && valor !== undefined && valor !== "") {
+      query.set(clave, valor);
+    }
+  });
+  if (!query.has("limit")) query.set("limit", INVITADOS_POR_PAGINA);
+
+  const response = await fetch(
+    `${API_CONFIG.BASE_URL}${API_CONFIG.ENDPOINTS.INVITADOS}?${query}`
+  );
+
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+
+  return await response.json();
+}
+
 /**
  * Crea un nuevo invitado
  * @param {Object} data - Datos del invitado
@@ -163,6 +234,86 @@ async function generateSingleInvitation(id, data) {
   return await response.json();
 }
 
+/**
+ * Inicia la generación de todas las invitaciones en segundo plano
+ * @param {Object} data - Datos del evento
+ * @returns {Promise<Object>} - { job_id, total, output_folder, message }
+ */
+async function iniciarGeneracion(data) {
+  const response = await fetch(
+    `${API_CONFIG.BASE_URL}/api/generate-all-invitations`,
+    {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify(data),
+    }
+  );
+
+  const result = await response.json();
+  if (!response.ok) {
+    const error = new Error(result.error || `HTTP error! status: ${response.status}`);
+    error.jobId = result.job_id; // Trabajo ya en curso (409)
+    throw error;
+  }
+
+  return result;
+}
+
+/**
+ * Obtiene el progreso de un trabajo de generación
+ * @param {string} jobId - ID del trabajo
+ * @returns {Promise<Object>} - Estado del trabajo
+ */
+async function obtenerTrabajo(jobId) {
+  const response = await fetch(`${API_CONFIG.BASE_URL}/api/jobs/${jobId}`);
+
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+
+  return await response.json();
+}
+
+/**
+ * Solicita la cancelación de un trabajo de generación
+ * @param {string} jobId - ID del trabajo
+ * @returns {Promise<Object>} - Estado del trabajo
+ */
+async function cancelarTrabajo(jobId) {
+  const response = await fetch(`${API_CONFIG.BASE_URL}/api/jobs/${jobId}`, {
+    method: "DELETE",
+  });
+
+  const result = await response.json();
+  if (!response.ok) {
+    throw new Error(result.error || `HTTP error! status: ${response.status}`);
+  }
+
+  return result;
+}
+
+/**
+ * Reanuda un lote interrumpido: solo genera los invitados que faltaban
+ * @param {string} jobId - ID del trabajo interrumpido
+ * @returns {Promise<Object>} - { job_id, reanuda, total, output_folder, message }
+ */
+async function reanudarTrabajo(jobId) {
+  const response = await fetch(`${API_CONFIG.BASE_URL}/api/jobs/${jobId}/resume`, {
+    method: "POST",
+  });
+
+  const result = await response.json();
+  if (!response.ok) {
+    const error = new Error(result.error || `HTTP error! status: ${response.status}`);
+    error.jobId = result.job_id; // Trabajo ya en curso (409)
+    throw error;
+  }
+
+  return result;
+}
+
 /**
  * Opens a dialog to select a directory.
  * @returns {Promise<string|null>} - The selected directory path or null if canceled.
@@ -179,11 +330,18 @@ async function selectDirectory() {
 // Exportar para uso global
 window.API = {
   obtenerInvitados,
+  consultarInvitados,
+  buscarInvitados,
+  obtenerEstadisticas,
   crearInvitado,
   actualizarInvitado,
   eliminarInvitado,
   generarInvitaciones,
   generateSingleInvitation, // <-- Añadido
+  iniciarGeneracion,
+  obtenerTrabajo,
+  cancelarTrabajo,
+  reanudarTrabajo,
   selectDirectory, // <-- Añadido
   CONFIG: API_CONFIG,
 };
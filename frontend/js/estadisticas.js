@@ -1,102 +1,43 @@
 // ========== MÓDULO DE ESTADÍSTICAS ==========
-// Calcula y actualiza las estadísticas de invitados
+// Muestra las estadísticas de invitados, calculadas en el backend
+
+// Tarjeta de cada conteo
+const TARJETAS_ESTADISTICAS = {
+  total: "stat-total",
+  asesores_t1: "stat-t1",
+  asesores_t2: "stat-t2",
+  jurados_protocolo: "stat-protocolo",
+  jurados_informe: "stat-informe",
+  jurados_ambos: "stat-ambos",
+};
 
 /**
  * Actualiza todas las estadísticas
- * @param {Array} invitados - Array de invitados (opcional, si no se pasa usa los de InvitadosLista)
  */
-function actualizarEstadisticas(invitados = null) {
-  // Obtener invitados
-  let invitadosData = invitados;
-  if (!invitadosData && window.InvitadosLista) {
-    invitadosData = window.InvitadosLista.obtenerInvitados();
-  }
-
-  if (!invitadosData || invitadosData.length === 0) return;
-
-  // Total de invitados
-  const statTotal = document.getElementById("stat-total");
-  if (statTotal) {
-    statTotal.textContent = invitadosData.length;
-  }
-
-  // Asesores T1
-  const t1Count = invitadosData.filter((inv) => inv.es_asesor_t1).length;
-  const statT1 = document.getElementById("stat-t1");
-  if (statT1) {
-    statT1.textContent = t1Count;
-  }
-
-  // Asesores T2
-  const t2Count = invitadosData.filter((inv) => inv.es_asesor_t2).length;
-  const statT2 = document.getElementById("stat-t2");
-  if (statT2) {
-    statT2.textContent = t2Count;
-  }
-
-  // Jurados Protocolo
-  const protocoloCount = invitadosData.filter(
-    (inv) => inv.puede_ser_jurado_protocolo
-  ).length;
-  const statProtocolo = document.getElementById("stat-protocolo");
-  if (statProtocolo) {
-    statProtocolo.textContent = protocoloCount;
-  }
-
-  // Jurados Informe
-  const informeCount = invitadosData.filter(
-    (inv) => inv.puede_ser_jurado_informe
-  ).length;
-  const statInforme = document.getElementById("stat-informe");
-  if (statInforme) {
-    statInforme.textContent = informeCount;
-  }
-
-  // Ambos jurados (protocolo E informe)
-  const ambosCount = invitadosData.filter(
-    (inv) => inv.puede_ser_jurado_protocolo && inv.puede_ser_jurado_informe
-  ).length;
-  const statAmbos = document.getElementById("stat-ambos");
-  if (statAmbos) {
-    statAmbos.textContent = ambosCount;
-  }
+async function actualizarEstadisticas() {
+  let estadisticas;
+  try {
+    estadisticas = await obtenerEstadisticas();
+  } catch (error) {
+    console.error("Error al obtener las estadísticas:", error);
+    return;
+  }
+
+  Object.entries(TARJETAS_ESTADISTICAS).forEach(([clave, id]) => {
+    const elemento = document.getElementById(id);
+    if (elemento) {
+      elemento.textContent = estadisticas[clave];
+    }
+  });
 }
 
 /**
- * Obtiene estadísticas en formato objeto
- * @param {Array} invitados - Array de invitados
- * @returns {Object} Objeto con todas las estadísticas
+ * Obtiene las estadísticas del backend
+ * @returns {Promise<Object>} Conteos por rol (total, asesores_t1, asesores_t2, jurados_protocolo,
+ *   jurados_informe, jurados_ambos) y sus desgloses por_institucion y por_especial
  */
-function obtenerEstadisticas(invitados = null) {
-  let invitadosData = invitados;
-  if (!invitadosData && window.InvitadosLista) {
-    invitadosData = window.InvitadosLista.obtenerInvitados();
-  }
-
-  if (!invitadosData || invitadosData.length === 0) {
-    return {
-      total: 0,
-      asesoresT1: 0,
-      asesoresT2: 0,
-      juradosProtocolo: 0,
-      juradosInforme: 0,
-      juradosAmbos: 0,
-    };
-  }
-
-  return {
-    total: invitadosData.length,
-    asesoresT1: invitadosData.filter((inv) => inv.es_asesor_t1).length,
-    asesoresT2: invitadosData.filter((inv) => inv.es_asesor_t2).length,
-    juradosProtocolo: invitadosData.filter(
-      (inv) => inv.puede_ser_jurado_protocolo
-    ).length,
-    juradosInforme: invitadosData.filter((inv) => inv.puede_ser_jurado_informe)
-      .length,
-    juradosAmbos: invitadosData.filter(
-      (inv) => inv.puede_ser_jurado_protocolo && inv.puede_ser_jurado_informe
-    ).length,
-  };
+async function obtenerEstadisticas() {
+  return await window.API.obtenerEstadisticas();
 }
 
 // Exportar para uso global
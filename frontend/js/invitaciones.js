@@ -10,8 +10,14 @@ let invitacionesState = {
   },
   archivosSubidos: false,
   generationMode: "todos", // 'todos' o 'individual'
+  trabajoActivo: null, // ID del trabajo de generación que se está siguiendo
 };
 
+// Clave de localStorage para reanudar el seguimiento tras recargar la página
+const TRABAJO_STORAGE_KEY = "jpi-trabajo-generacion";
+const TRABAJO_POLL_INTERVAL = 1000;
+const TRABAJO_MAX_FALLOS = 5;
+
 /**
  * Inicializa el módulo de invitaciones
  */
@@ -21,6 +27,7 @@ function inicializarInvitaciones() {
   configurarPeriodo();
   configurarModoGeneracion();
   cargarInvitadosParaSelector();
+  reanudarTrabajoEnCurso();
 }
 
 /**
@@ -264,7 +271,37 @@ async function generarInvitaciones() {
     }
   }
 
-  // 2. Bloquear UI y mostrar progreso
+  // Dossier completo, solo cartas con anexo compartido o tiraje de impresión
+  const salida = document.getElementById("tipo-salida")?.value || "dossieres";
+
+  // 2. Todos los invitados: la generación corre en segundo plano en el servidor
+  if (invitacionesState.generationMode !== "individual") {
+    try {
+      const inicio = await window.API.iniciarGeneracion({
+        ...eventData,
+        salida,
+        incremental:
+          salida !== "impresion" &&
+          (document.getElementById("generacion-incremental")?.checked || false),
+      });
+      seguirTrabajo(inicio.job_id);
+    } catch (error) {
+      if (error.jobId) {
+        // Ya hay una generación en curso: se muestra su progreso
+        seguirTrabajo(error.jobId);
+        return;
+      }
+      console.error("Error al generar invitaciones:", error);
+      window.UI.mostrarModal(
+        "❌ Error de Generación",
+        `No se pudieron generar las invitaciones: ${error.message}`,
+        "❌"
+      );
+    }
+    return;
+  }
+
+  // 3. Un solo invitado: bloquear UI y mostrar progreso
   const btnGenerar = document.getElementById("btn-generar");
   btnGenerar.disabled = true;
 
@@ -275,26 +312,16 @@ async function generarInvitaciones() {
   document.body.appendChild(progressOverlay);
 
   try {
-    let result;
-    if (invitacionesState.generationMode === "individual") {
-      result = await window.API.generateSingleInvitation(invitadoId, eventData);
-    } else {
-      const response = await fetch(
-        "http://127.0.0.1:5000/api/generate-all-invitations",
-        {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify(eventData),
-        }
-      );
-      result = await response.json();
-      if (!response.ok) throw new Error(result.error || "Error en el servidor");
-    }
+    const result = await window.API.generateSingleInvitation(invitadoId, {
+      ...eventData,
+      salida,
+    });
 
     const successMessage = `
       <div style="text-align: left;">
         <p style="font-size: 18px; margin-bottom: 15px;">✅ <strong>${result.message}</strong></p>
         <p style="margin: 10px 0;"><strong>📂 Ubicación:</strong><br><code class="code-block">${result.output_folder}</code></p>
+        ${result.anexo ? `<p style="margin: 10px 0;"><strong>📎 Anexo compartido:</strong><br><code class="code-block">${result.anexo}</code></p>` : ""}
       </div>`;
     window.UI.mostrarModal("✅ Generación Completada", successMessage, "✅");
   } catch (error) {
@@ -305,12 +332,218 @@ async function generarInvitaciones() {
       "❌"
     );
   } finally {
-    // 5. Desbloquear UI
+    // 4. Desbloquear UI
     btnGenerar.disabled = false;
     document.body.removeChild(progressOverlay);
   }
 }
 
+/**
+ * Si al cargar la página había una generación en curso, vuelve a mostrar su progreso
+ */
+async function reanudarTrabajoEnCurso() {
+  const jobId = localStorage.getItem(TRABAJO_STORAGE_KEY);
+  if (!jobId || invitacionesState.trabajoActivo) return;
+
+  try {
+    const trabajo = await window.API.obtenerTrabajo(jobId);
+    if (["pendiente", "en_curso"].includes(trabajo.estado)) {
+      seguirTrabajo(jobId);
+    } else if (trabajo.estado === "interrumpido" && trabajo.diario) {
+      // La aplicación se cerró a mitad del lote: se ofrece continuar donde se quedó
+      localStorage.removeItem(TRABAJO_STORAGE_KEY);
+      window.UI.mostrarConfirmacion(
+        "⏯️ Generación interrumpida",
+        `${trabajo.message}. ¿Deseas reanudarla? Solo se generarán las invitaciones que faltan.`,
+        () => reanudarGeneracion(jobId)
+      );
+    } else {
+      localStorage.removeItem(TRABAJO_STORAGE_KEY);
+    }
+  } catch (error) {
+    console.error("No se pudo consultar la generación anterior:", error);
+    localStorage.removeItem(TRABAJO_STORAGE_KEY);
+  }
+}
+
+/**
+ * Reanuda un lote interrumpido y muestra su progreso
+ * @param {string} jobId - ID del trabajo interrumpido
+ */
+async function reanudarGeneracion(jobId) {
+  try {
+    const inicio = await window.API.reanudarTrabajo(jobId);
+    seguirTrabajo(inicio.job_id);
+  } catch (error) {
+    if (error.jobId) {
+      seguirTrabajo(error.jobId);
+      return;
+    }
+    console.error("Error al reanudar la generación:", error);
+    window.UI.mostrarModal(
+      "❌ Error de Generación",
+      `No se pudo reanudar la generación: ${error.message}`,
+      "❌"
+    );
+  }
+}
+
+/**
+ * Muestra el progreso de un trabajo de generación hasta que termine
+ * @param {string} jobId - ID del trabajo
+ */
+function seguirTrabajo(jobId) {
+  if (invitacionesState.trabajoActivo === jobId) return;
+  invitacionesState.trabajoActivo = jobId;
+  localStorage.setItem(TRABAJO_STORAGE_KEY, jobId);
+
+  const btnGenerar = document.getElementById("btn-generar");
+  if (btnGenerar) btnGenerar.disabled = true;
+
+  const modalOverlay = document.createElement("div");
+  modalOverlay.className = "modal-overlay show";
+  modalOverlay.innerHTML = `
+    <div class="modal-progress">
+      <div class="modal-header-progress">
+        <h3>📄 Generando Invitaciones</h3>
+      </div>
+      <div class="modal-body-progress">
+        <p class="progress-percentage">0%</p>
+        <div class="progress-bar-large">
+          <div class="progress-fill-large"></div>
+        </div>
+        <p class="progress-status">Preparando generación...</p>
+        <p class="progress-detalle"></p>
+        <button class="btn btn-secondary" id="btn-cancelar-generacion">
+          🛑 Cancelar
+        </button>
+      </div>
+    </div>
+  `;
+  document.body.appendChild(modalOverlay);
+
+  const btnCancelar = modalOverlay.querySelector("#btn-cancelar-generacion");
+  btnCancelar.addEventListener("click", async () => {
+    btnCancelar.disabled = true;
+    btnCancelar.textContent = "Cancelando...";
+    try {
+      await window.API.cancelarTrabajo(jobId);
+    } catch (error) {
+      // El trabajo pudo haber terminado justo antes; el sondeo mostrará el resultado
+      console.error("Error al cancelar la generación:", error);
+    }
+  });
+
+  let fallos = 0;
+  const terminar = () => {
+    invitacionesState.trabajoActivo = null;
+    localStorage.removeItem(TRABAJO_STORAGE_KEY);
+    if (btnGenerar) btnGenerar.disabled = false;
+    if (document.body.contains(modalOverlay)) {
+      document.body.removeChild(modalOverlay);
+    }
+  };
+
+  const consultar = async () => {
+    let trabajo;
+    try {
+      trabajo = await window.API.obtenerTrabajo(jobId);
+      fallos = 0;
+    } catch (error) {
+      console.error("Error al consultar el progreso:", error);
+      if (++fallos >= TRABAJO_MAX_FALLOS) {
+        terminar();
+        window.UI.mostrarModal(
+          "❌ Error de Generación",
+          `Se perdió la conexión con el servidor: ${error.message}`,
+          "❌"
+        );
+        return;
+      }
+      setTimeout(consultar, TRABAJO_POLL_INTERVAL);
+      return;
+    }
+
+    actualizarProgreso(modalOverlay, trabajo);
+    if (["pendiente", "en_curso"].includes(trabajo.estado)) {
+      setTimeout(consultar, TRABAJO_POLL_INTERVAL);
+      return;
+    }
+
+    terminar();
+    mostrarResultadoTrabajo(trabajo);
+  };
+
+  consultar();
+}
+
+/**
+ * Actualiza la barra y los textos del modal de progreso
+ */
+function actualizarProgreso(modalOverlay, trabajo) {
+  const porcentaje = trabajo.total
+    ? Math.round((trabajo.procesados / trabajo.total) * 100)
+    : 0;
+  modalOverlay.querySelector(".progress-percentage").textContent = `${porcentaje}%`;
+  modalOverlay.querySelector(".progress-fill-large").style.width = `${porcentaje}%`;
+
+  let estado = `${trabajo.procesados} de ${trabajo.total} invitaciones`;
+  if (trabajo.cancelacion_solicitada) {
+    estado = `Cancelando... (${estado})`;
+  } else if (trabajo.invitado_actual) {
+    estado += `<br>📝 ${trabajo.invitado_actual}`;
+  }
+  modalOverlay.querySelector(".progress-status").innerHTML = estado;
+
+  const detalles = [];
+  if (trabajo.eta_segundos !== null && trabajo.eta_segundos !== undefined) {
+    detalles.push(`⏱️ Tiempo restante: ${formatearDuracion(trabajo.eta_segundos)}`);
+  }
+  if (trabajo.omitidos) {
+    detalles.push(`⏭️ ${trabajo.omitidos} sin cambios`);
+  }
+  if (trabajo.errors && trabajo.errors.length) {
+    detalles.push(`⚠️ ${trabajo.errors.length} con error`);
+  }
+  modalOverlay.querySelector(".progress-detalle").textContent = detalles.join("   ");
+}
+
+/**
+ * Convierte segundos a un texto corto (ej: "2 min 05 s")
+ */
+function formatearDuracion(segundos) {
+  const total = Math.max(0, Math.round(segundos));
+  const minutos = Math.floor(total / 60);
+  const resto = total % 60;
+  if (!minutos) return `${resto} s`;
+  return `${minutos} min ${String(resto).padStart(2, "0")} s`;
+}
+
+/**
+ * Muestra el modal final de un trabajo de generación
+ */
+function mostrarResultadoTrabajo(trabajo) {
+  const errores = (trabajo.errors || [])
+    .map((e) => `<li>${e.invitado}: ${e.error}</li>`)
+    .join("");
+  const mensaje = `
+    <div style="text-align: left;">
+      <p style="font-size: 18px; margin-bottom: 15px;"><strong>${trabajo.message}</strong></p>
+      <p style="margin: 10px 0;"><strong>📂 Ubicación:</strong><br><code class="code-block">${trabajo.output_folder}</code></p>
+      ${trabajo.tiraje ? `<p style="margin: 10px 0;"><strong>🖨️ Tiraje de impresión:</strong><br><code class="code-block">${trabajo.tiraje.path}</code></p>` : ""}
+      ${trabajo.anexo ? `<p style="margin: 10px 0;"><strong>📎 Anexo compartido:</strong><br><code class="code-block">${trabajo.anexo}</code></p>` : ""}
+      ${errores ? `<p style="margin: 10px 0;"><strong>⚠️ Errores:</strong></p><ul>${errores}</ul>` : ""}
+    </div>`;
+
+  if (trabajo.estado === "completado") {
+    window.UI.mostrarModal("✅ Generación Completada", mensaje, "✅");
+  } else if (trabajo.estado === "cancelado") {
+    window.UI.mostrarModal("⚠️ Generación Cancelada", mensaje, "⚠️");
+  } else {
+    window.UI.mostrarModal("❌ Error de Generación", mensaje, "❌");
+  }
+}
+
 /**
  * Limpia el formulario de invitaciones
  */
@@ -364,6 +597,21 @@ function configurarModoGeneracion() {
           "hidden",
           invitacionesState.generationMode !== "individual"
         );
+        document
+          .getElementById("incremental-container")
+          ?.classList.toggle(
+            "hidden",
+            invitacionesState.generationMode === "individual"
+          );
+        // El tiraje de impresión solo tiene sentido para todos los invitados
+        const tipoSalida = document.getElementById("tipo-salida");
+        if (tipoSalida) {
+          const individual = invitacionesState.generationMode === "individual";
+          tipoSalida.querySelector('option[value="impresion"]').disabled = individual;
+          if (individual && tipoSalida.value === "impresion") {
+            tipoSalida.value = "dossieres";
+          }
+        }
       });
     });
 }
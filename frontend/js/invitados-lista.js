@@ -3,22 +3,37 @@
 
 let invitadosData = [];
 let filtroActual = "todos";
+// Total de invitados que coinciden con el filtro y cursor de la página siguiente
+// (en una búsqueda, el desplazamiento de la página siguiente)
+let totalFiltro = 0;
+let cursorSiguiente = null;
+// Texto de búsqueda; mientras haya uno, la lista muestra sus coincidencias
+let textoBusqueda = "";
+// Número de la última consulta, para descartar respuestas que llegan tarde
+let consultaActual = 0;
 
 /**
- * Carga los invitados desde el backend
+ * Carga desde el backend la primera página de invitados del filtro actual
+ * (o de la búsqueda, si hay texto)
  */
 async function cargarInvitados() {
   const listaContainer = document.getElementById("lista-invitados");
   listaContainer.innerHTML = '<div class="loading">Cargando...</div>';
+  const consulta = ++consultaActual;
 
   try {
-    invitadosData = await window.API.obtenerInvitados();
+    const pagina = textoBusqueda
+      ? await window.API.buscarInvitados({ q: textoBusqueda, nota: true })
+      : await window.API.consultarInvitados(parametrosFiltro());
+    if (consulta !== consultaActual) return;
+    invitadosData = pagina.invitados;
+    totalFiltro = pagina.total;
+    cursorSiguiente = pagina.siguiente;
     mostrarInvitados(invitadosData);
-    actualizarContador();
 
     // Actualizar estadísticas si el módulo está disponible
     if (window.Estadisticas && window.Estadisticas.actualizar) {
-      window.Estadisticas.actualizar(invitadosData);
+      window.Estadisticas.actualizar();
     }
   } catch (error) {
     console.error("Error al obtener los invitados:", error);
@@ -26,6 +41,57 @@ async function cargarInvitados() {
   }
 }
 
+/**
+ * Agrega a la lista la página siguiente de invitados
+ */
+async function cargarMasInvitados() {
+  if (!cursorSiguiente) return;
+  const consulta = ++consultaActual;
+
+  try {
+    const pagina = textoBusqueda
+      ? await window.API.buscarInvitados({
+          q: textoBusqueda,
+          nota: true,
+          offset: cursorSiguiente,
+        })
+      : await window.API.consultarInvitados({
+          ...parametrosFiltro(),
+          cursor: cursorSiguiente,
+        });
+    if (consulta !== consultaActual) return;
+    invitadosData = invitadosData.concat(pagina.invitados);
+    totalFiltro = pagina.total;
+    cursorSiguiente = pagina.siguiente;
+    mostrarInvitados(invitadosData);
+  } catch (error) {
+    console.error("Error al obtener más invitados:", error);
+    mostrarError(error);
+  }
+}
+
+/**
+ * Parámetros de la consulta según el filtro activo (el filtrado se hace en el servidor).
+ * Las tarjetas muestran la nota, que el servidor solo envía si se pide.
+ */
+function parametrosFiltro() {
+  const params = { nota: true };
+  if (filtroActual !== "todos") params.rol = filtroActual;
+  return params;
+}
+
+/**
+ * Texto con las coincidencias de la búsqueda marcadas: se escapa todo el HTML
+ * y solo se conservan las marcas <mark> que agrega el backend
+ */
+function resaltar(texto) {
+  const div = document.createElement("div");
+  div.textContent = texto;
+  return div.innerHTML
+    .replaceAll("&lt;mark&gt;", "<mark>")
+    .replaceAll("&lt;/mark&gt;", "</mark>");
+}
+
 /**
  * Muestra error en la interfaz
  */
@@ -60,14 +126,14 @@ function mostrarError(error) {
  */
 function mostrarInvitados(invitados) {
   const listaContainer = document.getElementById("lista-invitados");
+  actualizarContador(totalFiltro);
 
-  // Filtrar según el filtro activo
-  const invitadosFiltrados = filtrarInvitados(invitados);
-
-  if (invitadosFiltrados.length === 0) {
+  if (invitados.length === 0) {
     listaContainer.innerHTML = `
       <div class="empty-state">
-        <p>📭 No hay invitados que coincidan con el filtro seleccionado.</p>
+        <p>📭 No hay invitados que coincidan con ${
+          textoBusqueda ? "la búsqueda" : "el filtro seleccionado"
+        }.</p>
       </div>
     `;
     return;
@@ -75,12 +141,21 @@ function mostrarInvitados(invitados) {
 
   listaContainer.innerHTML = "";
 
-  invitadosFiltrados.forEach((invitado) => {
+  invitados.forEach((invitado) => {
     const card = crearCardInvitado(invitado);
     listaContainer.appendChild(card);
   });
 
-  actualizarContador(invitadosFiltrados.length);
+  if (cursorSiguiente) {
+    const btnMas = document.createElement("button");
+    btnMas.className = "btn btn-secondary btn-cargar-mas";
+    btnMas.textContent = `⬇️ Cargar más (${invitados.length} de ${totalFiltro})`;
+    btnMas.addEventListener("click", () => {
+      btnMas.disabled = true;
+      cargarMasInvitados();
+    });
+    listaContainer.appendChild(btnMas);
+  }
 }
 
 /**
@@ -133,6 +208,22 @@ function crearCardInvitado(invitado) {
       '<span class="badge badge-especial">🌟 Invitado Especial</span>';
   }
 
+  // Coincidencias de la búsqueda: nombre resaltado y, si la coincidencia está
+  // en otro campo, el fragmento donde aparece
+  const nombreHTML = invitado.nombre_resaltado
+    ? resaltar(invitado.nombre_resaltado)
+    : invitado.nombre_completo;
+  let fragmentoHTML = "";
+  if (
+    invitado.fragmento &&
+    invitado.fragmento !== invitado.nombre_resaltado &&
+    invitado.fragmento.includes("<mark>")
+  ) {
+    fragmentoHTML = `<div class="fragmento-busqueda">🔎 ${resaltar(
+      invitado.fragmento
+    )}</div>`;
+  }
+
   // Nota opcional
   let notaHTML = "";
   if (invitado.nota && invitado.nota.trim() !== "") {
@@ -143,7 +234,7 @@ function crearCardInvitado(invitado) {
     <div class="card-content">
       <div class="card-line-1">
         <div class="card-line-1-left">
-          <h3 class="nombre">${invitado.nombre_completo}</h3>
+          <h3 class="nombre">${nombreHTML}</h3>
           <div class="roles">
             ${especialHTML}
             ${
@@ -155,6 +246,7 @@ function crearCardInvitado(invitado) {
         <span class="id-badge">ID: ${invitado.id}</span>
       </div>
       ${puestoHTML}
+      ${fragmentoHTML}
       <div class="caracter-line">
         <div class="caracter-invitacion">${
           invitado.caracter_invitacion || "Sin especificar"
@@ -183,25 +275,6 @@ function crearCardInvitado(invitado) {
   return card;
 }
 
-/**
- * Filtra invitados según el filtro actual
- */
-function filtrarInvitados(invitados) {
-  switch (filtroActual) {
-    case "asesor_t1":
-      return invitados.filter((inv) => inv.es_asesor_t1);
-    case "asesor_t2":
-      return invitados.filter((inv) => inv.es_asesor_t2);
-    case "jurado_protocolo":
-      return invitados.filter((inv) => inv.puede_ser_jurado_protocolo);
-    case "jurado_informe":
-      return invitados.filter((inv) => inv.puede_ser_jurado_informe);
-    case "todos":
-    default:
-      return invitados;
-  }
-}
-
 /**
  * Configura los filtros de la lista
  */
@@ -216,10 +289,23 @@ function configurarFiltros() {
       boton.classList.add("active");
       // Actualizar filtro
       filtroActual = boton.dataset.filter;
-      // Mostrar invitados filtrados
-      mostrarInvitados(invitadosData);
+      // Pedir al servidor la primera página del filtro
+      cargarInvitados();
     });
   });
+
+  // Búsqueda de texto completo en el backend, al dejar de escribir
+  const inputBusqueda = document.getElementById("buscar-invitados");
+  let temporizador = null;
+  inputBusqueda?.addEventListener("input", () => {
+    clearTimeout(temporizador);
+    temporizador = setTimeout(() => {
+      const texto = inputBusqueda.value.trim();
+      if (texto === textoBusqueda) return;
+      textoBusqueda = texto;
+      cargarInvitados();
+    }, 250);
+  });
 }
 
 /**
@@ -296,7 +382,7 @@ async function eliminarInvitado(id) {
 }
 
 /**
- * Obtiene los datos de invitados
+ * Obtiene los invitados cargados en la lista (solo las páginas ya mostradas)
  */
 function obtenerInvitados() {
   return invitadosData;